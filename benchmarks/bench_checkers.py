@@ -0,0 +1,279 @@
+"""Benchmarks of the docx checks, each on its own and end to end, at several document sizes.
+
+Every document is timed as it is and scaled up 10x and 100x, by repeating the body between the
+abstract and the references heading, and the references, with figures, tables and references
+renumbered. Papers made by the generator can be added with --generated. Each checker is timed on a freshly opened document, so it pays for everything it
+reads itself, the same as it would when it is the only check run.
+
+Results are written as json, and compared with a baseline from an earlier run:
+
+    python benchmarks/bench_checkers.py --output before.json
+    python benchmarks/bench_checkers.py --baseline before.json --output after.json
+
+Exits with 1 when a benchmark is slower than the baseline by more than --threshold.
+"""
+import argparse
+import copy
+import json
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from jacowvalidator import spms
+from jacowvalidator.docutils.doc import CHECKERS, DOCX_ENGINES, create_upload_variables, get_sections, \
+    get_spms_summary, open_document
+from jacowvalidator.docutils.figures import extract_figures
+from jacowvalidator.docutils.generate import save_paper
+from jacowvalidator.docutils.heading import get_headings
+from jacowvalidator.docutils.languages import get_language_tags_location
+from jacowvalidator.docutils.paragraph import get_paragraphs, parse_all_paragraphs
+from jacowvalidator.docutils.references import extract_references
+from jacowvalidator.docutils.styles import get_style_summary
+from jacowvalidator.docutils.tables import check_table_titles
+from jacowvalidator.docutils.walker import get_document_index
+
+ROOT = Path(__file__).parent.parent
+DEFAULT_DOCUMENTS = sorted((ROOT / 'tests' / 'data').glob('*.docx'))
+DEFAULT_CSV = ROOT / 'spms' / 'References_ipac21.csv'
+
+# the functions doing the work inside the checkers, timed on their own as well
+FUNCTIONS = {
+    'get_style_summary': get_style_summary,
+    'extract_references': extract_references,
+    'extract_figures': extract_figures,
+    'check_table_titles': check_table_titles,
+    'get_language_tags_location': get_language_tags_location,
+    'parse_all_paragraphs': parse_all_paragraphs,
+    'get_paragraphs': get_paragraphs,
+    'get_headings': get_headings,
+}
+
+RE_NUMBERED = re.compile(r'^(\[|Figure\s*|Fig\.\s*|Table\s*)(\d+)')
+
+
+def _renumber(element, offsets):
+    """Add the offset for its kind to the reference, figure or table number the paragraph starts with"""
+    texts = list(element.iter(qn('w:t')))
+    match = RE_NUMBERED.match(''.join(t.text or '' for t in texts))
+    if not match:
+        return
+    # the number is often in a different run to the word before it
+    replacement = f"{match.group(1)}{int(match.group(2)) + offsets[match.group(1)[0]]}"
+    remaining = match.end()
+    for t in texts:
+        text = t.text or ''
+        used = min(len(text), remaining)
+        t.text = replacement + text[used:]
+        replacement = ''
+        remaining = remaining - used
+        if not remaining:
+            break
+
+
+def scale_document(path, factor, destination):
+    """
+    Save a copy of the docx at path with the body and the references repeated factor times.
+    Documents without an abstract heading are only copied.
+    """
+    doc = Document(path)
+    index = get_document_index(doc)
+    if factor > 1 and index.abstract_index != -1:
+        children = list(doc.element.body.iterchildren())
+        sect_pr = doc.element.body.find(qn('w:sectPr'))
+        abstract = index.paragraphs[index.abstract_index]._element
+        if index.reference_index != -1:
+            # the body ends at the heading before the references
+            references_heading = index.paragraphs[index.reference_index]._element
+            body = children[children.index(abstract) + 1:children.index(references_heading)]
+            references = children[children.index(references_heading) + 1:]
+        else:
+            references_heading = sect_pr
+            body = children[children.index(abstract) + 1:]
+            references = []
+        references = [child for child in references if child is not sect_pr]
+
+        # numbers used by one copy, keyed by the first letter of what they number
+        counts = {
+            '[': sum(1 for p in index.after_abstract_paragraphs if p.text.startswith('[')),
+            'F': sum(1 for p in index.after_abstract_paragraphs if p.text.startswith(('Figure', 'Fig.'))),
+            'T': len(index.tables),
+        }
+        for copy_number in range(1, factor):
+            offsets = {kind: copy_number * count for kind, count in counts.items()}
+            for child in body:
+                child = copy.deepcopy(child)
+                _renumber(child, offsets)
+                if references_heading is not None:
+                    references_heading.addprevious(child)
+                else:
+                    doc.element.body.append(child)
+            for child in references:
+                child = copy.deepcopy(child)
+                _renumber(child, offsets)
+                if sect_pr is not None:
+                    sect_pr.addprevious(child)
+                else:
+                    doc.element.body.append(child)
+    doc.save(destination)
+    return destination
+
+
+def measure(run, repeat, setup=None):
+    """Time run repeat times, with setup called untimed before each run to make its argument"""
+    times = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        run(argument)
+        times.append(time.perf_counter() - start)
+    return {
+        'min': round(min(times), 6),
+        'median': round(statistics.median(times), 6),
+        'mean': round(statistics.mean(times), 6),
+        'runs': repeat,
+    }
+
+
+def _guarded(results, name, benchmark):
+    try:
+        results[name] = benchmark()
+    except Exception as err:
+        # eg the checks that need an abstract heading on a document without one
+        results[name] = {'error': f"{type(err).__name__}: {err}"}
+
+
+def bench_document(path, engines, repeat):
+    results = {}
+    engine = engines[0]
+
+    def fresh_index():
+        return get_document_index(open_document(path, engine))
+
+    for name in engines:
+        _guarded(results, f'open[{name}]', lambda: measure(lambda _: open_document(path, name), repeat))
+        _guarded(results, f'index[{name}]', lambda: measure(
+            get_document_index, repeat, setup=lambda: open_document(path, name)))
+        _guarded(results, f'create_upload_variables[{name}]', lambda: measure(
+            lambda _: create_upload_variables(open_document(path, name)), repeat))
+
+    for name, checker in CHECKERS.items():
+        if name == 'SPMS':
+            # needs a references csv, see bench_spms
+            continue
+
+        def run_checker(index, checker=checker):
+            inputs = {'index': index, 'summary': {}}
+            if 'sections' in checker['inputs']:
+                inputs['sections'] = get_sections(index)
+            checker['check'](*[inputs.get(i) for i in checker['inputs']])
+        _guarded(results, f'checker:{name}', lambda: measure(run_checker, repeat, setup=fresh_index))
+
+    for name, function in FUNCTIONS.items():
+        _guarded(results, name, lambda: measure(function, repeat, setup=fresh_index))
+    return results
+
+
+def bench_spms(csv_path, repeat):
+    """Reading the references csv into an index, and checking a paper against it"""
+    index = spms.ReferenceIndex(str(csv_path))
+    paper = next(iter(index.papers))
+    reference = index.get(paper)
+    authors = [{'text': reference['authors']}]
+    title = [{'text': reference['title'].title()}]
+
+    def cold(_):
+        spms._reference_indexes.clear()
+        get_spms_summary(paper, authors, title, str(csv_path), 'benchmark')
+
+    return {
+        'index': measure(lambda _: spms.ReferenceIndex(str(csv_path)), repeat),
+        'check_cold': measure(cold, repeat),
+        'check_warm': measure(lambda _: get_spms_summary(paper, authors, title, str(csv_path), 'benchmark'), repeat),
+    }
+
+
+def compare(results, baseline, threshold, min_time):
+    """
+    Print the change from baseline of every benchmark in both, return the ones slower than threshold.
+    Benchmarks that took less than min_time seconds are too noisy to count.
+    """
+    slower = []
+    for document, benchmarks in results['results'].items():
+        for name, result in benchmarks.items():
+            before = baseline.get('results', {}).get(document, {}).get(name)
+            if not before or 'min' not in before or 'min' not in result:
+                continue
+            ratio = result['min'] / before['min'] if before['min'] else 1.0
+            flag = ''
+            if ratio > threshold and max(result['min'], before['min']) >= min_time:
+                flag = '  SLOWER'
+                slower.append((document, name, ratio))
+            print(f"{document:<28} {name:<36} {before['min']:>10.4f} {result['min']:>10.4f} {ratio:>6.2f}x{flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('documents', nargs='*', type=Path, default=DEFAULT_DOCUMENTS)
+    parser.add_argument('--scales', default='1,10,100', help="comma separated scale factors")
+    parser.add_argument('--engines', default=','.join(DOCX_ENGINES), help="comma separated docx engines")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--generated', type=int, default=0, help="also benchmark this many generated papers")
+    parser.add_argument('--csv', type=Path, default=DEFAULT_CSV, help="references csv for the SPMS benchmark")
+    parser.add_argument('--output', type=Path, help="write the results to this json file")
+    parser.add_argument('--baseline', type=Path, help="compare with the results in this json file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown that counts as a regression")
+    parser.add_argument('--min-time', type=float, default=0.005, help="seconds below which a slowdown is ignored")
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',')
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'engines': engines,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        documents = list(args.documents)
+        for seed in range(args.generated):
+            # a paper the size of a typical submission, scaled like the others
+            documents.append(save_paper(
+                Path(directory) / f"generated{seed}.docx", seed=seed, sections=5, references=20, figures=6, tables=3))
+        for path in documents:
+            for scale in [int(s) for s in args.scales.split(',')]:
+                label = f"{path.stem} x{scale}"
+                scaled = scale_document(path, scale, Path(directory) / f"{path.stem}_x{scale}.docx")
+                print(f"benchmarking {label}", file=sys.stderr)
+                results['results'][label] = bench_document(scaled, engines, args.repeat)
+    if args.csv and args.csv.exists():
+        print(f"benchmarking spms {args.csv.name}", file=sys.stderr)
+        results['results'][f"spms {args.csv.stem}"] = bench_spms(args.csv, args.repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        slower = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.min_time)
+        if slower:
+            print(f"{len(slower)} benchmarks slower than the baseline by more than {args.threshold}x", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Benchmark of importing the app, as a gunicorn worker, a flask command or the tests do on startup.
+
+Each import is timed in a fresh interpreter with python -X importtime, and the slowest modules are
+listed with their time including what they import. The document parsers are imported on first use,
+so importing them on startup counts as a regression whatever the time.
+
+Results are written as json, and compared with a baseline from an earlier run:
+
+    python benchmarks/bench_import.py --output before.json
+    python benchmarks/bench_import.py --baseline before.json --output after.json
+
+Exits with 1 when a parser was imported or the import is slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# imported on first use, never by importing the app
+LAZY_MODULES = ['docx', 'TexSoup', 'jacowvalidator.docutils.doc', 'jacowvalidator.validation', 'jacowvalidator.batch']
+
+IMPORT_SCRIPT = """
+import sys
+import {module}
+print(' '.join(sorted(name for name in {lazy_modules!r} if name in sys.modules)))
+"""
+
+
+def time_import(module, lazy_modules):
+    """The total and cumulative time of each module in microseconds, and the lazy modules that were imported"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT.format(module=module, lazy_modules=lazy_modules)],
+        capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, result.stdout.split()
+
+
+def bench_import(module, repeat, top):
+    runs = [time_import(module, LAZY_MODULES) for _ in range(repeat)]
+    totals = [cumulative[module] for cumulative, _ in runs]
+    # the run with the median total, for the breakdown
+    cumulative, imported = sorted(runs, key=lambda run: run[0][module])[len(runs) // 2]
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[1:top + 1]
+    return {
+        'median': statistics.median(totals) / 1e6,
+        'min': min(totals) / 1e6,
+        'imported_lazy_modules': imported,
+        'slowest_modules': {name: us / 1e6 for name, us in slowest},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='jacowvalidator', help="module to import")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--top', type=int, default=15, help="number of slowest modules to list")
+    parser.add_argument('--output', type=Path, help="write the results to this json file")
+    parser.add_argument('--baseline', type=Path, help="compare with the results in this json file")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': {args.module: bench_import(args.module, args.repeat, args.top)},
+    }
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+
+    result = results['results'][args.module]
+    failed = False
+    if result['imported_lazy_modules']:
+        print(f"importing {args.module} imported {', '.join(result['imported_lazy_modules'])}", file=sys.stderr)
+        failed = True
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())['results'].get(args.module)
+        if baseline and result['median'] > baseline['median'] * args.threshold:
+            print(f"importing {args.module} took {result['median']:.3f}s, "
+                  f"{result['median'] / baseline['median']:.2f}x the baseline", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Micro-benchmark of checking paragraph style details against the STYLES rules.
+
+Compares the per paragraph cost of the compiled StyleRules with the dict walk check_style
+used before, on the style details of every paragraph in a document and every rule set.
+The style details are read once up front, so only the rule checking is timed.
+
+    python benchmarks/bench_rules.py [document.docx] [repeat]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+from docx import Document
+
+from jacowvalidator.docutils import abstract, authors, figures, heading, paragraph, references, tables, title
+from jacowvalidator.docutils.styles import OPERATORS, compile_rules, get_style_details
+from jacowvalidator.docutils.walker import get_document_index
+
+DEFAULT_DOCUMENT = Path(__file__).parent.parent / 'tests' / 'data' / 'test2.docx'
+
+
+def get_compare(inp, relate, cut):
+    """The range test of check_style before the rules were compiled"""
+    return OPERATORS[relate](inp, cut)
+
+
+def legacy_check(detail, compare):
+    """check_style as it was before the rules were compiled"""
+    style_ok = True
+    for key, value in compare.items():
+        if key not in detail:
+            continue
+        elif key in ['space_before', 'space_after']:
+            if isinstance(compare[key], list):
+                result = detail[key] is not None and get_compare(detail[key], compare[key][0], compare[key][1])
+                if not result:
+                    detail[key] = f"{detail[key]} should be {' '.join(map(str, compare[key]))}"
+            else:
+                result = any([detail[key] == compare[key], detail[key] is None and compare[key] == 0.0])
+                if not result:
+                    detail[key] = f"{detail[key]} should be {compare[key]}"
+        else:
+            result = detail[key] == compare[key]
+            if not result:
+                detail[key] = f"{detail[key]} should be {compare[key]}"
+        if not result:
+            style_ok = False
+
+    for key, value in detail.items():
+        if not key == 'all_caps' and key not in compare.keys():
+            detail[key] = 'NA'
+    return style_ok, detail
+
+
+def compiled_check(detail, rules):
+    return rules.check(detail), detail
+
+
+def get_rule_sets():
+    rule_sets = [heading.HEADING_STYLES, paragraph.PARAGRAPH_STYLES]
+    rule_sets.extend(module.STYLES for module in [abstract, authors, figures, references, tables, title])
+    return [compare for rule_set in rule_sets for compare in rule_set.values()]
+
+
+def main(path=DEFAULT_DOCUMENT, repeat=20):
+    details = []
+    for p in get_document_index(Document(path)).paragraphs:
+        if p.text.strip():
+            detail = get_style_details(p)
+            del detail['p']
+            details.append(detail)
+    compares = get_rule_sets()
+    rules = [compile_rules(compare) for compare in compares]
+
+    # same answer from both before timing them
+    for detail in details:
+        for compare, rule in zip(compares, rules):
+            assert legacy_check(dict(detail), compare) == compiled_check(dict(detail), rule)
+
+    checks = len(details) * len(compares)
+    legacy = min(timeit.repeat(
+        lambda: [legacy_check(dict(d), c) for d in details for c in compares], number=1, repeat=repeat))
+    compiled = min(timeit.repeat(
+        lambda: [compiled_check(dict(d), r) for d in details for r in rules], number=1, repeat=repeat))
+
+    print(f"{len(details)} paragraphs x {len(compares)} rule sets")
+    print(f"legacy   {legacy / checks * 1e6:.2f} us per paragraph check")
+    print(f"compiled {compiled / checks * 1e6:.2f} us per paragraph check")
+    print(f"speedup  {legacy / compiled:.1f}x")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2], *[int(a) for a in sys.argv[2:3]])
@@ -19,4 +19,5 @@ while true; do
 done
 
 # ExecStart=/usr/local/bin/pipenv run gunicorn -w 3 --pid /run/gunicorn/pid --timeout 180 wsgi:app -b 0.0.0.0:8080
-exec gunicorn --bind=0.0.0.0:5000 wsgi:app
\ No newline at end of file
+# workers, threads and preloading are set in gunicorn.conf.py from the environment
+exec gunicorn --config gunicorn.conf.py wsgi:app
\ No newline at end of file
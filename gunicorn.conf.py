@@ -0,0 +1,59 @@
+"""gunicorn settings, boot.sh runs gunicorn --config gunicorn.conf.py wsgi:app
+
+The app is loaded and warmed up in the master before the workers are forked, so they share the
+parsers, templates and SPMS indexes copy on write and are ready for their first upload. With
+GUNICORN_PRELOAD=False each worker loads and warms up the app itself, which uses more memory but
+lets a HUP reload the code. See jacowvalidator.warmup.
+
+    GUNICORN_BIND      address to listen on, 0.0.0.0:5000
+    WEB_CONCURRENCY    number of worker processes, 2 for each cpu plus 1
+    GUNICORN_THREADS   threads in each worker, more than 1 uses the gthread worker, 1
+    GUNICORN_TIMEOUT   seconds a request can take before its worker is restarted, 180
+    GUNICORN_PRELOAD   load the app in the master, True
+    GUNICORN_MAX_REQUESTS  requests a worker serves before it is replaced, 0 for never
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 180))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def _warmup(server):
+    from jacowvalidator.warmup import warmup
+    timings = warmup()
+    server.log.info("Warmup done in %.2fs: %s", sum(timings.values()),
+                    ', '.join(f'{name} {seconds:.2f}s' for name, seconds in timings.items()))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    _warmup(server)
+    from jacowvalidator import app, db
+    with app.app_context():
+        # connections the warmup opened can not be shared with the workers
+        db.engine.dispose()
+    # what is loaded now stays where it is, so the garbage collector in the workers does not copy it
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warmup(worker)
+
+
+def worker_exit(server, worker):
+    # write the upload logs still queued, also when the worker is stopped for taking too long
+    from jacowvalidator import app
+    from jacowvalidator.logwriter import get_log_writer
+    log_writer = get_log_writer(app.config)
+    if log_writer:
+        log_writer.close()
@@ -0,0 +1,125 @@
+"""structured log report
+
+Revision ID: 3b8e6f0c2d41
+Revises: f11722ad55fb
+Create Date: 2026-10-17 10:12:31.508214
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e6f0c2d41'
+down_revision = 'f11722ad55fb'
+branch_labels = None
+depends_on = None
+
+# rows converted at a time
+BATCH_SIZE = 1000
+
+log = sa.table(
+    'log',
+    sa.column('id', sa.Integer),
+    sa.column('status', sa.String),
+    sa.column('report', sa.Text),
+    sa.column('report_data', postgresql.JSONB),
+    sa.column('sections', postgresql.JSONB),
+    sa.column('ok', sa.Boolean),
+)
+
+
+def _loads(value):
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def decode_report(text):
+    """A report saved as text, where every value, or every item of a dict value, was json encoded again"""
+    try:
+        report = json.loads(text) if text else {}
+    except ValueError:
+        return {}
+    if not isinstance(report, dict):
+        return {}
+    return {
+        field: {key: _loads(item) for key, item in value.items()} if isinstance(value, dict) else _loads(value)
+        for field, value in report.items()
+    }
+
+
+def encode_report(report):
+    return json.dumps({
+        field: {key: json.dumps(item) for key, item in value.items()} if isinstance(value, dict) else json.dumps(value)
+        for field, value in (report or {}).items()
+    })
+
+
+def report_sections(report):
+    summary = report.get('summary') or {}
+    return {name: section.get('ok') if isinstance(section, dict) else None for name, section in summary.items()}
+
+
+def _convert(select, update, convert):
+    # in batches by id so a large log table is not read into memory at once, convert gives the
+    # new values of each row by column name, with its id as row_id
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(select.where(log.c.id > last_id).order_by(log.c.id).limit(BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        connection.execute(update, [convert(row) for row in rows])
+        last_id = rows[-1].id
+
+
+def _structured(row):
+    report = decode_report(row.report)
+    sections = report_sections(report)
+    return {
+        'row_id': row.id,
+        'report_data': report,
+        'sections': sections,
+        'ok': row.status == 'OK' and all(ok is not False for ok in sections.values()),
+    }
+
+
+def upgrade():
+    op.add_column('log', sa.Column('report_data', postgresql.JSONB(), nullable=True))
+    op.add_column('log', sa.Column('sections', postgresql.JSONB(), nullable=True))
+    op.add_column('log', sa.Column('ok', sa.Boolean(), nullable=True))
+
+    _convert(
+        sa.select(log.c.id, log.c.status, log.c.report),
+        log.update().where(log.c.id == sa.bindparam('row_id')),
+        _structured)
+
+    op.drop_column('log', 'report')
+    op.alter_column('log', 'report_data', new_column_name='report')
+    op.create_index(op.f('ix_log_status'), 'log', ['status'], unique=False)
+    op.create_index('ix_log_ok_timestamp', 'log', ['ok', 'timestamp'], unique=False)
+    op.create_index(
+        'ix_log_sections', 'log', ['sections'], unique=False,
+        postgresql_using='gin', postgresql_ops={'sections': 'jsonb_path_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_log_sections', table_name='log')
+    op.drop_index('ix_log_ok_timestamp', table_name='log')
+    op.drop_index(op.f('ix_log_status'), table_name='log')
+    op.alter_column('log', 'report', new_column_name='report_data')
+    op.add_column('log', sa.Column('report', sa.Text(), nullable=True))
+
+    _convert(
+        sa.select(log.c.id, log.c.report_data),
+        log.update().where(log.c.id == sa.bindparam('row_id')),
+        lambda row: {'row_id': row.id, 'report': encode_report(row.report_data)})
+
+    op.drop_column('log', 'report_data')
+    op.drop_column('log', 'ok')
+    op.drop_column('log', 'sections')
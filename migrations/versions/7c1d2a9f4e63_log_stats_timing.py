@@ -0,0 +1,66 @@
+"""log stats and timing
+
+Revision ID: 7c1d2a9f4e63
+Revises: 3b8e6f0c2d41
+Create Date: 2026-10-17 11:02:47.113950
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d2a9f4e63'
+down_revision = '3b8e6f0c2d41'
+branch_labels = None
+depends_on = None
+
+# rows filled in at a time
+BATCH_SIZE = 1000
+
+log = sa.table(
+    'log',
+    sa.column('id', sa.Integer),
+    sa.column('report', postgresql.JSONB),
+    sa.column('stats', postgresql.JSONB),
+    sa.column('timing', postgresql.JSONB),
+)
+
+
+def report_timing(report):
+    if not report.get('timing'):
+        return None
+    summary = report.get('summary') or {}
+    sections = {
+        name: section['timing'] for name, section in summary.items() if isinstance(section, dict) and section.get('timing')
+    }
+    return dict(report['timing'], sections=sections)
+
+
+def upgrade():
+    op.add_column('log', sa.Column('stats', postgresql.JSONB(), nullable=True))
+    op.add_column('log', sa.Column('timing', postgresql.JSONB(), nullable=True))
+
+    # only reports with a timing have stats, they were added to the report together
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(log.c.id, log.c.report)
+            .where(log.c.id > last_id, log.c.report.has_key('timing'))
+            .order_by(log.c.id).limit(BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        connection.execute(log.update().where(log.c.id == sa.bindparam('row_id')), [
+            {'row_id': row.id, 'stats': row.report.get('stats'), 'timing': report_timing(row.report)} for row in rows
+        ])
+        last_id = rows[-1].id
+
+    op.create_index('ix_log_timestamp_id', 'log', ['timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_log_timestamp_id', table_name='log')
+    op.drop_column('log', 'timing')
+    op.drop_column('log', 'stats')
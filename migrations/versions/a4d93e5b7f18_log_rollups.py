@@ -0,0 +1,70 @@
+"""log rollups
+
+Revision ID: a4d93e5b7f18
+Revises: 7c1d2a9f4e63
+Create Date: 2026-10-17 12:20:05.361027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d93e5b7f18'
+down_revision = '7c1d2a9f4e63'
+branch_labels = None
+depends_on = None
+
+
+# the rollups of the logs already written, the same as flask rebuild_rollups builds
+FILL_DAILY_LOG_COUNT = """
+INSERT INTO daily_log_count (day, conference_id, status, count, ok_count)
+SELECT CAST(timestamp AS DATE), COALESCE(conference_id, 0), COALESCE(status, ''), COUNT(*), COUNT(*) FILTER (WHERE ok)
+FROM log
+WHERE timestamp IS NOT NULL
+GROUP BY CAST(timestamp AS DATE), COALESCE(conference_id, 0), COALESCE(status, '')
+"""
+
+FILL_PAPER_STATUS = """
+INSERT INTO paper_status (filename, conference_id, attempts, first_seen, last_seen, status, ok)
+SELECT DISTINCT ON (COALESCE(filename, ''), COALESCE(conference_id, 0))
+    COALESCE(filename, ''), COALESCE(conference_id, 0), COUNT(*) OVER paper, MIN(timestamp) OVER paper,
+    timestamp, status, ok
+FROM log
+WHERE timestamp IS NOT NULL
+WINDOW paper AS (PARTITION BY COALESCE(filename, ''), COALESCE(conference_id, 0))
+ORDER BY COALESCE(filename, ''), COALESCE(conference_id, 0), timestamp DESC, id DESC
+"""
+
+
+def upgrade():
+    op.create_table(
+        'daily_log_count',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('conference_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=25), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('ok_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'conference_id', 'status')
+    )
+    op.create_table(
+        'paper_status',
+        sa.Column('filename', sa.String(length=64), nullable=False),
+        sa.Column('conference_id', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=25), nullable=True),
+        sa.Column('ok', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('filename', 'conference_id')
+    )
+    op.create_index(op.f('ix_paper_status_last_seen'), 'paper_status', ['last_seen'], unique=False)
+
+    op.execute(FILL_DAILY_LOG_COUNT)
+    op.execute(FILL_PAPER_STATUS)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_paper_status_last_seen'), table_name='paper_status')
+    op.drop_table('paper_status')
+    op.drop_table('daily_log_count')
@@ -0,0 +1,30 @@
+"""registry version
+
+Revision ID: d2f8b61c9a07
+Revises: a4d93e5b7f18
+Create Date: 2026-10-17 13:05:42.918274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f8b61c9a07'
+down_revision = 'a4d93e5b7f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    registry_version = op.create_table(
+        'registry_version',
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(registry_version, [{'name': 'conference', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('registry_version')
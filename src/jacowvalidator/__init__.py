@@ -4,6 +4,7 @@ from flask_uploads import UploadSet, configure_uploads
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from jacowvalidator.uploads import UploadRequest
 
 document_docx = UploadSet("document", "docx")
 document_tex = UploadSet("document", "tex")
@@ -11,6 +12,7 @@ document_tex = UploadSet("document", "tex")
 app = Flask(__name__)
 basedir = os.path.abspath(os.path.dirname(__file__))
 app.config.from_object('jacowvalidator.config.Config')
+app.request_class = UploadRequest
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
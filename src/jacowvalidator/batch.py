@@ -0,0 +1,114 @@
+"""Validates a folder of papers, for `jv validate`.
+
+Papers are checked in a pool of processes and a record is returned for each one as soon as it is
+done, with the ok flag of every section and how long each step took.
+"""
+import glob
+import multiprocessing
+import os
+import time
+
+from docx.opc.exceptions import PackageNotFoundError
+from TexSoup import TexSoup
+
+from jacowvalidator.docutils.doc import create_upload_variables, create_upload_variables_latex, get_spms_summary, \
+    AbstractNotFoundError, QUICK_CHECKS, open_document
+from jacowvalidator.docutils.page import TrackingOnError
+from jacowvalidator.docutils.preflight import preflight_docx
+from jacowvalidator.docutils.walker import get_document_index
+from jacowvalidator.spms import PaperNotFoundError
+from jacowvalidator.utils import report_sections, sections_ok
+
+PAPER_EXTENSIONS = ['.docx', '.tex']
+
+
+def find_papers(paths):
+    """The docx and tex files in paths, each path is a file, a directory, searched recursively, or a glob"""
+    papers = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, '**', '*'), recursive=True)
+        else:
+            matches = glob.glob(path, recursive=True)
+        papers.extend(
+            match for match in matches
+            if os.path.isfile(match) and os.path.splitext(match)[1].lower() in PAPER_EXTENSIONS)
+    # the same paper can be given twice, eg by a directory and a glob
+    return sorted(set(papers))
+
+
+def validate_paper(path, conference_path=None, engine='docx', quick_check=False):
+    """
+    Check the paper at path and return its record:
+      paper    the paper name, the file name without the extension
+      status   'OK' or the name of the error that stopped the check, as in the upload Log
+      ok       False if the check stopped or a section failed
+      sections the ok flag of each section checked
+      timings  seconds taken by the docx pre-flight check, to parse the file, run the checks and check it
+               against the references csv
+    """
+    paper_name, extension = os.path.splitext(os.path.basename(path))
+    record = {'paper': paper_name, 'path': path, 'status': 'OK', 'ok': True, 'sections': {}, 'timings': {}}
+    timings = record['timings']
+    summary = {}
+    start = time.perf_counter()
+    try:
+        if extension.lower() == '.tex':
+            with open(path, encoding="utf8") as f:
+                doc = TexSoup(f)
+            timings['parse'] = time.perf_counter() - start
+            summary, authors, title = create_upload_variables_latex(doc)
+        else:
+            preflight = preflight_docx(path)
+            timings['preflight'] = time.perf_counter() - start
+            doc_index = get_document_index(open_document(path, engine, preflight['parts']))
+            timings['parse'] = time.perf_counter() - start - timings['preflight']
+            summary, authors, title = create_upload_variables(
+                doc_index, QUICK_CHECKS if quick_check else None, paper_name, conference_path,
+                os.path.basename(conference_path) if conference_path else None)
+        timings['checks'] = time.perf_counter() - start - timings['parse'] - timings.get('preflight', 0)
+
+        if 'SPMS' in summary:
+            # run with the docx checks, its time is counted apart from theirs
+            timings['spms'] = summary['SPMS']['timing']['wall']
+            timings['checks'] -= timings['spms']
+        elif conference_path:
+            spms_start = time.perf_counter()
+            summary['SPMS'], _ = get_spms_summary(
+                paper_name, authors, title, conference_path, os.path.basename(conference_path))
+            timings['spms'] = time.perf_counter() - spms_start
+    except (PackageNotFoundError, ValueError):
+        record['status'] = 'PackageNotFoundError'
+        record['error'] = f"Failed to open document {paper_name}{extension}"
+    except (TrackingOnError, OSError, PaperNotFoundError, AbstractNotFoundError) as err:
+        record['status'] = type(err).__name__
+        record['error'] = str(err)
+    except Exception as err:
+        record['status'] = 'Exception'
+        record['error'] = f"{type(err).__name__}: {err}"
+
+    record['sections'] = report_sections({'summary': summary})
+    record['ok'] = sections_ok(record['status'], record['sections'])
+    timings['total'] = time.perf_counter() - start
+    record['timings'] = {step: round(seconds, 6) for step, seconds in timings.items()}
+    return record
+
+
+def _validate_paper(args):
+    return validate_paper(*args)
+
+
+def validate_papers(papers, conference_path=None, engine='docx', quick_check=False, jobs=1):
+    """
+    Yield the record of each paper as it is done, in the order they finish when jobs is more than one.
+    jobs is the number of processes, 0 for one per cpu.
+    """
+    tasks = [(paper, conference_path, engine, quick_check) for paper in papers]
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _validate_paper(task)
+        return
+
+    with multiprocessing.Pool(jobs or None) as pool:
+        # small chunks keep the processes busy without holding finished records back for long
+        yield from pool.imap_unordered(_validate_paper, tasks, chunksize=4)
@@ -0,0 +1,86 @@
+"""Details of the running build, shown on the upload page and used as the version of cached reports.
+
+The Dockerfile writes the BUILD_ build args to build_envs.txt, BUILD_ variables in the environment
+override them. Without a BUILD_GIT_COMMIT, as when running from a checkout, the commit is read from
+the files of the git repository. Nothing is run, and nothing is read until the first use.
+"""
+import os
+from datetime import datetime
+
+BUILD_PREFIX = 'BUILD_'
+
+# the checkout the app is running from, when it is not installed from a package
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def read_build_envs(path):
+    """The BUILD_ variables in the file at path, one NAME=value a line, empty when there is no file"""
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    envs = {}
+    for line in lines:
+        name, sep, value = line.partition('=')
+        if sep and name.startswith(BUILD_PREFIX):
+            envs[name.strip()] = value.strip()
+    return envs
+
+
+def read_git_head(directory):
+    """The commit checked out in the git repository at directory, None if it is not one"""
+    git_dir = os.path.join(directory, '.git')
+    try:
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return head or None
+        ref = head[len('ref: '):]
+        ref_path = os.path.join(git_dir, ref)
+        if os.path.exists(ref_path):
+            with open(ref_path) as f:
+                return f.read().strip() or None
+        with open(os.path.join(git_dir, 'packed-refs')) as f:
+            for line in f:
+                sha, _, name = line.strip().partition(' ')
+                if name == ref:
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def parse_build_date(value):
+    """BUILD_CREATED as a datetime, it can be seconds since the epoch or an ISO 8601 date"""
+    if not value:
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value))
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def load_build_info(path, environ=os.environ, directory=PROJECT_DIR):
+    envs = read_build_envs(path)
+    envs.update((name, value) for name, value in environ.items() if name.startswith(BUILD_PREFIX) and value)
+    commit = envs.get('BUILD_GIT_COMMIT') or read_git_head(directory)
+    return {
+        'commit_sha': commit[:7] if commit else None,
+        'commit_date': parse_build_date(envs.get('BUILD_CREATED')),
+        'branch': envs.get('BUILD_GIT_BRANCH'),
+        'build_number': envs.get('BUILD_NUMBER'),
+    }
+
+
+_build_info = None
+
+
+def get_build_info(config):
+    """The build info of this process, read from BUILD_ENVS and the environment on first use"""
+    global _build_info
+    if _build_info is None:
+        _build_info = load_build_info(config['BUILD_ENVS'])
+    return _build_info
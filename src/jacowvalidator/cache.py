@@ -0,0 +1,235 @@
+"""Cache of validation results for documents that have been checked before.
+
+Results are keyed on the sha256 of the uploaded file along with everything else that
+changes the report (rule set version, conference, paper name and references csv), so
+an identical upload gets the same report without running the checks again.
+
+There are two tiers, a small LRU in each process and a directory shared by all the
+processes, which is trimmed back to a maximum size by removing the least recently
+used entries.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+# bump when a check or rule changes, so reports from the old rules are not served
+RULES_VERSION = '1'
+
+METADATA_FIELDS = ['author', 'revision', 'created', 'modified', 'version', 'language']
+DATE_FIELDS = ['created', 'modified']
+
+
+def file_digest(path):
+    """sha256 of the file at path, or of a binary file object which is read from the start"""
+    if hasattr(path, 'digest'):
+        # an UploadFile hashed as it was received
+        return path.digest()
+
+    digest = hashlib.sha256()
+    with open_binary(path) as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def open_binary(path):
+    """Open the file at path for reading, a file object is given back from the start and left open"""
+    if hasattr(path, 'read'):
+        path.seek(0)
+        yield path
+        path.seek(0)
+    else:
+        with open(path, 'rb') as f:
+            yield f
+
+
+def file_version(path):
+    """Changes when the file at path changes, empty when there is no file"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return ''
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def make_cache_key(digest, *parts):
+    """Key for a result, from the file digest and the other values the result depends on"""
+    key = hashlib.sha256(digest.encode())
+    key.update(RULES_VERSION.encode())
+    for part in parts:
+        key.update(b'\0' + str(part).encode())
+    return key.hexdigest()
+
+
+def dump_metadata(metadata):
+    """Document metadata shown on the report, as json friendly values"""
+    if not metadata:
+        return None
+    details = {field: getattr(metadata, field, None) for field in METADATA_FIELDS}
+    for field in DATE_FIELDS:
+        if details[field] is not None:
+            details[field] = details[field].isoformat()
+    return details
+
+
+def load_metadata(details):
+    if not details:
+        return []
+    details = dict(details)
+    for field in DATE_FIELDS:
+        if details[field] is not None:
+            details[field] = datetime.fromisoformat(details[field])
+    return SimpleNamespace(**details)
+
+
+class ResultCache:
+    """
+    Two tier cache of json results.
+
+    max_entries  number of results kept in memory, 0 to only use the directory
+    directory    where results are shared between processes, None to only use memory
+    max_bytes    size the directory is trimmed back to after a result is added
+    """
+    def __init__(self, max_entries=128, directory=None, max_bytes=100 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                # can still cache in memory
+                self.directory = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the result stored for key, or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits = self.hits + 1
+                return json.loads(data)
+
+        data = self._read(key)
+        with self._lock:
+            if data is None:
+                self.misses = self.misses + 1
+                return None
+            self.hits = self.hits + 1
+            self._remember(key, data)
+        return json.loads(data)
+
+    def set(self, key, result):
+        """Store a result, results that can not be stored as json are skipped"""
+        try:
+            data = json.dumps(result)
+        except (TypeError, ValueError):
+            return False
+
+        with self._lock:
+            self._remember(key, data)
+        self._write(key, data)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path in self._entries():
+            _remove(path)
+
+    def _remember(self, key, data):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = f.read()
+            # the modification time is used as the last use time when trimming
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write(self, key, data):
+        if not self.directory:
+            return
+        # write to a temporary file and rename so other processes never see a partial result
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            _remove(temp_path)
+            return
+        self._trim()
+
+    def _entries(self):
+        if not self.directory:
+            return []
+        try:
+            return [entry.path for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        except OSError:
+            return []
+
+    def _trim(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total = total - size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # already removed by another process
+        pass
+
+
+_result_cache = None
+
+
+def get_result_cache(config):
+    """The ResultCache for this process, set up from the app config on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=config['RESULT_CACHE_SIZE'],
+            directory=config['RESULT_CACHE_DIR'] or None,
+            max_bytes=config['RESULT_CACHE_MAX_BYTES'])
+    return _result_cache
@@ -0,0 +1,93 @@
+"""The conferences, kept in memory by each process instead of read from the database for every upload.
+
+The registry is loaded once and loaded again only when the conference version in the
+registry_version table has changed. The admin conference pages add to the version in the
+transaction that saves a conference, so every web worker, the jobs worker and the log writer see
+the change on their next lookup. The version is read at most once a request, and on every lookup
+outside a request.
+"""
+import os
+import threading
+
+from flask import g, has_request_context
+
+from jacowvalidator import app, db
+from jacowvalidator.models import Conference, RegistryVersion
+
+REGISTRY_NAME = 'conference'
+
+
+def bump_conference_version():
+    """Add one to the conference version, in the session's transaction, call it before committing a change"""
+    updated = RegistryVersion.query.filter_by(name=REGISTRY_NAME) \
+        .update({'version': RegistryVersion.version + 1}, synchronize_session=False)
+    if not updated:
+        db.session.add(RegistryVersion(name=REGISTRY_NAME, version=1))
+    if has_request_context():
+        # read the version again in this request, once it is committed
+        g.pop('conference_version_checked', None)
+
+
+def _read_version():
+    return db.session.query(RegistryVersion.version).filter_by(name=REGISTRY_NAME).scalar() or 0
+
+
+def _conference_info(conference):
+    return {
+        'id': conference.id,
+        'short_name': conference.short_name,
+        'name': conference.name,
+        'path': conference.path,
+        # the references csv of the conference
+        'csv_path': os.path.join(app.config['JACOW_REFERENCES_PATH'], conference.path),
+        'display_order': conference.display_order,
+        'is_active': conference.is_active,
+    }
+
+
+class ConferenceRegistry:
+    """Every conference, as a dict keyed by short name, and the version they were loaded at"""
+    def __init__(self):
+        self.version = None
+        self.conferences = {}
+        self._lock = threading.Lock()
+
+    def _check(self):
+        if has_request_context():
+            if g.get('conference_version_checked'):
+                return
+            g.conference_version_checked = True
+        version = _read_version()
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            # the version is read before the conferences, so a change made in between is loaded next time
+            self.conferences = {
+                conference.short_name: _conference_info(conference) for conference in Conference.query.all()}
+            self.version = version
+
+    def get(self, short_name):
+        """The conference with short_name, None if there is none"""
+        self._check()
+        return self.conferences.get(short_name)
+
+    def all(self):
+        self._check()
+        return self.conferences
+
+    def active(self):
+        """Short names of the active conferences, in display order"""
+        self._check()
+        active = [conference for conference in self.conferences.values() if conference['is_active']]
+        # as the database orders them, conferences without a display order last
+        active.sort(key=lambda conference: (conference['display_order'] is None, conference['display_order'] or 0))
+        return [conference['short_name'] for conference in active]
+
+
+_registry = ConferenceRegistry()
+
+
+def get_conference_registry():
+    return _registry
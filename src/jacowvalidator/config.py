@@ -13,7 +13,31 @@ class Config:
     BUILD_ENVS = os.environ.get('BUILD_ENVS') or 'build_envs.txt'
 
     UPLOADS_DEFAULT_DEST = os.environ.get("UPLOADS_DEFAULT_DEST", "/var/tmp")
+    # uploads are checked from memory, or from an unnamed file in UPLOAD_SPOOL_DIR once bigger than
+    # UPLOAD_SPOOL_SIZE, and bigger requests than MAX_CONTENT_LENGTH are refused, see jacowvalidator.uploads
+    MAX_CONTENT_LENGTH = int(os.environ.get("MAX_UPLOAD_SIZE", 32 * 1024 * 1024))
+    UPLOAD_SPOOL_SIZE = int(os.environ.get("UPLOAD_SPOOL_SIZE", 4 * 1024 * 1024))
+    UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else "")
     JACOW_REFERENCES_PATH = os.environ.get("JACOW_REFERENCES_PATH", "./spms")
+    # validation results cache, see jacowvalidator.cache
+    RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 128))
+    RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(UPLOADS_DEFAULT_DEST, "jacow_cache"))
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+    # docx engine used for uploads, 'docx' (python-docx) or 'xml' (raw xml fast path)
+    DOCX_ENGINE = os.environ.get("DOCX_ENGINE", "docx")
+    # check uploads in the jobs worker (flask jobs_worker) instead of the web request, see jacowvalidator.jobs
+    UPLOAD_JOBS = os.environ.get("UPLOAD_JOBS", "False") == "True"
+    JOBS_DATABASE = os.environ.get("JOBS_DATABASE", os.path.join(UPLOADS_DEFAULT_DEST, "jacow_jobs.sqlite"))
+    JOBS_TIMEOUT = int(os.environ.get("JOBS_TIMEOUT", 600))
+    JOBS_KEEP = int(os.environ.get("JOBS_KEEP", 24 * 60 * 60))
+    # upload logs are written in batches by a thread in each process, LOG_QUEUE_SIZE 0 writes them in the
+    # request, see jacowvalidator.logwriter. Queued logs are written when a worker exits or times out,
+    # but are lost when it is killed outright, eg by SIGKILL or the OOM killer
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 1000))
+    LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", 50))
+    LOG_FLUSH_INTERVAL = float(os.environ.get("LOG_FLUSH_INTERVAL", 1.0))
+    # logs shown on each page of the admin summary and log views
+    LOG_PAGE_SIZE = int(os.environ.get("LOG_PAGE_SIZE", 100))
 
     db_host = os.environ.get("API_DB_HOST") or 'localhost'
     db_port = os.environ.get("API_DB_PORT") or '5432'
@@ -1,4 +1,4 @@
-from jacowvalidator.docutils.styles import check_style_detail
+from jacowvalidator.docutils.styles import check_style_detail, compile_rules_dict
 
 STYLES = {
     'normal': {
@@ -15,6 +15,7 @@ STYLES = {
         'italic': True,
     }
 }
+RULES = compile_rules_dict(STYLES)
 EXTRA_RULES = [
     "Text must be <b>Abstract</b>",
 ]
@@ -32,7 +33,7 @@ def get_abstract_detail(p):
 def get_abstract_summary(p):
     style_compare = STYLES['normal']
     details = get_abstract_detail(p)
-    details.update(check_style_detail(p, style_compare))
+    details.update(check_style_detail(p, RULES['normal']))
     title_style_ok = p.style.name == style_compare['styles']['jacow']
     details.update({'title_style_ok': title_style_ok, 'style': p.style.name})
 
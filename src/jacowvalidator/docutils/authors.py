@@ -1,5 +1,5 @@
 import re
-from jacowvalidator.docutils.styles import check_style_detail
+from jacowvalidator.docutils.styles import check_style_detail, compile_rules_dict, get_direct_properties
 
 NON_BREAKING_SPACE = '\u00A0'
 LINE_TERMINATOR_CHARS = ['\u000A', '\u000B', '\u000C', '\u000D', '\u0085', '\u2028', '\u2029', '\n', '\\n']
@@ -22,6 +22,7 @@ STYLES = {
        'italic': None,
    }
 }
+RULES = compile_rules_dict(STYLES)
 EXTRA_RULES = ['Case: UPPER and lowercase']
 HELP_INFO = 'SCEAuthors'
 
@@ -30,7 +31,7 @@ IGNORE = ['P.R. China']
 def get_author_details(p):
     superscript_removed_text = ''  # remove superscript footnotes
     for r in p.runs:
-        superscript_removed_text += r.text if not r.font.superscript else ''
+        superscript_removed_text += r.text if not get_direct_properties(r)['superscript'] else ''
     author_detail = {
         'text': superscript_removed_text,
         'original_text': p.text,
@@ -44,7 +45,7 @@ def get_author_summary(paragraphs):
     for p in paragraphs:
         if p.text.strip():
             detail = get_author_details(p)
-            detail.update(check_style_detail(p, style_compare))
+            detail.update(check_style_detail(p, RULES['normal']))
             title_style_ok = p.style.name == style_compare['styles']['jacow']
             detail.update({'title_style_ok': title_style_ok, 'style': p.style.name})
             author_details.append(detail)
@@ -1,4 +1,15 @@
 import os
+import time
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.package import Unmarshaller
+from docx.opc.packuri import PACKAGE_URI
+from docx.opc.part import PartFactory
+from docx.opc.phys_pkg import PhysPkgReader
+from docx.opc.pkgreader import PackageReader, _ContentTypeMap
+from docx.package import Package
+from jacowvalidator.docutils.rawxml import open_raw_document
+from jacowvalidator.docutils.walker import get_document_index
 from jacowvalidator.docutils.styles import get_style_summary
 from jacowvalidator.docutils.margins import get_margin_summary
 from jacowvalidator.docutils.languages import get_language_summary
@@ -11,7 +22,7 @@ from jacowvalidator.docutils.references import get_reference_summary
 from jacowvalidator.docutils.figures import get_figure_summary
 from jacowvalidator.docutils.tables import get_table_summary
 from jacowvalidator.spms import reference_csv_check, HELP_INFO as SPMS_HELP_INFO, EXTRA_INFO as SPMS_EXTRA_INFO
-from jacowvalidator.models import Conference
+from jacowvalidator.conferences import get_conference_registry
 
 class AbstractNotFoundError(Exception):
     """Raised when the paper submitted by a user has no matching entry in the
@@ -19,124 +30,225 @@ class AbstractNotFoundError(Exception):
     pass
 
 
-def parse_paragraphs(doc):
-    title_index = author_index = abstract_index = reference_index = -1
-    current_style = None
+class _ReadPartsPkgReader:
+    """python-docx package reader that is given the parts already read from the zip"""
+    def __init__(self, pkg_file, parts):
+        self._reader = PhysPkgReader(pkg_file)
+        self._parts = parts
+
+    def blob_for(self, pack_uri):
+        if pack_uri.membername in self._parts:
+            return self._parts[pack_uri.membername]
+        return self._reader.blob_for(pack_uri)
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+
+def open_docx(docx, parts=None):
+    """
+    python-docx Document, as Document(docx) opens it, with the xml of parts already read from the
+    zip by part name, so preflight_docx and python-docx do not both decompress the main document
+    """
+    if not parts:
+        return Document(docx)
+    # PackageReader.from_file and Package.open, with the reader given the parts
+    phys_reader = _ReadPartsPkgReader(docx, parts)
+    content_types = _ContentTypeMap.from_xml(phys_reader.content_types_xml)
+    pkg_srels = PackageReader._srels_for(phys_reader, PACKAGE_URI)
+    sparts = PackageReader._load_serialized_parts(phys_reader, pkg_srels, content_types)
+    phys_reader.close()
+    package = Package()
+    Unmarshaller.unmarshal(PackageReader(content_types, pkg_srels, sparts), package, PartFactory)
+
+    document_part = package.main_document_part
+    if document_part.content_type != CT.WML_DOCUMENT_MAIN:
+        raise ValueError(f"file '{docx}' is not a Word file, content type is '{document_part.content_type}'")
+    return document_part.document
+
+
+# python-docx, or the raw xml fast path which reads the same values straight from the xml
+DOCX_ENGINES = {
+    'docx': open_docx,
+    'xml': open_raw_document,
+}
+
+
+def open_document(path, engine='docx', parts=None):
+    """
+    Open a docx with the named engine, unknown names use python-docx. parts has the xml of parts
+    already read from the zip by part name, as preflight_docx returns them.
+    """
+    return DOCX_ENGINES.get(engine, open_docx)(path, parts)
 
-    summary = {}
-    for i, p in enumerate(doc.paragraphs):
-        # first paragraph is the title
-        text = p.text.strip()
-        if not text:
-            continue
-
-        # first non empty paragraph is the title
-        # Assume all of title is same style so end of title is when the style changes
-        if title_index == -1:
-            title_index = i
-        elif title_index != -1 and author_index == -1 and current_style != p.style.name:
-            author_index = i
-
-        # find abstract heading
-        if text.lower() == 'abstract':
-            abstract_index = i
-            summary['Abstract'] = get_abstract_summary(p)
-
-        current_style = p.style.name
-
-        # all headings, paragraphs captions, figures, tables, equations should be between these two
-        # if abstract_index > 0 and reference_index == -1:
-        #     print(i)
-        #     # check if a known jacow style
-        #     for section_type, section_data in DETAILS.items():
-        #         if 'styles' in section_data:
-        #             if p.style.name in section_data['styles']['jacow']:
-        #                 found = f"{section_type} - {p.style.name}"
-        #                 print(found)
-        #                 break
-        #             elif p.style.name in section_data['styles']['normal']:
-        #                 found = f"{section_type} -- {p.style.name}"
-        #                 print(found)
-        #                 break
-        #         else:
-        #             for sub_type, sub_data in section_data.items():
-        #                 if p.style.name in sub_data['styles']['jacow']:
-        #                     found = f"{section_type} - {sub_type} - {p.style.name}"
-        #                     print(found)
-        #                 elif 'normal' in sub_data['styles'] and p.style.name in sub_data['styles']['normal']:
-        #                     found = f"{section_type} -- {sub_type} -- {p.style.name}"
-        #                     print(found)
-        #                     break
-
-        # find reference heading
-        if text.lower() == 'references':
-            reference_index = i
-            break
+
+def get_sections(doc):
+    """The document index, once it is known to have the sections the title, author and abstract checks need"""
+    index = get_document_index(doc)
 
     # if abstract not found
-    if abstract_index == -1:
+    if index.abstract_index == -1:
         raise AbstractNotFoundError("Abstract header not found")
+    return index
+
+
+def parse_paragraphs(doc):
+    index = get_sections(doc)
 
     # authors is all the text between title and abstract heading
-    summary['Title'] = get_title_summary(doc.paragraphs[title_index: author_index])
-    summary['Authors'] = get_author_summary(doc.paragraphs[author_index: abstract_index])
+    return {
+        'Abstract': get_abstract_summary(index.abstract_paragraph),
+        'Title': get_title_summary(index.title_paragraphs),
+        'Authors': get_author_summary(index.author_paragraphs),
+    }
 
-    return summary
 
+# Every check that makes up a docx report, in report order. Each one declares
+#   check     function called with the inputs, returns the summary for the section or None to leave it out
+#   inputs    what check is called with, in order:
+#             index     the DocumentIndex
+#             sections  the DocumentIndex, once the abstract heading has been found
+#             summary   the summaries of the checks it requires
+#             anything else is passed in to run_checkers, the SPMS check is given paper_name, conference_path
+#             and conference_id
+#   requires  checks whose summary it needs, they are run first
+CHECKERS = {}
 
-def create_upload_variables(doc):
-    summary = {}
-    doc_summary = parse_paragraphs(doc)
 
-    # get style details
-    summary = {
-        'Styles': get_style_summary(doc),
-        'Margins': get_margin_summary(doc),
-        'Languages': get_language_summary(doc),
-        'List': get_all_paragraph_summary(doc),
-        'Title': doc_summary['Title'],
-        'Authors': doc_summary['Authors'],
-        'Abstract': doc_summary['Abstract'],
-        'Headings': get_heading_summary(doc),
-        'Paragraphs': get_paragraph_summary(doc),
-        'References': get_reference_summary(doc),
-        'Figures': get_figure_summary(doc),
-        'Tables': get_table_summary(doc)
+def register_checker(name, check, inputs=('index',), requires=()):
+    for required in requires:
+        if required not in CHECKERS:
+            raise ValueError(f"Checker {name} requires {required} which has not been registered")
+    CHECKERS[name] = {'check': check, 'inputs': list(inputs), 'requires': list(requires)}
+
+
+def get_checker_names(names=None):
+    """The checkers to run for names, with everything they require, in report order"""
+    if names is None:
+        return list(CHECKERS)
+
+    needed = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in CHECKERS:
+            raise ValueError(f"Unknown checker {name}")
+        if name not in needed:
+            needed.add(name)
+            pending.extend(CHECKERS[name]['requires'])
+    return [name for name in CHECKERS if name in needed]
+
+
+def get_timing(start, cpu_start):
+    """
+    Seconds since start, from time.perf_counter, and cpu seconds since cpu_start, from time.process_time.
+    The cpu time is for the whole process, so it includes other threads that were busy at the same time.
+    """
+    return {
+        'wall': round(time.perf_counter() - start, 6),
+        'cpu': round(time.process_time() - cpu_start, 6),
     }
 
+
+def run_checkers(doc, names=None, **inputs):
+    """
+    Run the named checks, all of them when names is None, and the checks they require.
+    Returns the summary of every check run, in report order, each with the timing of its check.
+    """
+    selected = get_checker_names(names)
+
+    # walk the document once and share the result with every check
+    inputs['index'] = get_document_index(doc)
+    # find the sections up front so a missing abstract fails before any work is done
+    if any('sections' in CHECKERS[name]['inputs'] for name in selected):
+        inputs['sections'] = get_sections(inputs['index'])
+
+    summary = {}
+    inputs['summary'] = summary
+    for name in selected:
+        checker = CHECKERS[name]
+        start, cpu_start = time.perf_counter(), time.process_time()
+        result = checker['check'](*[inputs.get(i) for i in checker['inputs']])
+        if result is not None:
+            result['timing'] = get_timing(start, cpu_start)
+            summary[name] = result
+    return summary
+
+
+def _check_spms(summary, paper_name, conference_path, conference_id):
+    if not conference_path:
+        return None
+    spms_summary, reference_csv_details = get_spms_summary(
+        paper_name, summary['Authors']['details'], summary['Title']['details'], conference_path,
+        conference_id or conference_path)
+    # taken out of the summary by the caller, for the report
+    spms_summary['reference_csv_details'] = reference_csv_details
+    return spms_summary
+
+
+register_checker('Styles', get_style_summary)
+register_checker('Margins', get_margin_summary)
+register_checker('Languages', get_language_summary)
+register_checker('List', get_all_paragraph_summary)
+register_checker('Title', lambda index: get_title_summary(index.title_paragraphs), inputs=['sections'])
+register_checker('Authors', lambda index: get_author_summary(index.author_paragraphs), inputs=['sections'])
+register_checker('Abstract', lambda index: get_abstract_summary(index.abstract_paragraph), inputs=['sections'])
+register_checker('Headings', get_heading_summary)
+register_checker('Paragraphs', get_paragraph_summary)
+register_checker('References', get_reference_summary)
+register_checker('Figures', get_figure_summary)
+register_checker('Tables', get_table_summary)
+register_checker(
+    'SPMS', _check_spms, inputs=['summary', 'paper_name', 'conference_path', 'conference_id'],
+    requires=['Title', 'Authors'])
+
+# editors quick check of a paper against the SPMS references, the Title and Authors checks it requires are run with it
+QUICK_CHECKS = ['SPMS']
+
+
+def create_upload_variables(doc, checks=None, paper_name=None, conference_path=None, conference_id=None):
+    # SPMS is left out without a conference_path, its section holds the reference_csv_details
+    summary = run_checkers(
+        doc, checks, paper_name=paper_name, conference_path=conference_path, conference_id=conference_id)
+
     # get title and author to use in SPMS check
-    title = summary['Title']['details']
-    authors = summary['Authors']['details']
+    title = summary['Title']['details'] if 'Title' in summary else []
+    authors = summary['Authors']['details'] if 'Authors' in summary else []
 
     return summary, authors, title
 
 
 def create_spms_variables(paper_name, authors, title, conference_path, conference_id=False):
     summary = {}
-    conferences = Conference.query.all()
-    if len(conferences) > 0:
-        author_text = ''.join([a['text'] + ", " for a in authors])
-        title_text = ''.join([a['text'] for a in title])
-        reference_csv_details = reference_csv_check(paper_name, title_text, author_text, conference_path)
-        conference_detail = conference_path
-        if conference_id:
-            conference_detail = conference_id
-        summary['SPMS'] = {
-            'title': ' SPMS ('+conference_detail+') Abstract Title Author Check',
-            'help_info': SPMS_HELP_INFO,
-            'extra_info': SPMS_EXTRA_INFO,
-            'ok': reference_csv_details['title']['match'] and reference_csv_details['author']['match'],
-            'message': 'SPMS Abstract Title Author Check issues',
-            'details': reference_csv_details['summary'],
-            'anchor': 'spms',
-            'conference': conference_detail
-        }
+    if get_conference_registry().all():
+        start, cpu_start = time.perf_counter(), time.process_time()
+        summary['SPMS'], reference_csv_details = \
+            get_spms_summary(paper_name, authors, title, conference_path, conference_id or conference_path)
+        summary['SPMS']['timing'] = get_timing(start, cpu_start)
     else:
         reference_csv_details = False
 
     return summary, reference_csv_details
 
 
+def get_spms_summary(paper_name, authors, title, conference_path, conference_detail):
+    """The SPMS section for a paper checked against the references csv at conference_path"""
+    author_text = ''.join([a['text'] + ", " for a in authors])
+    title_text = ''.join([a['text'] for a in title])
+    reference_csv_details = reference_csv_check(paper_name, title_text, author_text, conference_path)
+    summary = {
+        'title': ' SPMS ('+conference_detail+') Abstract Title Author Check',
+        'help_info': SPMS_HELP_INFO,
+        'extra_info': SPMS_EXTRA_INFO,
+        'ok': reference_csv_details['title']['match'] and reference_csv_details['author']['match'],
+        'message': 'SPMS Abstract Title Author Check issues',
+        'details': reference_csv_details['summary'],
+        'anchor': 'spms',
+        'conference': conference_detail
+    }
+    return summary, reference_csv_details
+
+
 def create_upload_variables_latex(doc):
     summary = {
         'Title': get_title_summary_latex(doc.title),
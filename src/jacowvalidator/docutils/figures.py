@@ -1,11 +1,16 @@
 import re
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from itertools import chain
-from jacowvalidator.docutils.styles import check_style
+from docx.table import Table
+from jacowvalidator.docutils.styles import check_style, compile_rules_dict
+from jacowvalidator.docutils.mentions import get_mention_index, FIGURE
+from jacowvalidator.docutils.walker import get_document_index
 
 RE_FIG_TITLES = re.compile(r'(^Figure \d+[.:])')
 RE_WRONG_TITLES = re.compile(r'(^Fig.\s?\d+|^Figure\s?\d+[.\s]+)')
-RE_FIG_IN_TEXT = re.compile(r'(Fig.\s?\d+|Figure\s?\d+[.\-\s]+)')
+
+# longest run of missing figure numbers that is reported as skipped figures
+MAX_SKIPPED_FIGURES = 10
 
 STYLES = {
     'SingleLine': {
@@ -34,6 +39,7 @@ STYLES = {
         'italic': None,
     }
 }
+RULES = compile_rules_dict(STYLES)
 
 VALID_FIGURE_STYLES = ['Figure Caption', 'Figure Caption Multi Line', 'Caption', 'Caption Multi Line']
 
@@ -61,13 +67,14 @@ def _fig_to_int(s):
 
 def get_figure_style_details(p):
     text = p.text.strip()
-    figure_compare = STYLES['SingleLine']
+    figure_type = 'SingleLine'
 
     # 55 chars is approx where it changes from 1 line to 2 lines
     if len(text) > 55:
-        figure_compare = STYLES['MultiLine']
+        figure_type = 'MultiLine'
+    figure_compare = STYLES[figure_type]
 
-    style_ok, detail = check_style(p, figure_compare)
+    style_ok, detail = check_style(p, RULES[figure_type])
     style_name = p.style.name
     if p.style.name not in VALID_FIGURE_STYLES:
         final_style_ok = 2
@@ -81,116 +88,103 @@ def get_figure_style_details(p):
     return final_style_ok, style_name, detail
 
 
+def _figure_caption(p, name):
+    text = p.text.strip()
+    final_style_ok, style_name, detail = get_figure_style_details(p)
+    figure_detail = dict(
+        id=_fig_to_int(name),
+        name=name,
+        text=text,
+        style=style_name,
+        style_ok=final_style_ok,
+    )
+    figure_detail.update(detail)
+    return figure_detail
+
+
+def get_figure_ids(*found):
+    """
+    The ids to report, in order, from the dicts of what was found keyed by id.
+    Numbers skipped between the ids found are reported too, unless more than MAX_SKIPPED_FIGURES in a row
+    are missing, which is more likely a year or a stray number in the text than missing figures.
+    """
+    ids = sorted(set(chain.from_iterable(found)))
+    reported = []
+    previous = 0
+    for i in ids:
+        if i - previous - 1 <= MAX_SKIPPED_FIGURES:
+            reported.extend(range(previous + 1, i))
+        reported.append(i)
+        previous = i
+    return reported
+
+
 def extract_figures(doc):
-    figures_refs = []
-    figures_captions = []
-    wrong_captions = []
+    index = get_document_index(doc)
+    mentions = get_mention_index(index)
+    # captions and captions in the wrong format, by figure id
+    captions = defaultdict(list)
+    wrong_captions = defaultdict(list)
 
     def _find_figure_captions(p):
-        for f in RE_FIG_TITLES.findall(p.text.strip()):
-            text = p.text.strip()
-            final_style_ok, style_name, detail = get_figure_style_details(p)
-
-            _id = _fig_to_int(f)
-            figure_detail = dict(
-                id=_id,
-                name=f,
-                text=text,
-                style=style_name,
-                style_ok=final_style_ok,
-            )
-            figure_detail.update(detail)
-            figures_captions.append(figure_detail)
+        text = p.text.strip()
+        for f in RE_FIG_TITLES.findall(text):
+            caption = _figure_caption(p, f)
+            captions[caption['id']].append(caption)
 
         # find test for wrong versions
-        for f in RE_WRONG_TITLES.findall(p.text.strip()):
-            # 55 chars is approx where it changes from 1 line to 2 lines
-            text = p.text.strip()
-            final_style_ok, style_name, detail = get_figure_style_details(p)
-
-            _id = _fig_to_int(f)
-            figure_detail = dict(
-                id=_id,
-                name=f,
-                text=text,
-                style=style_name,
-                style_ok=final_style_ok,
-            )
-            figure_detail.update(detail)
-            wrong_captions.append(figure_detail)
-
-    for p in doc.paragraphs:
-        # find references to figures
-        for f in iter(f.strip() for f in RE_FIG_IN_TEXT.findall(p.text)):
-            if f.endswith('.') and p.text.strip().startswith(f):
-                # probably a figure caption with . instead of :
-                continue
-            figures_refs.append(dict(id=_fig_to_int(f), name=f))
-
-        # find figure captions
-        _find_figure_captions(p)
-
-    # search for figure captions in tables
-    for t in doc.tables:
-        for r in t.rows:
-            for c in r.cells:
-                for p in c.paragraphs:
-                    _find_figure_captions(p)
+        for f in RE_WRONG_TITLES.findall(text):
+            caption = _figure_caption(p, f)
+            wrong_captions[caption['id']].append(caption)
+
+    # body paragraphs and the paragraphs in table cells in one pass
+    number = 0
+    for p in index.blocks:
+        if isinstance(p, Table):
+            number = number + 1
+            for cell_paragraph in index.table_paragraphs[number]:
+                _find_figure_captions(cell_paragraph)
+        else:
+            _find_figure_captions(p)
 
     figures = OrderedDict()
-    # no figure found means there is probably an error with parsing though.
-    if len(figures_refs) == 0 and len(figures_captions) == 0 and len(wrong_captions) == 0:
-        _last = 0
-    else:
-        _last = max(
-            chain.from_iterable(
-                [
-                    (fig['id'] for fig in figures_captions),
-                    (fig['id'] for fig in wrong_captions),
-                    (fig['id'] for fig in figures_refs),
-                ]
-            )
-        )
-
-    for i in range(1, _last + 1):
-        caption = [c for c in figures_captions if c['id'] == i]
-        wrong = [c for c in wrong_captions if c['id'] == i]
+    for i in get_figure_ids(captions, wrong_captions, mentions.numbered[FIGURE]):
+        caption = captions.get(i, [])
+        wrong = wrong_captions.get(i, [])
+        used = [mention.form for mention in mentions.get(FIGURE, i)]
         figures[i] = []
         if caption:
             for c in caption:
-                refs = list(f['name'] for f in figures_refs if f['id'] == i)
                 figure = {
                     'id': i,
-                    'refs': refs,
+                    'refs': used,
                     'unique_ok': len(caption) == 1,
-                    'found_ok': len(caption) > 0,
+                    'found_ok': True,
                     'caption_ok': len(caption) == 1 and c['name'].endswith(':'),
-                    'used_ok': len(refs) > 0
+                    'used_ok': len(used) > 0
                 }
                 figure.update(**c)
                 figures[i].append(figure)
         elif wrong:
             for c in wrong:
-                refs = list(f['name'] for f in figures_refs if f['id'] == i)
                 figure = {
                     'id': i,
-                    'refs': refs,
+                    'refs': used,
                     'unique_ok': len(wrong) == 1,
-                    'found_ok': len(wrong) > 0,
+                    'found_ok': True,
                     'caption_ok': False,
-                    'used_ok': len(refs) > 0
+                    'used_ok': len(used) > 0
                 }
                 figure.update(**c)
                 figures[i].append(figure)
         else:
-            refs = list(f['name'] for f in figures_refs if f['id'] == i)
             figures[i].append({
                 'id': i,
-                'refs': refs,
-                'unique_ok': len(caption) == 1,
-                'found_ok': len(caption) > 0,
-                'caption_ok': len(caption) == 1 and c['name'].endswith(':'),
-                'used_ok': len(refs) > 0
+                'refs': used,
+                'unique_ok': False,
+                'found_ok': False,
+                'caption_ok': False,
+                'used_ok': len(used) > 0
             })
 
     return figures
@@ -0,0 +1,318 @@
+"""Builds JACoW style docx papers from parameters, for benchmarks, load tests and regression tests.
+
+The same seed always gives the same paper. The paragraph styles are defined from the STYLES the
+checkers compare against, so a generated paper passes the checks unless it is asked to be broken
+in one of the BROKEN ways:
+
+    doc = generate_paper(seed=1, sections=40, references=120, tables=10)
+    doc = generate_paper(broken=['tracking', 'unused_figure'])
+    save_paper('paper.docx', seed=1)
+"""
+import random
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Mm, Pt
+
+from jacowvalidator.docutils.abstract import STYLES as ABSTRACT_STYLES
+from jacowvalidator.docutils.authors import STYLES as AUTHOR_STYLES
+from jacowvalidator.docutils.figures import STYLES as FIGURE_STYLES
+from jacowvalidator.docutils.heading import HEADING_STYLES
+from jacowvalidator.docutils.paragraph import PARAGRAPH_STYLES
+from jacowvalidator.docutils.references import STYLES as REFERENCE_STYLES
+from jacowvalidator.docutils.tables import STYLES as TABLE_STYLES
+from jacowvalidator.docutils.title import STYLES as TITLE_STYLES
+from jacowvalidator.docutils.styles import VALID_STYLES
+
+WORDS = [
+    'beam', 'accelerator', 'cavity', 'magnet', 'lattice', 'emittance', 'injector', 'linac', 'storage', 'ring',
+    'electron', 'proton', 'ion', 'vacuum', 'diagnostics', 'feedback', 'orbit', 'tune', 'bunch', 'current',
+    'energy', 'field', 'gradient', 'undulator', 'photon', 'laser', 'timing', 'control', 'system', 'power',
+    'supply', 'radio', 'frequency', 'cryogenic', 'superconducting', 'measurement', 'simulation', 'design',
+    'commissioning', 'performance', 'stability', 'alignment', 'septum', 'kicker', 'klystron', 'monitor',
+    'dipole', 'quadrupole', 'sextupole', 'chromaticity', 'dispersion', 'luminosity', 'target', 'source',
+]
+SURNAMES = [
+    'Smith', 'Jones', 'Brown', 'Wang', 'Li', 'Zhang', 'Müller', 'Schmidt', 'Rossi', 'García', 'Martin',
+    'Tanaka', 'Suzuki', 'Kim', 'Park', 'Dupont', 'Novak', 'Ivanov', 'Kowalski', 'Andersson', 'de Loos',
+]
+INSTITUTES = [
+    'Australian Synchrotron, Clayton, Australia', 'CERN, Geneva, Switzerland', 'DESY, Hamburg, Germany',
+    'KEK, Tsukuba, Japan', 'SLAC, Menlo Park, USA', 'PSI, Villigen, Switzerland',
+]
+
+# A4, top, bottom, left and right margins in mm, and two columns 0.51 cm apart
+PAGE_MARGINS = (37, 19, 20, 20)
+COLUMN_SPACE = '289'
+
+# the styles each part of a paper is written with
+TITLE_STYLE = TITLE_STYLES['normal']
+AUTHOR_STYLE = AUTHOR_STYLES['normal']
+ABSTRACT_STYLE = ABSTRACT_STYLES['normal']
+BODY_STYLE = PARAGRAPH_STYLES['normal']
+SECTION_STYLE = HEADING_STYLES['Section']
+SUBSECTION_STYLE = HEADING_STYLES['Subsection']
+FIGURE_STYLE = FIGURE_STYLES['SingleLine']
+TABLE_STYLE = TABLE_STYLES['SingleLine']
+PARAGRAPH_RULES = [
+    TITLE_STYLE, AUTHOR_STYLE, ABSTRACT_STYLE, BODY_STYLE, SECTION_STYLE, SUBSECTION_STYLE, HEADING_STYLES['Third'],
+    *REFERENCE_STYLES.values(), *FIGURE_STYLES.values(), *TABLE_STYLES.values(),
+]
+
+# names the template uses for a style that STYLES calls something else
+STYLE_ALIASES = {
+    'JACoW_Reference when <= 9 Refs': REFERENCE_STYLES['LessThanNineTotal'],
+    'JACoW_Third-level Heading': HEADING_STYLES['Third'],
+}
+
+# ways a paper can be broken, each one fails a check
+BROKEN = {
+    'tracking': 'a tracked insertion, so the upload is refused',
+    'no_abstract': 'no Abstract heading',
+    'margins': 'Letter size page with A4 margins',
+    'styles': 'the JACoW styles left out, so the paragraphs written with them fall back to Normal',
+    'language': 'a German proofing language on the body text',
+    'unused_figure': 'a figure that is never mentioned in the text',
+    'table_caption': 'table captions ending in a full stop',
+    'reference_order': 'the first two references cited in reverse order',
+    'unused_reference': 'a reference that is never cited',
+}
+
+
+def _set_style_format(style, rules):
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(rules['font_size'])
+    font.bold = rules.get('bold')
+    font.italic = rules.get('italic')
+    paragraph_format = style.paragraph_format
+    if rules.get('alignment'):
+        paragraph_format.alignment = getattr(WD_ALIGN_PARAGRAPH, rules['alignment'])
+    for key in ['space_before', 'space_after']:
+        # a range like ['>=', 3.0] is met by its limit
+        value = rules[key][1] if isinstance(rules[key], list) else rules[key]
+        setattr(paragraph_format, key, Pt(value))
+    if 'first_line_indent' in rules:
+        paragraph_format.first_line_indent = Pt(rules['first_line_indent'])
+
+
+def add_jacow_styles(doc):
+    """Add the JACoW paragraph styles, formatted the way the checks expect, that doc does not have yet"""
+    names = {style.name for style in doc.styles}
+    for rules in PARAGRAPH_RULES:
+        for name in rules['styles'].values():
+            if name not in names:
+                style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+                style.base_style = doc.styles['Normal']
+                _set_style_format(style, rules)
+                names.add(name)
+    # the rest of the template styles are only checked for being there
+    for name in VALID_STYLES:
+        if name not in names:
+            style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = doc.styles['Normal']
+            if name in STYLE_ALIASES:
+                _set_style_format(style, STYLE_ALIASES[name])
+            names.add(name)
+
+
+class _Writer:
+    """Random but repeatable text for a paper"""
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def words(self, count):
+        return [self.random.choice(WORDS) for _ in range(count)]
+
+    def title_case(self, count):
+        return ' '.join(word.capitalize() for word in self.words(count))
+
+    def caption(self, prefix, length=40, end=''):
+        """A title case caption shorter than length, captions from 40 to 80 long are only checked by eye"""
+        text = prefix
+        while True:
+            word = ' ' + self.random.choice(WORDS).capitalize()
+            if len(text + word + end) >= length:
+                return text + end
+            text = text + word
+
+    def sentence(self, count=12):
+        text = ' '.join(self.words(count))
+        return text[0].upper() + text[1:] + '.'
+
+    def paragraph(self, sentences=5):
+        return ' '.join(self.sentence(self.random.randint(8, 16)) for _ in range(sentences))
+
+    def author(self):
+        initials = ''.join(f"{self.random.choice('ABCDEFGHJKLMNPRSTW')}. " for _ in range(self.random.randint(1, 2)))
+        return initials + self.random.choice(SURNAMES)
+
+
+def _add_paragraph(doc_or_cell, text, rules):
+    style = rules if isinstance(rules, str) else rules['styles']['jacow']
+    return doc_or_cell.add_paragraph(text, style=style)
+
+
+def _add_table(doc_or_cell, writer, rows, columns, nested=0):
+    table = doc_or_cell.add_table(rows=rows, cols=columns)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.paragraphs[0].text = writer.title_case(2)
+            cell.paragraphs[0].style = BODY_STYLE['styles']['jacow']
+    if nested:
+        _add_table(table.cell(rows - 1, columns - 1), writer, 2, 2, nested - 1)
+    return table
+
+
+def _set_page(section, broken):
+    if 'margins' in broken:
+        section.page_width, section.page_height = Mm(215.9), Mm(279.4)
+    else:
+        section.page_width, section.page_height = Mm(210), Mm(297)
+    section.top_margin, section.bottom_margin, section.left_margin, section.right_margin = \
+        [Mm(margin) for margin in PAGE_MARGINS]
+    cols = section._sectPr.find(qn('w:cols'))
+    if cols is None:
+        cols = OxmlElement('w:cols')
+        section._sectPr.append(cols)
+    cols.set(qn('w:num'), '2')
+    cols.set(qn('w:space'), COLUMN_SPACE)
+
+
+def _set_language(paragraph, language):
+    for run in paragraph.runs:
+        lang = OxmlElement('w:lang')
+        lang.set(qn('w:val'), language)
+        run._r.get_or_add_rPr().append(lang)
+
+
+def _add_tracked_insertion(paragraph):
+    ins = OxmlElement('w:ins')
+    ins.set(qn('w:id'), '1')
+    ins.set(qn('w:author'), 'Editor')
+    run = OxmlElement('w:r')
+    text = OxmlElement('w:t')
+    text.text = ' inserted'
+    run.append(text)
+    ins.append(run)
+    paragraph._p.append(ins)
+
+
+def _reference_style(number, total):
+    if total <= 9:
+        return 'JACoW_Reference when <= 9 Refs'
+    return REFERENCE_STYLES['LessThanNine'] if number <= 9 else REFERENCE_STYLES['MoreThanNine']
+
+
+def generate_paper(seed=0, sections=4, paragraphs=3, references=8, figures=2, tables=1, authors=4,
+                   nested_tables=0, broken=(), template=None):
+    """
+    A JACoW paper as a python-docx Document.
+
+    sections       number of sections in the body, each with a subsection
+    paragraphs     body paragraphs in each section and subsection
+    references     number of references, each cited once in order in the body
+    figures        figure captions, each referred to in the text before it
+    tables         tables with a caption above them, each referred to in the text
+    authors        number of authors
+    nested_tables  depth of the tables put in the last cell of each table
+    broken         names from BROKEN
+    template       docx to take the styles and settings from, the JACoW styles are added if missing
+    """
+    unknown = set(broken) - set(BROKEN)
+    if unknown:
+        raise ValueError(f"Unknown ways to break a paper: {', '.join(sorted(unknown))}")
+
+    writer = _Writer(seed)
+    doc = Document(template)
+    # start from an empty body, keeping the section settings
+    body = doc.element.body
+    for child in list(body.iterchildren()):
+        if child.tag != qn('w:sectPr'):
+            body.remove(child)
+    add_jacow_styles(doc)
+    _set_page(doc.sections[0], broken)
+    doc.core_properties.title = writer.title_case(6)
+    doc.core_properties.author = 'JACoW paper generator'
+
+    _add_paragraph(doc, writer.title_case(8).upper(), TITLE_STYLE)
+    names = [writer.author() for _ in range(max(authors, 1))]
+    _add_paragraph(doc, ', '.join(names[:-1]) + (' and ' if len(names) > 1 else '') + names[-1], AUTHOR_STYLE)
+    _add_paragraph(doc, writer.random.choice(INSTITUTES), AUTHOR_STYLE)
+
+    if 'no_abstract' not in broken:
+        _add_paragraph(doc, 'Abstract', ABSTRACT_STYLE)
+    _add_paragraph(doc, writer.paragraph(), BODY_STYLE)
+
+    # spread the citations, figures and tables over the body paragraphs
+    body_count = max(sections, 1) * 2 * max(paragraphs, 1)
+    cited = list(range(1, references + 1))
+    if 'unused_reference' in broken and cited:
+        cited.pop()
+    if 'reference_order' in broken and len(cited) > 1:
+        cited[0], cited[1] = cited[1], cited[0]
+    mentioned = list(range(1, figures + 1))
+    if 'unused_figure' in broken and mentioned:
+        mentioned.pop()
+
+    def spread(items):
+        """items keyed by the number of the body paragraph they go in"""
+        placed = {}
+        for i, item in enumerate(items):
+            placed.setdefault(i * body_count // len(items), []).append(item)
+        return placed
+
+    citations, figure_captions, table_captions = \
+        spread(cited), spread([(n, n in mentioned) for n in range(1, figures + 1)]), spread(list(range(1, tables + 1)))
+
+    number = 0
+    for _ in range(max(sections, 1)):
+        _add_paragraph(doc, writer.title_case(3).upper(), SECTION_STYLE)
+        for subsection in [False, True]:
+            if subsection:
+                _add_paragraph(doc, writer.title_case(3), SUBSECTION_STYLE)
+            for _ in range(max(paragraphs, 1)):
+                text = writer.paragraph()
+                if number in citations:
+                    text = f"{text} As shown in {', '.join(f'[{n}]' for n in citations[number])}."
+                for figure, is_mentioned in figure_captions.get(number, []):
+                    if is_mentioned:
+                        text = f"{text} See Figure {figure} for details."
+                for table in table_captions.get(number, []):
+                    text = f"{text} The values are in Table {table}."
+                p = _add_paragraph(doc, text, BODY_STYLE)
+                if 'language' in broken:
+                    _set_language(p, 'de-DE')
+                if 'tracking' in broken and number == 0:
+                    _add_tracked_insertion(p)
+
+                for figure, _ in figure_captions.get(number, []):
+                    # the figure itself would be in this paragraph
+                    _add_paragraph(doc, '', BODY_STYLE)
+                    _add_paragraph(doc, writer.caption(f"Figure {figure}:", end='.'), FIGURE_STYLE)
+                for table in table_captions.get(number, []):
+                    end = '.' if 'table_caption' in broken else ''
+                    _add_paragraph(doc, writer.caption(f"Table {table}:", end=end), TABLE_STYLE)
+                    _add_table(doc, writer, 3, 3, nested_tables)
+                number = number + 1
+
+    if references:
+        _add_paragraph(doc, 'REFERENCES', SECTION_STYLE)
+        for n in range(1, references + 1):
+            text = f"[{n}]\t{writer.author()}, “{writer.title_case(5)}”, in Proc. IPAC’{writer.random.randint(10, 21)}, " \
+                   f"pp. {writer.random.randint(1, 4000)}, {writer.random.randint(2000, 2021)}."
+            _add_paragraph(doc, text, _reference_style(n, references))
+
+    if 'styles' in broken:
+        for style in [style for style in doc.styles if style.name.startswith('JACoW')]:
+            style.element.getparent().remove(style.element)
+    return doc
+
+
+def save_paper(path, **options):
+    """Generate a paper with generate_paper and save it to path, a file name or file like object"""
+    generate_paper(**options).save(path)
+    return path
@@ -1,5 +1,6 @@
 import re
-from jacowvalidator.docutils.styles import check_style
+from jacowvalidator.docutils.styles import check_style, compile_rules_dict
+from jacowvalidator.docutils.walker import get_document_index
 
 HEADING_STYLES = {
     'Section': {
@@ -45,6 +46,7 @@ HEADING_STYLES = {
         'case': 'Initial Caps',
     }
 }
+HEADING_RULES = compile_rules_dict(HEADING_STYLES)
 EXTRA_RULES = []
 HELP_INFO = 'SCEHeadings'
 
@@ -62,25 +64,16 @@ def guess_heading_type(p):
 
 
 def get_headings(doc):
-    data = iter(doc.paragraphs)
     headings = []
-    # don't start looking until abstract header
-    for p in data:
-        if p.text.strip().lower() == 'abstract':
-            break
-
-    for i, p in enumerate(data):
-        # no need to check after references
-        if p.text.lower() == 'references':
-            break
-
+    # only look between abstract header and references header
+    for p in get_document_index(doc).body_paragraphs:
         # find matching style
         name = [name for name, h in HEADING_STYLES.items() if p.style.name in [h['styles']['jacow'], h['styles']['normal']]]
         text = p.text.strip()
         text = re.sub(' +', ' ', text)
 
         if name:
-            style_ok, detail = check_style(p, HEADING_STYLES[name[0]])
+            style_ok, detail = check_style(p, HEADING_RULES[name[0]])
             if detail['all_caps']:
                 text = text.upper()
 
@@ -1,5 +1,7 @@
-from docx.oxml.text.font import CT_RPr
-from lxml.etree import _Element
+from docx.oxml.ns import nsmap, qn
+from lxml import etree
+from jacowvalidator.docutils.rawxml import read_run_text
+from jacowvalidator.docutils.walker import get_document_index, get_story_elements
 
 VALID_LANGUAGES = ['en-US', 'en-GB', 'en-AU', 'en-NZ']
 EXTRA_RULES = [
@@ -19,32 +21,64 @@ If you want to look up other codes, you can do so <a href="https://www.andiamo.c
 HELP_INFO = 'SCELanguages'
 
 
+# the proofing language of every run, in the body and in the other story parts
+XPATH_LANGUAGES = etree.XPath('.//w:r/w:rPr/w:lang', namespaces={'w': nsmap['w']})
+W_P = qn('w:p')
+
+
 # simple unique list of languages
 def get_language_tags(doc):
-    tags = get_language_tags_location(doc)
-    # get unique list
-    return list(dict.fromkeys(tags.values()))
+    return get_language_tags_location(doc)['tags']
 
 
 def get_language_tags_location(doc):
+    """
+    The proofing languages of doc, read with one xpath over each story part.
+      tags   each language once, in the order they are first found, starting with the document language
+      spans  the runs of a paragraph that follow on from each other in the same language, as
+             part, the paragraph number in the part counting table cells, language and text
+    """
+    index = get_document_index(doc)
     tags = {}
-    if doc.core_properties.language != '':
-        tags['-1'] = doc.core_properties.language
-    for i, p in enumerate(doc.paragraphs):
-        for r in p.runs:
-            for c in r.element.iterchildren():
-                if isinstance(c, CT_RPr):
-                    for cc in c.iterchildren():
-                        if isinstance(cc, _Element) and 'lang' in str(cc):
-                            tags[r.text] = cc.items()[0][1]
-    # get unique list
-    return tags
+    spans = []
+    if index.doc.core_properties.language != '':
+        tags[index.doc.core_properties.language] = True
+        spans.append({'part': 'core', 'paragraph': -1, 'language': index.doc.core_properties.language, 'text': ''})
+
+    for part, root in get_story_elements(index).items():
+        positions = None
+        last_p = None
+        for lang in XPATH_LANGUAGES(root):
+            values = lang.values()
+            if not values:
+                continue
+            # the first attribute, w:val unless only the east asian or complex script language is set
+            language = values[0]
+            tags[language] = True
+
+            r = lang.getparent().getparent()
+            p = r.getparent()
+            if p is not None and p.tag != W_P:
+                # runs in hyperlinks, tracked changes and the like
+                p = next(r.iterancestors(W_P), None)
+            text = read_run_text(r)
+            if p is not None and p is last_p and spans[-1]['language'] == language:
+                spans[-1]['text'] += text
+                continue
+
+            if positions is None:
+                # only numbered when a language is found in the part
+                positions = {element: i for i, element in enumerate(root.iter(W_P))}
+            spans.append({'part': part, 'paragraph': positions.get(p, -1), 'language': language, 'text': text})
+            last_p = p
+
+    return {'tags': list(tags), 'spans': spans}
 
 
 def get_language_summary(doc):
-    language_summary = get_language_tags(doc)
     languages = get_language_tags_location(doc)
-    ok = len([languages[lang] for lang in languages if languages[lang] not in VALID_LANGUAGES]) == 0
+    language_summary = languages['tags']
+    ok = all(language in VALID_LANGUAGES for language in language_summary)
 
     if ok:
         extra_info = 'English proofing languages were found.'
@@ -59,6 +93,6 @@ def get_language_summary(doc):
         'ok': ok,
         'message': 'Language issues',
         'details': language_summary,
-        'extra': languages,
+        'extra': languages['spans'],
         'anchor': 'language'
     }
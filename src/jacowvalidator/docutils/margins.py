@@ -1,5 +1,6 @@
 from lxml.etree import _Element
 from jacowvalidator.docutils.page import get_page_size, convert_twips_to_cm
+from jacowvalidator.docutils.walker import get_document
 
 EXTRA_RULES = [
     '''
@@ -36,7 +37,7 @@ EXTRA_INFO = {
 
 def check_sections(doc):
     sections = []
-    for i, section in enumerate(doc.sections):
+    for i, section in enumerate(get_document(doc).sections):
         cols = get_columns(section)
         sections.append(
             {
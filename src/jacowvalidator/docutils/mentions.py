@@ -0,0 +1,95 @@
+"""Mentions of citations, figures and tables in the text, found in one scan shared by their checkers.
+
+Every body paragraph is scanned once with a single pattern for all three kinds, and the mentions
+are kept by kind and by number so the checkers can look up whether a number is used, how many
+times and where first without scanning the text again.
+"""
+import re
+from collections import namedtuple
+
+from jacowvalidator.docutils.walker import get_document_index
+
+CITATION = 'citation'
+FIGURE = 'figure'
+TABLE = 'table'
+
+# one alternative for each kind, they start with different characters so they never compete for the same text,
+# and the lookahead for those characters lets the scan skip everything else quickly
+RE_MENTIONS = re.compile(
+    r'(?=[\[FT])(?:'
+    r'(?P<citation>\[(?P<cited>[\d ,-]+)\])'
+    r'|(?P<figure>Fig.\s?\d+|Figure\s?\d+[.\-\s]+)'
+    r'|(?P<table>Table\s?\d+|Tables\s?\d+\sand\s\d+))'
+)
+
+# kind        CITATION, FIGURE or TABLE
+# numbers     figure and table numbers, empty for a citation which is read by the references checker
+# position    index of the paragraph in DocumentIndex.paragraphs
+# form        the text as written, eg 'Fig. 2', 'Figure 2', 'Tables 1 and 2', or for a citation the text in
+#             the brackets, eg '1, 3-5'
+Mention = namedtuple('Mention', ['kind', 'numbers', 'position', 'form'])
+
+
+def _table_numbers(form):
+    numbers = []
+    # only numbers after a normal or no break space count, 'Table1' is not a reference to table 1
+    for word in form.replace(u'\xa0', u' ').split(' '):
+        try:
+            numbers.append(int(word))
+        except ValueError:
+            continue
+    return numbers
+
+
+def _figure_number(form):
+    return int(''.join(filter(str.isdigit, form)))
+
+
+class MentionIndex:
+    """Mentions in the body paragraphs of a document, in document order"""
+    def __init__(self, doc):
+        index = get_document_index(doc)
+        self.mentions = {CITATION: [], FIGURE: [], TABLE: []}
+        # mentions of each figure and table number, in document order
+        self.numbered = {FIGURE: {}, TABLE: {}}
+
+        for position, p in enumerate(index.paragraphs):
+            for match in RE_MENTIONS.finditer(p.text):
+                if match.group(CITATION):
+                    # a paragraph starting with a number in brackets is in the references list
+                    if match.start():
+                        self._add(Mention(CITATION, [], position, match.group('cited')))
+                elif match.group(FIGURE):
+                    form = match.group(FIGURE).strip()
+                    if form.endswith('.') and p.text.strip().startswith(form):
+                        # probably a figure caption with . instead of :
+                        continue
+                    self._add(Mention(FIGURE, [_figure_number(form)], position, form))
+                else:
+                    form = match.group(TABLE)
+                    self._add(Mention(TABLE, _table_numbers(form), position, form))
+
+    def _add(self, mention):
+        self.mentions[mention.kind].append(mention)
+        for number in mention.numbers:
+            self.numbered[mention.kind].setdefault(number, []).append(mention)
+
+    def get(self, kind, number):
+        """The mentions of a figure or table number"""
+        return self.numbered[kind].get(number, [])
+
+    def count(self, kind, number):
+        return len(self.get(kind, number))
+
+    def first(self, kind, number):
+        """Position of the paragraph the number is first mentioned in, None if it is not mentioned"""
+        mentions = self.get(kind, number)
+        return mentions[0].position if mentions else None
+
+
+def get_mention_index(doc):
+    """The MentionIndex for doc, built the first time a checker asks for it and kept on the DocumentIndex"""
+    index = get_document_index(doc)
+    if index.mentions is None:
+        index.mentions = MentionIndex(index)
+    return index.mentions
@@ -1,5 +1,8 @@
+from docx.oxml.ns import qn
 from docx.shared import Inches, Mm, Twips
-from jacowvalidator.docutils.styles import check_style
+from jacowvalidator.docutils.styles import check_style, compile_rules, get_direct_properties, get_resolved_style
+from jacowvalidator.docutils.rawxml import DOCUMENT_PART
+from jacowvalidator.docutils.walker import get_document_index, get_story_elements
 # from jacowvalidator.docutils.doc import AbstractNotFoundError
 
 class TrackingOnError(Exception):
@@ -7,6 +10,9 @@ class TrackingOnError(Exception):
     pass
 
 
+TRACKING_ON_MESSAGE = 'Tracking Changes is on. Please Accept or Reject tracked changes, turn off track changes and resubmit'
+W_INS, W_DEL = qn('w:ins'), qn('w:del')
+
 AUTHOR_DETAILS = {
     'styles': {
         'jacow': 'JACoW_Author List',
@@ -32,6 +38,8 @@ ABSTRACT_DETAILS = {
     'bold': None,
     'italic': True,
 }
+AUTHOR_RULES = compile_rules(AUTHOR_DETAILS)
+ABSTRACT_RULES = compile_rules(ABSTRACT_DETAILS)
 
 
 def get_page_size(section):
@@ -46,14 +54,15 @@ def get_page_size(section):
 
 
 def get_abstract_and_author(doc):
+    paragraphs = get_document_index(doc).paragraphs
     abstract = {}
     title_start = -1
-    for i, p in enumerate(doc.paragraphs):
+    for i, p in enumerate(paragraphs):
         if p.text.strip() and title_start == -1:
             title_start = i
 
         if p.text.strip().lower() == 'abstract':
-            style_ok, detail = check_style(p, ABSTRACT_DETAILS)
+            style_ok, detail = check_style(p, ABSTRACT_RULES)
             abstract = {
                 'start': i,
                 'text': p.text,
@@ -67,15 +76,15 @@ def get_abstract_and_author(doc):
     # if 'start' not in abstract:
     #    raise AbstractNotFoundError("Abstract header not found")
 
-    author_paragraphs = doc.paragraphs[title_start+1: abstract['start']]
+    author_paragraphs = paragraphs[title_start+1: abstract['start']]
 
     authors = []
     for p in author_paragraphs:
         if p.text.strip():
             superscript_removed_text = ''  # remove superscript footnotes
             for r in p.runs:
-                superscript_removed_text += r.text if not r.font.superscript else ''
-            style_ok, detail = check_style(p, AUTHOR_DETAILS)
+                superscript_removed_text += r.text if not get_direct_properties(r)['superscript'] else ''
+            style_ok, detail = check_style(p, AUTHOR_RULES)
             author_details = {
                 'text': superscript_removed_text,
                 'style': p.style.name,
@@ -87,8 +96,11 @@ def get_abstract_and_author(doc):
 
 
 def get_text(p):
-    text = ''.join([r.text.upper() if r.style and (r.style.font.all_caps or r.font.all_caps) else r.text for r in p.runs])
-    if p.style.font.all_caps or p.style.base_style and p.style.base_style.font.all_caps:
+    text = ''.join([
+        r.text.upper() if get_resolved_style(r)['all_caps'] or get_direct_properties(r)['all_caps'] else r.text
+        for r in p.runs
+    ])
+    if get_resolved_style(p)['all_caps']:
         text = text.upper()
     return text
 
@@ -106,10 +118,9 @@ def convert_twips_to_cm(twips):
 
 
 def check_tracking_on(doc):
-    for i, p in enumerate(doc.paragraphs):
-        element = p._element
-        for child in element.iterchildren():
-            if '}ins ' in str(child) or '}del ' in child or 'proofErr' in child:
-                raise TrackingOnError('Tracking Changes is on. Please Accept or Reject tracked changes, turn off track changes and resubmit')
+    """Raise TrackingOnError when the body has a tracked insertion or deletion, see also preflight.preflight_docx"""
+    body = get_story_elements(doc).get(DOCUMENT_PART)
+    if body is not None and next(body.iter(W_INS, W_DEL), None) is not None:
+        raise TrackingOnError(TRACKING_ON_MESSAGE)
 
     return False
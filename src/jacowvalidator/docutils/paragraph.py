@@ -1,7 +1,8 @@
 import re
-from jacowvalidator.docutils.styles import check_style, VALID_STYLES, VALID_NON_JACOW_STYLES
+from jacowvalidator.docutils.styles import check_style, compile_rules_dict, VALID_STYLES, VALID_NON_JACOW_STYLES
 from jacowvalidator.docutils.heading import HEADING_STYLES
 from jacowvalidator.docutils.page import get_text
+from jacowvalidator.docutils.walker import get_document_index
 
 PARAGRAPH_STYLES = {
     'normal': {
@@ -16,6 +17,7 @@ PARAGRAPH_STYLES = {
         'first_line_indent': 9.35  # 0.33cm
     }
 }
+PARAGRAPH_RULES = compile_rules_dict(PARAGRAPH_STYLES)
 EXTRA_RULES = ''
 PARAGRAPH_STYLE_EXCEPTIONS = ['JACoW_Bulleted List', 'JACoW_Numbered list', 'Bulleted List', 'Numbered list']
 
@@ -31,9 +33,10 @@ PARAGRAPH_SIZE_MIN = 50
 
 
 def parse_all_paragraphs(doc):
+    index = get_document_index(doc)
     all_paragraphs = []
     styles = []
-    for i, p in enumerate(doc.paragraphs):
+    for p in index.paragraphs:
         if p.text.strip():
             style_ok = p.style.name in VALID_STYLES or p.style.name in VALID_NON_JACOW_STYLES
             if not style_ok:
@@ -45,7 +48,7 @@ def parse_all_paragraphs(doc):
                 styles.append({'name': p.style.name, 'count': 1})
 
             all_paragraphs.append({
-                'index': i,
+                'index': p.index,
                 'style': p.style.name,
                 'text': get_text(p),
                 'style_ok': style_ok,
@@ -57,52 +60,32 @@ def parse_all_paragraphs(doc):
     #    print(f"{s['name']}: {s['count']}")
 
     # search for paragraphs in tables
-    count = 1
-    show_all = True
-    for t in doc.tables:
-        if len(t.rows) > 2 and not show_all:
-            continue
-        for r in t.rows:
-            if len(r.cells) > 2 and not show_all:
-                continue
-            cell_count = 1
-            for c in r.cells:
-                for p in c.paragraphs:
-                    if p.text.strip():
-                        style_ok = p.style.name in VALID_STYLES or p.style.name in VALID_NON_JACOW_STYLES
-                        if not style_ok:
-                            style_ok = 2
-                        all_paragraphs.append({
-                            'index': 0,
-                            'style': p.style.name,
-                            'text': get_text(p),
-                            'style_ok': style_ok,
-                            'in_table': f"Table {count}:<br/>row {r._index + 1}, col {cell_count}"
-                        })
-                cell_count = cell_count + 1
-        count = count + 1
+    for p in index.all_table_paragraphs:
+        if p.text.strip():
+            style_ok = p.style.name in VALID_STYLES or p.style.name in VALID_NON_JACOW_STYLES
+            if not style_ok:
+                style_ok = 2
+            table, row, col = p.in_table
+            all_paragraphs.append({
+                'index': 0,
+                'style': p.style.name,
+                'text': get_text(p),
+                'style_ok': style_ok,
+                'in_table': f"Table {table}:<br/>row {row}, col {col}"
+            })
     return all_paragraphs
 
 
 def get_paragraphs(doc):
-    data = iter(doc.paragraphs)
     paragraphs = []
-    style_compare = PARAGRAPH_STYLES['normal']
-    # don't start looking until abstract header
-    for p in data:
-        if p.text.strip().lower() == 'abstract':
-            break
-
-    for i, p in enumerate(data):
+    style_compare = PARAGRAPH_RULES['normal']
+    # only look between abstract header and references header
+    for p in get_document_index(doc).body_paragraphs:
         # only for paraphaphs that are not references, figure captions, headings
         text = p.text.strip()
         text = re.sub(' +', ' ', text)
 
         if text:
-            # no need to check after references
-            if text.lower() == 'references':
-                break
-
             # ignore table and figure cations
             # TODO check if any real paragraphs start with figure or table
             if text.startswith('Table ') or text.startswith('Figure ') or text.startswith('Fig. '):
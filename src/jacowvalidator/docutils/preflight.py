@@ -0,0 +1,132 @@
+"""Pre-flight check of a docx, run on the zip before the document is parsed.
+
+Uploads that can not be checked, because they are not a Word document, have tracked changes or
+have no Abstract heading, are refused here in a few milliseconds instead of after python-docx has
+built the whole document. Only [Content_Types].xml, _rels/.rels and word/document.xml are read.
+Tracked changes are found with a scan of the bytes of word/document.xml, and it is only parsed,
+one body paragraph at a time, until the Abstract heading is found. The xml read is returned, so
+open_document does not decompress it again.
+"""
+import posixpath
+import re
+import zipfile
+from io import BytesIO
+
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.exceptions import PackageNotFoundError
+from lxml import etree
+
+from jacowvalidator.docutils.doc import AbstractNotFoundError
+from jacowvalidator.docutils.page import TrackingOnError, TRACKING_ON_MESSAGE
+from jacowvalidator.docutils.rawxml import read_run_text, W_BODY, W_P, W_R
+
+CONTENT_TYPES_PART = '[Content_Types].xml'
+PACKAGE_RELS_PART = '_rels/.rels'
+
+CT_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/content-types'
+RELS_NAMESPACE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CT_DEFAULT, CT_OVERRIDE = f'{{{CT_NAMESPACE}}}Default', f'{{{CT_NAMESPACE}}}Override'
+RELATIONSHIP = f'{{{RELS_NAMESPACE}}}Relationship'
+
+# prefix the main document gives the wordprocessingml namespace, Word always uses w
+RE_WML_PREFIX = re.compile(rb'xmlns:(\w+)="http://schemas.openxmlformats.org/wordprocessingml/2006/main"')
+
+
+def _content_type(package, part_name):
+    """The content type [Content_Types].xml gives the part, None if it gives none"""
+    types = etree.fromstring(package.read(CONTENT_TYPES_PART))
+    for override in types.iter(CT_OVERRIDE):
+        if override.get('PartName', '').lstrip('/') == part_name:
+            return override.get('ContentType')
+    extension = posixpath.splitext(part_name)[1].lstrip('.').lower()
+    for default in types.iter(CT_DEFAULT):
+        if default.get('Extension', '').lower() == extension:
+            return default.get('ContentType')
+    return None
+
+
+def _main_document_part(package):
+    """Name of the main document part, found the same way python-docx finds it"""
+    names = set(package.namelist())
+    if CONTENT_TYPES_PART not in names or PACKAGE_RELS_PART not in names:
+        raise PackageNotFoundError("Package has no content types or relationships")
+
+    rels = etree.fromstring(package.read(PACKAGE_RELS_PART))
+    for relationship in rels.iter(RELATIONSHIP):
+        if relationship.get('Type') == RT.OFFICE_DOCUMENT and relationship.get('TargetMode') != 'External':
+            part_name = posixpath.normpath(relationship.get('Target', '')).lstrip('/')
+            break
+    else:
+        raise PackageNotFoundError("Package has no main document")
+
+    if part_name not in names:
+        raise PackageNotFoundError(f"{part_name} not found in package")
+    content_type = _content_type(package, part_name)
+    if content_type != CT.WML_DOCUMENT_MAIN:
+        raise PackageNotFoundError(f"Not a Word document, content type is '{content_type}'")
+    return part_name
+
+
+def _find_prefix(document_xml):
+    match = RE_WML_PREFIX.search(document_xml)
+    return match.group(1) if match else b'w'
+
+
+def _has_abstract(document_xml):
+    """True when a body paragraph is the Abstract heading, the parse stops as soon as it is found"""
+    events = etree.iterparse(BytesIO(document_xml), events=('end',), tag=W_P, resolve_entities=False)
+    for _, element in events:
+        parent = element.getparent()
+        if parent is None or parent.tag != W_BODY:
+            continue
+        # the same heading get_document_index looks for, only the runs directly in the paragraph count
+        if ''.join(read_run_text(r) for r in element.iterchildren(W_R)).strip().lower() == 'abstract':
+            return True
+        # body paragraphs are not needed again, drop them and any tables before them
+        element.clear()
+        while element.getprevious() is not None:
+            del parent[0]
+    return False
+
+
+def preflight_docx(docx, check_abstract=True):
+    """
+    Check a docx, given as a path or file like object, can be validated before it is opened.
+
+    Raises PackageNotFoundError when it is not a zip holding a Word document, TrackingOnError when
+    the body has a tracked insertion or deletion and AbstractNotFoundError when there is no
+    Abstract heading, unless check_abstract is False, as when the document is opened straight
+    after and the checks look for the heading anyway. Otherwise returns what was found:
+      document_part  name of the main document part, normally word/document.xml
+      document_size  size of the main document part in bytes, once uncompressed
+      comments       number of comment references in the body
+      parts          the xml of the main document part by part name, for open_document
+    """
+    try:
+        with zipfile.ZipFile(docx) as package:
+            document_part = _main_document_part(package)
+            document_xml = package.read(document_part)
+    except zipfile.BadZipFile:
+        raise PackageNotFoundError("Package not a valid zip file")
+    except etree.XMLSyntaxError as err:
+        raise PackageNotFoundError(f"Package relationships or content types are not valid xml: {err}")
+
+    # '<' is escaped in xml text and attribute values, so found in the bytes it starts a tag
+    prefix = _find_prefix(document_xml)
+    if re.search(rb'<%s:(?:ins|del)[\s/>]' % prefix, document_xml):
+        raise TrackingOnError(TRACKING_ON_MESSAGE)
+
+    if check_abstract:
+        try:
+            has_abstract = _has_abstract(document_xml)
+        except etree.XMLSyntaxError as err:
+            raise PackageNotFoundError(f"{document_part} is not valid xml: {err}")
+        if not has_abstract:
+            raise AbstractNotFoundError("Abstract header not found")
+
+    return {
+        'document_part': document_part,
+        'document_size': len(document_xml),
+        'comments': len(re.findall(rb'<%s:commentReference[\s/>]' % prefix, document_xml)),
+        'parts': {document_part: document_xml},
+    }
@@ -0,0 +1,259 @@
+"""Raw xml engine for the docutils checks.
+
+Parses word/document.xml with lxml and reads the text, style ids and the paragraph and run
+formatting of every paragraph in one pass over the body, without building the python-docx
+Document, Paragraph, Run and _Cell objects. The whole tree is kept, the records and the checks
+that walk the body story refer to its elements. The records keep the attributes of the
+python-docx objects that the checks use, so either engine can be given to get_document_index.
+
+read_ppr and read_rpr are also used for python-docx documents so both engines read the
+formatting the same way.
+"""
+import re
+import zipfile
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.opc.coreprops import CoreProperties
+from docx.opc.exceptions import PackageNotFoundError
+from docx.oxml import parse_xml
+from docx.oxml.coreprops import CT_CoreProperties
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml.simpletypes import ST_HpsMeasure, ST_OnOff, ST_SignedTwipsMeasure, ST_TwipsMeasure
+from docx.section import Section
+from docx.styles.styles import Styles
+from docx.table import Table
+
+DOCUMENT_PART = 'word/document.xml'
+STYLES_PART = 'word/styles.xml'
+CORE_PROPERTIES_PART = 'docProps/core.xml'
+# parts with text of their own besides the body
+RE_STORY_PART = re.compile(r'^/?word/(header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+PARAGRAPH_PROPERTIES = [
+    'style_id', 'space_before', 'space_after', 'alignment', 'first_line_indent', 'hanging_indent', 'left_indent'
+]
+RUN_PROPERTIES = ['style_id', 'bold', 'italic', 'all_caps', 'font_size', 'font_name', 'superscript']
+
+W_VAL = qn('w:val')
+W_BODY, W_P, W_R, W_TBL, W_TR, W_TC = qn('w:body'), qn('w:p'), qn('w:r'), qn('w:tbl'), qn('w:tr'), qn('w:tc')
+W_PPR, W_RPR, W_TCPR, W_SECTPR = qn('w:pPr'), qn('w:rPr'), qn('w:tcPr'), qn('w:sectPr')
+W_TBLGRID, W_GRIDCOL, W_GRIDSPAN, W_VMERGE = qn('w:tblGrid'), qn('w:gridCol'), qn('w:gridSpan'), qn('w:vMerge')
+W_T, W_TAB, W_BR, W_CR = qn('w:t'), qn('w:tab'), qn('w:br'), qn('w:cr')
+RUN_BOOLEANS = {qn('w:b'): 'bold', qn('w:i'): 'italic', qn('w:caps'): 'all_caps'}
+
+
+def _on_off(element):
+    value = element.get(W_VAL)
+    return True if value is None else ST_OnOff.convert_from_xml(value)
+
+
+def _twips(value, measure=ST_TwipsMeasure):
+    return None if value is None else measure.convert_from_xml(value)
+
+
+def read_ppr(pPr):
+    """Paragraph formatting set directly in a w:pPr element, as python-docx would read it"""
+    properties = dict.fromkeys(PARAGRAPH_PROPERTIES)
+    if pPr is None:
+        return properties
+
+    for child in pPr.iterchildren():
+        if child.tag == qn('w:pStyle'):
+            properties['style_id'] = child.get(W_VAL)
+        elif child.tag == qn('w:spacing'):
+            properties['space_before'] = _twips(child.get(qn('w:before')))
+            properties['space_after'] = _twips(child.get(qn('w:after')))
+        elif child.tag == qn('w:jc'):
+            try:
+                properties['alignment'] = WD_PARAGRAPH_ALIGNMENT.from_xml(child.get(W_VAL))
+            except ValueError:
+                # values python-docx does not know about, like start and end
+                pass
+        elif child.tag == qn('w:ind'):
+            properties['first_line_indent'] = _twips(child.get(qn('w:firstLine')))
+            properties['hanging_indent'] = _twips(child.get(qn('w:hanging')))
+            properties['left_indent'] = _twips(child.get(qn('w:left')), ST_SignedTwipsMeasure)
+    return properties
+
+
+def read_rpr(rPr):
+    """Run formatting set directly in a w:rPr element, as python-docx would read it"""
+    properties = dict.fromkeys(RUN_PROPERTIES)
+    if rPr is None:
+        return properties
+
+    for child in rPr.iterchildren():
+        if child.tag in RUN_BOOLEANS:
+            properties[RUN_BOOLEANS[child.tag]] = _on_off(child)
+        elif child.tag == qn('w:rStyle'):
+            properties['style_id'] = child.get(W_VAL)
+        elif child.tag == qn('w:sz'):
+            value = child.get(W_VAL)
+            properties['font_size'] = None if value is None else ST_HpsMeasure.convert_from_xml(value)
+        elif child.tag == qn('w:rFonts'):
+            properties['font_name'] = child.get(qn('w:ascii'))
+        elif child.tag == qn('w:vertAlign'):
+            properties['superscript'] = child.get(W_VAL) == 'superscript'
+    return properties
+
+
+def read_run_text(r):
+    text = ''
+    for child in r.iterchildren():
+        if child.tag == W_T:
+            text += child.text if child.text is not None else ''
+        elif child.tag == W_TAB:
+            text += '\t'
+        elif child.tag in (W_BR, W_CR):
+            text += '\n'
+    return text
+
+
+class RawRun:
+    """Run read straight from the xml"""
+    def __init__(self, r, paragraph):
+        self._r = self._element = self.element = r
+        self._parent = paragraph
+        self.part = paragraph.part
+        self.properties = read_rpr(r.find(W_RPR))
+        self.text = read_run_text(r)
+
+    @property
+    def style(self):
+        return self.part.get_style(self.properties['style_id'], WD_STYLE_TYPE.CHARACTER)
+
+
+class RawParagraph:
+    """Paragraph read straight from the xml"""
+    def __init__(self, p, document, index=0, in_table=None):
+        self._p = self._element = p
+        self.part = document
+        # position in the body paragraphs, or in the cell for table paragraphs
+        self.index = index
+        # (table number, row number, column number) all starting at 1
+        self.in_table = in_table
+        self.properties = read_ppr(p.find(W_PPR))
+        self.runs = [RawRun(r, self) for r in p.iterchildren(W_R)]
+        self.text = ''.join(r.text for r in self.runs)
+
+    @property
+    def style(self):
+        return self.part.get_style(self.properties['style_id'], WD_STYLE_TYPE.PARAGRAPH)
+
+    @property
+    def alignment(self):
+        return self.properties['alignment']
+
+
+class RawDocument:
+    """
+    The parts of a docx the checks need, read without python-docx.
+
+    blocks holds the body paragraphs and tables in document order, each table as a
+    (Table, cell paragraphs) pair. styles, sections and core_properties are the same
+    python-docx objects as on a Document since those parts are small.
+    stories holds the root element of the body and of each header, footer, footnotes and
+    endnotes part, by part name.
+    parts has the xml of parts already read from the zip by part name, eg by preflight_docx.
+    """
+    def __init__(self, docx, parts=None):
+        self.blocks = []
+        self.sections = []
+        self.stories = {}
+        self._styles_by_id = {}
+        try:
+            with zipfile.ZipFile(docx) as package:
+                names = package.namelist()
+                if DOCUMENT_PART not in names:
+                    raise PackageNotFoundError(f"{DOCUMENT_PART} not found in package")
+
+                if STYLES_PART in names:
+                    self.styles = Styles(parse_xml(package.read(STYLES_PART)))
+                else:
+                    self.styles = Styles(parse_xml(f"<w:styles {nsdecls('w')}/>"))
+
+                if CORE_PROPERTIES_PART in names:
+                    self.core_properties = CoreProperties(parse_xml(package.read(CORE_PROPERTIES_PART)))
+                else:
+                    self.core_properties = CoreProperties(CT_CoreProperties.new())
+
+                if parts and DOCUMENT_PART in parts:
+                    self._read_document(parts[DOCUMENT_PART])
+                else:
+                    self._read_document(package.read(DOCUMENT_PART))
+
+                for name in names:
+                    if RE_STORY_PART.match(name):
+                        self.stories[name] = parse_xml(package.read(name))
+        except zipfile.BadZipFile:
+            raise PackageNotFoundError("Package not a valid zip file")
+
+    def _read_document(self, document_xml):
+        # python-docx parser, with its element classes for tables and sections
+        body = parse_xml(document_xml).find(W_BODY)
+        if body is None:
+            return
+        self.stories[DOCUMENT_PART] = body
+
+        paragraph_count = table_count = 0
+        for element in body.iterchildren(W_P, W_TBL, W_SECTPR):
+            if element.tag == W_P:
+                # a paragraph holding a section break ends that section
+                ppr = element.find(W_PPR)
+                sect_pr = ppr.find(W_SECTPR) if ppr is not None else None
+                if sect_pr is not None:
+                    self.sections.append(Section(sect_pr, None))
+                self.blocks.append(RawParagraph(element, self, paragraph_count))
+                paragraph_count = paragraph_count + 1
+            elif element.tag == W_TBL:
+                table_count = table_count + 1
+                self.blocks.append((Table(element, self), self._read_table(element, table_count)))
+            else:
+                self.sections.append(Section(element, None))
+
+    def _read_table(self, tbl, number):
+        # same layout grid as python-docx Table._cells, spanned and merged cells are repeated
+        grid = tbl.find(W_TBLGRID)
+        column_count = len(grid.findall(W_GRIDCOL)) if grid is not None else 0
+        rows = tbl.findall(W_TR)
+        cells = []
+        for tr in rows:
+            for tc in tr.iterchildren(W_TC):
+                span, merge = 1, None
+                tcPr = tc.find(W_TCPR)
+                if tcPr is not None:
+                    grid_span = tcPr.find(W_GRIDSPAN)
+                    if grid_span is not None:
+                        span = int(grid_span.get(W_VAL))
+                    v_merge = tcPr.find(W_VMERGE)
+                    if v_merge is not None:
+                        merge = v_merge.get(W_VAL, 'continue')
+                for i in range(span):
+                    if merge == 'continue':
+                        cells.append(cells[-column_count])
+                    elif i > 0:
+                        cells.append(cells[-1])
+                    else:
+                        cells.append(tc)
+
+        paragraphs = []
+        for r in range(len(rows)):
+            for c, tc in enumerate(cells[r * column_count:(r + 1) * column_count], 1):
+                for i, p in enumerate(tc.iterchildren(W_P)):
+                    paragraphs.append(RawParagraph(p, self, i, (number, r + 1, c)))
+        return paragraphs
+
+    def get_style(self, style_id, style_type):
+        key = (style_id, style_type)
+        if key not in self._styles_by_id:
+            self._styles_by_id[key] = self.styles.get_by_id(style_id, style_type)
+        return self._styles_by_id[key]
+
+    @property
+    def part(self):
+        return self
+
+
+def open_raw_document(docx, parts=None):
+    """Read a docx, given as a path or file like object, with the raw xml engine"""
+    return RawDocument(docx, parts)
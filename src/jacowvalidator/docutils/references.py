@@ -1,10 +1,11 @@
 import re
 from itertools import chain
-from jacowvalidator.docutils.styles import check_style, get_style_font
+from jacowvalidator.docutils.styles import check_style, compile_rules_dict, get_style_font
+from jacowvalidator.docutils.mentions import get_mention_index, CITATION
+from jacowvalidator.docutils.walker import get_document_index
 
 RE_REFS_LIST = re.compile(r'^\[([\d]+)\]')
 RE_REFS_LIST_TAB = re.compile(r'^\[([\d]+)\]\t')
-RE_REFS_INTEXT = re.compile(r'(?<!^)\[([\d ,-]+)\]')
 
 STYLES = {
     'LessThanNineTotal': {
@@ -44,6 +45,7 @@ STYLES = {
         'first_line_indent': -19.3,  # 0.68 cm,
     }
 }
+RULES = compile_rules_dict(STYLES)
 EXTRA_RULES = [
     'All references must be ordered in the reference list based on when they first are referred to in the main text.',
     'References in the main text can be [n], or [n1, n2, n5, etc.], or [n – n3].',
@@ -64,37 +66,88 @@ EXTRA_INFO = {
 }
 
 
-def _ref_to_int(ref):
+def _ref_to_ranges(ref):
+    """The (first, last) reference numbers in a citation like '1, 3-5', ranges are not expanded"""
     try:
-        return [int(ref)]
+        return [(int(ref), int(ref))]
     except ValueError:
         if ',' in ref:
             return list(
-                chain.from_iterable(_ref_to_int(i) for i in ref.split(',') if i.strip())
+                chain.from_iterable(_ref_to_ranges(i) for i in ref.split(',') if i.strip())
             )
         elif '-' in ref:
-            return list(range(*(int(v) + i for i, v in enumerate(ref.split('-')))))
+            first, last = ref.split('-')[:2]
+            return [(int(first), int(last))]
         raise
 
 
+def check_citations(citations, count):
+    """
+    Return the sets of the reference numbers, from 1 to count, that are cited and that are cited out of order.
+    citations are in the order they are found in the text, each one a list of (first, last) ranges.
+
+    A number is out of order when it is cited before the number one less than it, and that number has not been
+    cited by the end of the same citation. Each citation is read in one go, so a range or a list of numbers
+    costs no more than a single number.
+    """
+    # every number is cited up to here
+    last_in_order = 0
+    # numbers cited early, with the order they were first seen in
+    waiting = {}
+    seen_count = 0
+    out_of_order = set()
+    # +1 where each range starts and -1 after it ends, to count the ranges covering each number
+    coverage = [0] * (count + 2)
+
+    for citation in citations:
+        added = []
+        for first, last in citation:
+            first, last = max(first, 1), min(last, count)
+            if first > last:
+                continue
+            coverage[first] = coverage[first] + 1
+            coverage[last + 1] = coverage[last + 1] - 1
+            if first <= last_in_order + 1:
+                last_in_order = max(last_in_order, last)
+                continue
+            for ref in range(first, last + 1):
+                if ref not in waiting:
+                    waiting[ref] = seen_count
+                    seen_count = seen_count + 1
+                    added.append(ref)
+
+        # the numbers waiting that now follow on, taken in the order they were seen like a reader would
+        seen_at = -1
+        while waiting.get(last_in_order + 1, -1) > seen_at:
+            seen_at = waiting.pop(last_in_order + 1)
+            last_in_order = last_in_order + 1
+        out_of_order.update(ref for ref in added if ref in waiting)
+
+    used = set()
+    covered = 0
+    for ref in range(1, count + 1):
+        covered = covered + coverage[ref]
+        if covered:
+            used.add(ref)
+    return used, out_of_order
+
+
 def extract_references(doc, strict_styles=False):
-    data = iter(doc.paragraphs)
-    references_in_text = []
+    index = get_document_index(doc)
 
     # don't start looking until abstract header
-    for p in data:
-        if p.text.strip().lower() == 'abstract':
-            break
-    else:
+    if index.abstract_index == -1:
         raise Exception('Abstract header not found')
 
-    # find all references in text and references list
+    # find all references in text after the abstract header
+    references_in_text = [
+        _ref_to_ranges(mention.form) for mention in get_mention_index(index).mentions[CITATION]
+        if mention.position > index.abstract_index]
+
+    # find references list
     references_list = []
     ref_list_start = 0
-    for i, p in enumerate(data):
-        for ref in RE_REFS_INTEXT.findall(p.text):
-            references_in_text.append(_ref_to_int(ref))
-
+    for i, p in enumerate(index.after_abstract_paragraphs):
         refs = RE_REFS_LIST.findall(p.text.strip())
         if refs:
             for ref in refs:
@@ -117,27 +170,8 @@ def extract_references(doc, strict_styles=False):
                     )
                 )
 
-    # check references in body are in correct order
-    stack = [0]
-    seen = []
-    out_of_order = set()
-    for _range in references_in_text:
-        for _ref in _range:
-            if _ref in stack:
-                continue
-            if _ref - stack[-1] == 1:
-                stack.append(_ref)
-            elif _ref not in seen:
-                seen.append(_ref)
-        for _ref in seen.copy():
-            if _ref - stack[-1] == 1:
-                stack.append(_ref)
-                seen.remove(_ref)
-        if len(seen) > 0:
-            out_of_order.update(seen)
-
-    # get a set of references so we know which ones are used
-    used_references = set(chain.from_iterable(references_in_text))
+    # check references in body are in correct order, and which ones are used
+    used_references, out_of_order = check_citations(references_in_text, len(references_list))
 
     # check reference styles, order etc
     ref_count = len(references_list)
@@ -187,16 +221,17 @@ def extract_references(doc, strict_styles=False):
                                 f"URLs and DOIs should be {url_font['name']} and size {url_font['size']}pt"
 
         if ref_count <= 9:
-            style_compare = STYLES['LessThanNineTotal']
+            style_type = 'LessThanNineTotal'
         else:
             if i <= 9:
-                style_compare = STYLES['LessThanNine']
+                style_type = 'LessThanNine'
             else:
-                style_compare = STYLES['MoreThanNine']
+                style_type = 'MoreThanNine'
+        style_compare = STYLES[style_type]
 
         style_ok, detail = check_style(
             ref['p'],
-            style_compare,
+            RULES[style_type],
             url={'has_url': has_url, 'url_font': url_font, 'starts': starts}
         )
         if strict_styles:
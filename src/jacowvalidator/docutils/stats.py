@@ -0,0 +1,41 @@
+import os
+import zipfile
+
+from docx.oxml.ns import qn
+
+from jacowvalidator.docutils.walker import get_document_index
+
+
+def get_document_stats(doc, path=None, summary=None):
+    """
+    Counts of what is in a document, to tell which inputs are slow to check.
+    references and figures come from the References and Figures sections of summary,
+    they are None when those checks were not run. path can also be a binary file object.
+    """
+    index = get_document_index(doc)
+    paragraphs = index.paragraphs + index.all_table_paragraphs
+    stats = {
+        'paragraphs': len(paragraphs),
+        'runs': sum(len(p._element.r_lst) for p in paragraphs),
+        'tables': len(index.tables),
+        # nested tables are counted in the table they are in
+        'cells': sum(sum(1 for _ in table._tbl.iter(qn('w:tc'))) for table in index.tables),
+        'references': None,
+        'figures': None,
+        'file_size': None,
+        'parts': None,
+    }
+    if summary:
+        if 'References' in summary:
+            stats['references'] = len(summary['References']['details'])
+        if 'Figures' in summary:
+            stats['figures'] = len(summary['Figures']['details'])
+    if path:
+        if hasattr(path, 'seek'):
+            stats['file_size'] = path.seek(0, os.SEEK_END)
+            path.seek(0)
+        else:
+            stats['file_size'] = os.path.getsize(path)
+        with zipfile.ZipFile(path) as package:
+            stats['parts'] = len(package.namelist())
+    return stats
@@ -1,7 +1,11 @@
 import operator
+from weakref import WeakKeyDictionary
+from docx.enum.style import WD_STYLE_TYPE
 from docx.shared import Inches, Mm, Twips
-from docx.oxml.text.parfmt import CT_PPr, CT_Ind
 from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+from jacowvalidator.docutils.rawxml import RawParagraph, RawRun, read_ppr, read_rpr
+from jacowvalidator.docutils.walker import IndexedParagraph, IndexedRun, get_document, get_document_index
 
 VALID_STYLES = [
     'JACoW_Abstract_Heading',
@@ -49,6 +53,130 @@ EXTRA_INFO = {
 }
 
 
+STYLE_PROPERTIES = [
+    'space_before', 'space_after', 'first_line_indent', 'hanging_indent', 'left_indent', 'alignment',
+    'bold', 'italic', 'font_size', 'font_name', 'all_caps',
+]
+
+
+# paragraphs and runs from either engine
+PARAGRAPH_TYPES = (Paragraph, RawParagraph)
+RUN_TYPES = (Run, RawRun)
+# paragraphs and runs that keep their direct formatting
+PROPERTY_RECORDS = (IndexedParagraph, IndexedRun, RawParagraph, RawRun)
+
+
+def get_direct_properties(paragraph_or_run):
+    """Formatting set directly on a paragraph or run, see rawxml.read_ppr and rawxml.read_rpr"""
+    if isinstance(paragraph_or_run, PROPERTY_RECORDS):
+        return paragraph_or_run.properties
+    if isinstance(paragraph_or_run, Run):
+        return read_rpr(paragraph_or_run._r.rPr)
+    return read_ppr(paragraph_or_run._p.pPr)
+
+
+def _own_properties(properties):
+    # only the values actually set, so reading the run properties does not clear the paragraph ones
+    return {key: value for key, value in properties.items() if key in STYLE_PROPERTIES and value is not None}
+
+
+def _inherit(properties, base):
+    # values set on the style win over the ones it inherits
+    return {key: base[key] if properties.get(key) is None else properties[key] for key in STYLE_PROPERTIES}
+
+
+class StyleResolver:
+    """
+    Effective paragraph and font properties of the styles in a document.
+
+    A style only holds the properties that differ from its base style, so each value is found by
+    following the basedOn chain all the way to the document defaults. Every style is resolved once
+    and the result reused for all the paragraphs and runs using it, so the paragraph and run level
+    overrides are all that is left to apply per paragraph.
+    """
+    def __init__(self, styles_element):
+        self._styles = styles_element
+        self._style_ids = {}
+        self._chains = {}
+        self._resolved = {}
+
+        self.defaults = dict.fromkeys(STYLE_PROPERTIES)
+        for pPr in styles_element.xpath('w:docDefaults/w:pPrDefault/w:pPr'):
+            self.defaults.update(_own_properties(read_ppr(pPr)))
+        for rPr in styles_element.xpath('w:docDefaults/w:rPrDefault/w:rPr'):
+            self.defaults.update(_own_properties(read_rpr(rPr)))
+
+    def _get_style_id(self, style_id, style_type):
+        # same fallback as python-docx, missing or wrong type means the default style for the type
+        key = (style_id, style_type)
+        if key not in self._style_ids:
+            style = self._styles.get_by_id(style_id) if style_id is not None else None
+            if style is None or style.type != style_type:
+                style = self._styles.default_for(style_type)
+            self._style_ids[key] = style.styleId if style is not None else None
+        return self._style_ids[key]
+
+    def _get_chain(self, style_id, seen=()):
+        """Properties of the style and all its base styles, without the document defaults"""
+        if style_id in self._chains:
+            return self._chains[style_id]
+
+        style = self._styles.get_by_id(style_id) if style_id is not None else None
+        if style is None or style_id in seen:
+            return dict.fromkeys(STYLE_PROPERTIES)
+
+        properties = _own_properties(read_ppr(style.pPr))
+        properties.update(_own_properties(read_rpr(style.rPr)))
+        properties = _inherit(properties, self._get_chain(style.basedOn_val, seen + (style_id,)))
+        self._chains[style_id] = properties
+        return properties
+
+    def get_paragraph_style(self, paragraph):
+        """Properties of the paragraph style, before any formatting on the paragraph itself"""
+        style_id = self._get_style_id(get_direct_properties(paragraph)['style_id'], WD_STYLE_TYPE.PARAGRAPH)
+        if style_id not in self._resolved:
+            self._resolved[style_id] = _inherit(self._get_chain(style_id), self.defaults)
+        return self._resolved[style_id]
+
+    def get_run_style(self, run):
+        """Properties of the run character style on top of its paragraph style,
+        before any formatting on the run itself"""
+        paragraph_style = self.defaults
+        paragraph_style_id = None
+        if isinstance(run._parent, PARAGRAPH_TYPES):
+            paragraph_style = self.get_paragraph_style(run._parent)
+            paragraph_style_id = self._get_style_id(
+                get_direct_properties(run._parent)['style_id'], WD_STYLE_TYPE.PARAGRAPH)
+
+        style_id = self._get_style_id(get_direct_properties(run)['style_id'], WD_STYLE_TYPE.CHARACTER)
+        key = (paragraph_style_id, style_id)
+        if key not in self._resolved:
+            self._resolved[key] = _inherit(self._get_chain(style_id), paragraph_style)
+        return self._resolved[key]
+
+    def get_style(self, paragraph_or_run):
+        if isinstance(paragraph_or_run, RUN_TYPES):
+            return self.get_run_style(paragraph_or_run)
+        return self.get_paragraph_style(paragraph_or_run)
+
+
+_style_resolvers = WeakKeyDictionary()
+
+
+def get_style_resolver(paragraph_or_run):
+    """Return the StyleResolver for the document the paragraph or run belongs to.
+    Styles are resolved once per document, so changes to the styles after this is called are not seen."""
+    part = paragraph_or_run.part
+    resolver = _style_resolvers.get(part)
+    if resolver is None:
+        resolver = _style_resolvers[part] = StyleResolver(part.styles.element)
+    return resolver
+
+
+def get_resolved_style(paragraph_or_run):
+    return get_style_resolver(paragraph_or_run).get_style(paragraph_or_run)
+
+
 # check if th
 def check_jacow_styles(doc):
     result = []
@@ -61,13 +189,13 @@ def check_jacow_styles(doc):
 
 
 def get_jacow_styles(doc):
-    return [s.name for s in doc.styles if s.name.startswith('JACoW')]
+    return [s.name for s in get_document(doc).styles if s.name.startswith('JACoW')]
 
 
 def get_paragraph_style_exceptions(doc):
     jacow_styles = get_jacow_styles(doc)
     exceptions = []
-    for i, p in enumerate(doc.paragraphs):
+    for p in get_document_index(doc).paragraphs:
         if (
             not p.text.strip() == ''
             and p.style.name not in jacow_styles
@@ -79,15 +207,11 @@ def get_paragraph_style_exceptions(doc):
 
 def get_paragraph_alignment(paragraph):
     # alignment style can be overridden by more local definition
-    alignment = paragraph.style.paragraph_format.alignment
-    if alignment is None and paragraph.style.base_style is not None and \
-            paragraph.style.base_style.paragraph_format.alignment is not None:
-        alignment = paragraph.style.base_style.paragraph_format.alignment
+    alignment = get_resolved_style(paragraph)['alignment']
 
-    if paragraph.alignment is not None:
-        alignment = paragraph.alignment
-    elif paragraph.paragraph_format.alignment is not None:
-        alignment = paragraph.paragraph_format.alignment
+    direct_alignment = get_direct_properties(paragraph)['alignment']
+    if direct_alignment is not None:
+        alignment = direct_alignment
 
     if alignment:
         return alignment._member_name
@@ -95,48 +219,24 @@ def get_paragraph_alignment(paragraph):
         return None
 
 
-def get_indents(style_format):
-    first_line_indent, hanging_indent, left_indent = None, None, None
-    for i in style_format.element.iterchildren():
-        if isinstance(i, CT_PPr):
-            for j in i.iterchildren():
-                if isinstance(j, CT_Ind):
-                    first_line_indent, hanging_indent, left_indent = j.firstLine, j.hanging, j.left
-    return first_line_indent, hanging_indent, left_indent
-
-
 def get_paragraph_space(paragraph):
     # paragraph formatting style can be overridden by more local definition
-    before, after = \
-        paragraph.style.paragraph_format.space_before, \
-        paragraph.style.paragraph_format.space_after
-
-    first_line_indent, hanging_indent, left_indent = get_indents(paragraph.style.paragraph_format)
-
-    if paragraph.style.base_style is not None:
-        first_line, hanging, left = get_indents(paragraph.style.base_style.paragraph_format)
-        if before is None:
-            before = paragraph.style.base_style.paragraph_format.space_before
-        if after is None:
-            after = paragraph.style.base_style.paragraph_format.space_after
-        if first_line_indent is None:
-            first_line_indent = first_line
-        if hanging_indent is None:
-            hanging_indent = hanging
-        if left_indent is None:
-            left_indent = left
-
-    if paragraph.paragraph_format.space_before is not None:
-        before = paragraph.paragraph_format.space_before
-    if paragraph.paragraph_format.space_after is not None:
-        after = paragraph.paragraph_format.space_after
-    first_line, hanging, left = get_indents(paragraph.paragraph_format)
-    if first_line is not None:
-        first_line_indent = first_line
-    if hanging is not None:
-        hanging_indent = hanging
-    if left is not None:
-        left_indent = left
+    style = get_resolved_style(paragraph)
+    before, after = style['space_before'], style['space_after']
+    first_line_indent, hanging_indent, left_indent = \
+        style['first_line_indent'], style['hanging_indent'], style['left_indent']
+
+    properties = get_direct_properties(paragraph)
+    if properties['space_before'] is not None:
+        before = properties['space_before']
+    if properties['space_after'] is not None:
+        after = properties['space_after']
+    if properties['first_line_indent'] is not None:
+        first_line_indent = properties['first_line_indent']
+    if properties['hanging_indent'] is not None:
+        hanging_indent = properties['hanging_indent']
+    if properties['left_indent'] is not None:
+        left_indent = properties['left_indent']
 
     if before:
         before = before.pt
@@ -155,26 +255,14 @@ def get_paragraph_space(paragraph):
 
 
 def get_style_font(paragraph, url):
-    # use paragraph style if values set
-    style = paragraph.style
-    bold, italic, font_size, font_name, all_caps = style.font.bold, style.font.italic, style.font.size, style.font.name, style.font.all_caps
-    if paragraph.style.base_style is not None:
-        style = paragraph.style.base_style
-        # if values not set, use base style
-        if font_size is None:
-            font_size = style.font.size
-        if font_name is None:
-            font_name = style.font.name
-        if bold is None:
-            bold = style.font.bold
-        if italic is None:
-            italic = style.font.italic
-        if all_caps is None:
-            all_caps = style.font.all_caps
+    # use paragraph style (or character style for a run) if values set
+    style = get_resolved_style(paragraph)
+    bold, italic, font_size, font_name, all_caps = \
+        style['bold'], style['italic'], style['font_size'], style['font_name'], style['all_caps']
 
     # TODO get distinct list
     sections = [paragraph]
-    if isinstance(paragraph, Paragraph):
+    if isinstance(paragraph, PARAGRAPH_TYPES):
         sections = paragraph.runs
 
     for r in sections:
@@ -191,21 +279,17 @@ def get_style_font(paragraph, url):
             if found:
                 continue
 
-        if r.font is not None:
-            if r.font.size is not None:
-                font_size = r.font.size
-            if r.font.name is not None:
-                font_name = r.font.name
-            if r.font.bold is not None:
-                bold = r.font.bold
-            if r.font.italic is not None:
-                italic = r.font.italic
-            if r.font.all_caps is not None:
-                all_caps = r.font.all_caps
-        if r.bold is not None:
-            bold = r.bold
-        if r.italic is not None:
-            italic = r.italic
+        properties = get_direct_properties(r)
+        if properties['font_size'] is not None:
+            font_size = properties['font_size']
+        if properties['font_name'] is not None:
+            font_name = properties['font_name']
+        if properties['bold'] is not None:
+            bold = properties['bold']
+        if properties['italic'] is not None:
+            italic = properties['italic']
+        if properties['all_caps'] is not None:
+            all_caps = properties['all_caps']
 
     if not font_size:
         font_size = 10.0
@@ -227,80 +311,97 @@ def get_style_details(p, url={}):
     return locals()
 
 
-def get_compare(inp, relate, cut):
-    ops = {'>': operator.gt,
-           '<': operator.lt,
-           '>=': operator.ge,
-           '<=': operator.le,
-           '=': operator.eq}
-    return ops[relate](inp, cut)
+OPERATORS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '=': operator.eq,
+}
+# keys of get_style_details, without the paragraph
+DETAIL_KEYS = [
+    'url', 'space_before', 'space_after', 'first_line_indent', 'hanging_indent', 'left_indent',
+    'bold', 'italic', 'font_size', 'font_name', 'all_caps', 'alignment',
+]
+SPACE_KEYS = ['space_before', 'space_after']
+
+
+def _range_test(relate, cut):
+    compare = OPERATORS[relate]
+    return lambda value: value is not None and compare(value, cut)
+
+
+def _space_test(expected):
+    # no spacing set is the same as 0
+    return lambda value: value == expected or (value is None and expected == 0.0)
+
+
+def _equal_test(expected):
+    return lambda value: value == expected
+
+
+class StyleRules:
+    """
+    A style compare dict, like the STYLES of each check, turned into one test per key when the check
+    module is imported, so checking a paragraph does not go through the dict and its value types again.
+
+    space_before and space_after may be a number or a [relation, number] pair like ['>=', 6.0].
+    Other keys found in the style details must be equal, keys not in the details are ignored.
+    """
+    def __init__(self, compare):
+        self.compare = compare
+        # (key, test, expected value as shown in the message)
+        self.checks = []
+        for key, expected in compare.items():
+            if key not in DETAIL_KEYS:
+                continue
+            if key in SPACE_KEYS and isinstance(expected, list):
+                self.checks.append((key, _range_test(expected[0], expected[1]), ' '.join(map(str, expected))))
+            elif key in SPACE_KEYS:
+                self.checks.append((key, _space_test(expected), expected))
+            else:
+                self.checks.append((key, _equal_test(expected), expected))
+        # details not checked are shown as NA, except all_caps
+        self.na_values = dict.fromkeys([key for key in DETAIL_KEYS if key != 'all_caps' and key not in compare], 'NA')
+
+    def check(self, detail):
+        """Mark the details that do not match, and return whether they all match"""
+        style_ok = True
+        for key, test, expected in self.checks:
+            if not test(detail[key]):
+                detail[key] = f"{detail[key]} should be {expected}"
+                style_ok = False
+        detail.update(self.na_values)
+        return style_ok
+
+
+def compile_rules(compare):
+    return compare if isinstance(compare, StyleRules) else StyleRules(compare)
+
+
+def compile_rules_dict(styles):
+    """compile_rules for each of the named compare dicts in styles"""
+    return {name: compile_rules(compare) for name, compare in styles.items()}
 
 
-# TODO work out why two almost identical functions below
 def check_style(p, compare, url={}):
+    """compare is a StyleRules, or a compare dict which is compiled on every call"""
+    rules = compile_rules(compare)
     detail = get_style_details(p, url)
     # remove paragraph from dict returned since it is not json serialisable
     del detail['p']
-
-    # use list from compare
-    style_ok = True
-    for key, value in compare.items():
-        if key not in detail:
-            continue
-        elif key in ['space_before', 'space_after']:
-            if isinstance(compare[key], list):
-                result = detail[key] is not None and get_compare(detail[key], compare[key][0], compare[key][1])
-                if not result:
-                    detail[key] = f"{detail[key]} should be {' '.join(map(str, compare[key]))}"
-            else:
-                result = any([detail[key] == compare[key], detail[key] is None and compare[key] == 0.0])
-                if not result:
-                    detail[key] = f"{detail[key]} should be {compare[key]}"
-        else:
-            result = detail[key] == compare[key]
-            if not result:
-                detail[key] = f"{detail[key]} should be {compare[key]}"
-        if not result:
-            style_ok = False
-
-    # if key not in compare, then change to NA
-    for key, value in detail.items():
-        if not key == 'all_caps' and key not in compare.keys():
-            detail[key] = 'NA'
+    style_ok = rules.check(detail)
     return style_ok, detail
 
 
 def check_style_detail(p, compare):
+    rules = compile_rules(compare)
     detail = get_style_details(p)
     # remove paragraph from dict returned since it is not json serialisable
     del detail['p']
-
-    # use list from compare
-    style_ok = True
-    for key, value in compare.items():
-        if key not in detail:
-            continue
-        elif key in ['space_before', 'space_after']:
-            if isinstance(compare[key], list):
-                result = detail[key] is not None and get_compare(detail[key], compare[key][0], compare[key][1])
-                if not result:
-                    detail[key] = f"{detail[key]} should be {' '.join(map(str, compare[key]))}"
-            else:
-                result = any([detail[key] == compare[key], detail[key] is None and compare[key] == 0.0])
-                if not result:
-                    detail[key] = f"{detail[key]} should be {compare[key]}"
-        else:
-            result = detail[key] == compare[key]
-            if not result:
-                detail[key] = f"{detail[key]} should be {compare[key]}"
-        if not result:
-            style_ok = False
+    style_ok = rules.check(detail)
+    if rules.checks:
         detail['style_ok'] = style_ok
-
-    # if key not in compare, then change to NA
-    for key, value in detail.items():
-        if key not in ['all_caps', 'style_ok'] and key not in compare.keys():
-            detail[key] = 'NA'
     return detail
 
 
@@ -1,4 +1,5 @@
 import re
+from collections import Counter
 from docx.document import Document as _Document
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl, CT_TblPr
@@ -6,12 +7,13 @@ from docx.table import _Cell, _Row, Table
 from docx.text.paragraph import Paragraph
 from lxml.etree import _Element
 
-from jacowvalidator.docutils.styles import check_style
+from jacowvalidator.docutils.styles import check_style, compile_rules_dict
+from jacowvalidator.docutils.mentions import get_mention_index, TABLE
+from jacowvalidator.docutils.walker import get_document_index
 from titlecase import titlecase
 
 RE_TABLE_LIST = re.compile(r'^Table \d+:')
 RE_TABLE_ORDER = re.compile(r'^Table \d+')
-RE_TABLE_REF_LIST = re.compile(r'(Table\s?\d+|Tables\s?\d+\sand\s\d+)')
 RE_TABLE_FORMAT = re.compile(r'\.$')
 RE_TABLE_TITLE_CAPS = re.compile(r'^(?:[A-Z][^\s]*\s?)+$')
 RE_SPECIAL_CHAR = re.compile(r'[^a-zA-Z ]')
@@ -43,6 +45,7 @@ STYLES = {
         'italic': None,
     }
 }
+RULES = compile_rules_dict(STYLES)
 EXTRA_RULES = [
     'Table captions are actually titles, this means that they are in Title Case, and don’t have a “.” At the end, well unless exceeds 2 lines',
     'The table caption is centred if 1 line (“Table Caption” Style), and Justified if 2 or more (“Table Caption Multi Line” Style).  The table caption must appear above the Table.',
@@ -134,12 +137,15 @@ def check_is_floating(table):
 
 
 def get_table_paragraphs(doc):
+    index = get_document_index(doc)
     prev = None
     table_details = []
-    for block in iter_block_items(doc):
-        if isinstance(block, Paragraph):
+    number = 0
+    for block in index.blocks:
+        if not isinstance(block, Table):
             prev = block
-        elif isinstance(block, Table):
+        else:
+            number = number + 1
             # exclude those with only 1 column, since not likely to be real tables.
             if len(block.columns) == 1:
                 continue
@@ -148,13 +154,7 @@ def get_table_paragraphs(doc):
                 continue
 
             # check whether there is data in table
-            text_found = False
-            for row in block.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph.text.strip() != '':
-                            text_found = True
-                            break
+            text_found = any(p.text.strip() != '' for p in index.table_paragraphs[number])
 
             if text_found:
                 table_details.append({'table': block, 'title': prev})
@@ -172,26 +172,15 @@ def check_table_titles(doc):
     All tables start with “Table n:”.
     All tables must be referred to in the main text and use “Table n”.
     """
-    table_details = get_table_paragraphs(doc)
-
-    refs = []
-    table_titles = [item['title'].text for item in table_details]
-    for paragraph in doc.paragraphs:
-        # don't include if it is one of the table titles
-        if paragraph.text not in table_titles:
-            # make sure we are using normal spaces
-            text = paragraph.text.replace(u'\xa0', u' ')
-            # Check for table names
-            result = RE_TABLE_REF_LIST.findall(text)
-            if result is not None:
-                for f in result:
-                    # split by space and parse for numbers
-                    for w in f.split(' '):
-                        try:
-                            refs.append(int(w))
-                        except ValueError:
-                            # do nothing
-                            continue
+    index = get_document_index(doc)
+    table_details = get_table_paragraphs(index)
+
+    # times each table is mentioned, leaving out the table titles
+    table_titles = {item['title'].text for item in table_details}
+    refs = Counter(
+        number for mention in get_mention_index(index).mentions[TABLE]
+        if index.paragraphs[mention.position].text not in table_titles
+        for number in mention.numbers)
 
     title_details = []
     count = 1
@@ -216,16 +205,17 @@ def check_table_titles(doc):
 
         order_check = RE_TABLE_ORDER.findall(text)
         # TODO Add info if doing some common wrong ways of doing references like 'table 1'
-        used_count = refs.count(count)
+        used_count = refs[count]
 
         floating = check_is_floating(table['table'])
 
-        table_compare = STYLES['SingleLine']
+        table_type = 'SingleLine'
         # 55 chars is approx where it changes from 1 line to 2 lines
         if len(text) > 55:
-            table_compare = STYLES['MultiLine']
+            table_type = 'MultiLine'
+        table_compare = STYLES[table_type]
 
-        style_ok, detail = check_style(p, table_compare)
+        style_ok, detail = check_style(p, RULES[table_type])
         style_name = p.style.name
         if p.style.name not in VALID_FIGURE_STYLES:
             final_style_ok = 2
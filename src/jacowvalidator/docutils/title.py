@@ -1,5 +1,5 @@
 from jacowvalidator.docutils.page import get_text, check_title_case
-from jacowvalidator.docutils.styles import check_style_detail
+from jacowvalidator.docutils.styles import check_style_detail, compile_rules_dict
 
 STYLES = {
     'normal': {
@@ -16,6 +16,7 @@ STYLES = {
         'italic': None,
     }
 }
+RULES = compile_rules_dict(STYLES)
 EXTRA_RULES = [
     'Case: Title should contain greater than 70% of CAPITAL Letters, can’t be simple Title Case.',
 ]
@@ -38,7 +39,7 @@ def get_title_summary(paragraphs):
     for p in paragraphs:
         if p.text.strip():
             detail = get_title_details(p)
-            detail.update(check_style_detail(p, style_compare))
+            detail.update(check_style_detail(p, RULES['normal']))
             title_style_ok = p.style.name == style_compare['styles']['jacow']
             detail.update({'title_style_ok': title_style_ok, 'style': p.style.name})
             title_details.append(detail)
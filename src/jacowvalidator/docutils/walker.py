@@ -0,0 +1,246 @@
+"""Single pass over a python-docx Document shared by all the docutils checkers.
+
+Building `doc.paragraphs`, `p.text` and `p.style` is the expensive part of
+checking a document, so the body is walked once here and every checker reads
+from the resulting DocumentIndex instead of iterating the Document again.
+A RawDocument from the raw xml engine has already been walked and is indexed as is.
+"""
+from docx.oxml import parse_xml
+from docx.oxml.table import CT_Tbl
+from docx.oxml.text.paragraph import CT_P
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+from jacowvalidator.docutils.rawxml import RawDocument, read_ppr, read_rpr, read_run_text, DOCUMENT_PART, \
+    RE_STORY_PART
+
+
+class IndexedRun(Run):
+    """Run with its text and direct formatting read once"""
+    def __init__(self, r, parent):
+        super(IndexedRun, self).__init__(r, parent)
+        self._text = None
+        self._properties = None
+
+    @property
+    def properties(self):
+        if self._properties is None:
+            self._properties = read_rpr(self._r.rPr)
+        return self._properties
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = read_run_text(self._r)
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        Run.text.fset(self, text)
+        self._text = None
+
+
+class IndexedParagraph(Paragraph):
+    """Paragraph that caches the values every checker reads.
+
+    The index is built for reading only, so text, style and runs are looked up
+    once. Assigning text or style still works and refreshes the cached value.
+    """
+    def __init__(self, p, parent, index=0, in_table=None):
+        super(IndexedParagraph, self).__init__(p, parent)
+        # position in doc.paragraphs, or in the cell for table paragraphs
+        self.index = index
+        # (table number, row number, column number) all starting at 1
+        self.in_table = in_table
+        self._text = None
+        self._style = None
+        self._runs = None
+        self._properties = None
+
+    @property
+    def runs(self):
+        if self._runs is None:
+            self._runs = [IndexedRun(r, self) for r in self._p.r_lst]
+        return self._runs
+
+    @property
+    def properties(self):
+        """Formatting set directly on the paragraph, see rawxml.read_ppr"""
+        if self._properties is None:
+            self._properties = read_ppr(self._p.pPr)
+        return self._properties
+
+    @property
+    def style(self):
+        if self._style is None:
+            self._style = Paragraph.style.fget(self)
+        return self._style
+
+    @style.setter
+    def style(self, style_or_name):
+        Paragraph.style.fset(self, style_or_name)
+        self._style = self._properties = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = ''.join(r.text for r in self.runs)
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        Paragraph.text.fset(self, text)
+        self._text = self._runs = None
+
+
+class DocumentIndex:
+    """Paragraphs, tables and section boundaries of a document, in document order.
+
+    Section boundaries are indexes into `paragraphs`, -1 when not found:
+    title_index     first non empty paragraph
+    author_index    first non empty paragraph after the title with a different style
+    abstract_index  first paragraph with the text 'Abstract'
+    reference_index first paragraph after the abstract with the text 'References'
+    """
+    def __init__(self, doc):
+        self.doc = doc
+        self.paragraphs = []
+        self.tables = []
+        # body paragraphs and tables in the order they appear in the document
+        self.blocks = []
+        # paragraphs found in the cells of each table, keyed by table number
+        self.table_paragraphs = {}
+        self.title_index = self.author_index = self.abstract_index = self.reference_index = -1
+        # citations, figures and tables mentioned in the text, see mentions.get_mention_index
+        self.mentions = None
+        self._current_style = None
+
+        blocks = doc.blocks if isinstance(doc, RawDocument) else self._iter_blocks(doc)
+        for block in blocks:
+            if isinstance(block, tuple):
+                table, paragraphs = block
+                self.tables.append(table)
+                self.blocks.append(table)
+                self.table_paragraphs[len(self.tables)] = paragraphs
+            else:
+                self.paragraphs.append(block)
+                self.blocks.append(block)
+                self._find_sections(block)
+
+    def _iter_blocks(self, doc):
+        # same blocks as RawDocument.blocks, paragraphs and (table, cell paragraphs) pairs
+        body = doc._body
+        paragraph_count = table_count = 0
+        for child in body._element.iterchildren():
+            if isinstance(child, CT_P):
+                yield IndexedParagraph(child, body, paragraph_count)
+                paragraph_count = paragraph_count + 1
+            elif isinstance(child, CT_Tbl):
+                table_count = table_count + 1
+                table = Table(child, body)
+                yield table, self._index_table(table, table_count)
+
+    def _find_sections(self, p):
+        # no need to keep looking after the references heading
+        if self.reference_index != -1:
+            return
+
+        text = p.text.strip()
+        if not text:
+            return
+
+        # first non empty paragraph is the title
+        # Assume all of title is same style so end of title is when the style changes
+        if self.title_index == -1:
+            self.title_index = p.index
+        elif self.author_index == -1 and self._current_style != p.style.name:
+            self.author_index = p.index
+        self._current_style = p.style.name
+
+        if text.lower() == 'abstract':
+            if self.abstract_index == -1:
+                self.abstract_index = p.index
+        elif text.lower() == 'references' and self.abstract_index != -1:
+            self.reference_index = p.index
+
+    def _index_table(self, table, number):
+        paragraphs = []
+        # table._cells is built once per table, table.rows[i].cells rebuilds it for every row
+        cells = table._cells
+        column_count = table._column_count
+        for r in range(len(table.rows)):
+            for c, cell in enumerate(cells[r * column_count:(r + 1) * column_count], 1):
+                for i, p in enumerate(cell._element.p_lst):
+                    paragraphs.append(IndexedParagraph(p, cell, i, (number, r + 1, c)))
+        return paragraphs
+
+    @property
+    def all_table_paragraphs(self):
+        return [p for paragraphs in self.table_paragraphs.values() for p in paragraphs]
+
+    @property
+    def title_paragraphs(self):
+        return self.paragraphs[self.title_index: self.author_index]
+
+    @property
+    def author_paragraphs(self):
+        return self.paragraphs[self.author_index: self.abstract_index]
+
+    @property
+    def abstract_paragraph(self):
+        return self.paragraphs[self.abstract_index] if self.abstract_index != -1 else None
+
+    @property
+    def after_abstract_paragraphs(self):
+        """All paragraphs after the abstract heading, empty if there is no abstract heading"""
+        if self.abstract_index == -1:
+            return []
+        return self.paragraphs[self.abstract_index + 1:]
+
+    @property
+    def body_paragraphs(self):
+        """Paragraphs between the abstract heading and the references heading"""
+        if self.abstract_index == -1:
+            return []
+        if self.reference_index == -1:
+            return self.paragraphs[self.abstract_index + 1:]
+        return self.paragraphs[self.abstract_index + 1: self.reference_index]
+
+    @property
+    def reference_paragraphs(self):
+        if self.reference_index == -1:
+            return []
+        return self.paragraphs[self.reference_index + 1:]
+
+
+def get_document_index(doc):
+    """Return the DocumentIndex for doc, which may already be one"""
+    if isinstance(doc, DocumentIndex):
+        return doc
+    return DocumentIndex(doc)
+
+
+def get_document(doc):
+    """Return the Document, or RawDocument, for doc, which may be a DocumentIndex"""
+    if isinstance(doc, DocumentIndex):
+        return doc.doc
+    return doc
+
+
+def get_story_elements(doc):
+    """
+    The root element of the body and of each header, footer, footnotes and endnotes part of doc,
+    keyed by the part name without the leading /, eg 'word/document.xml', 'word/header1.xml'
+    """
+    doc = get_document(doc)
+    if isinstance(doc, RawDocument):
+        return doc.stories
+
+    stories = {DOCUMENT_PART: doc.element.body}
+    for part in doc.part.package.iter_parts():
+        if RE_STORY_PART.match(part.partname):
+            # python-docx only reads the headers and footers, the notes are left as xml
+            element = part.element if hasattr(part, 'element') else parse_xml(part.blob)
+            stories[part.partname.lstrip('/')] = element
+    return stories
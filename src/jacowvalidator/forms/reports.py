@@ -8,6 +8,7 @@ class SearchForm(FlaskForm):
     start_date = DateField('Start Date', format='%Y-%m-%d', validators=(Optional(),))
     end_date = DateField('End Date', format='%Y-%m-%d', validators=(Optional(),))
     filename = StringField('Filename', validators=(Optional(),))
+    failed_section = StringField('Failed Check', validators=(Optional(),))
     conference_id = QuerySelectField(
         query_factory=lambda: Conference.query.filter_by(is_active=True).order_by(Conference.display_order.asc()),
         allow_blank=True
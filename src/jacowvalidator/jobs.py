@@ -0,0 +1,222 @@
+"""Queue of upload validation jobs, kept in a local SQLite database.
+
+With UPLOAD_JOBS on, the upload page stores the file, queues a job and sends the browser to a
+result page that waits for it, so a slow document does not hold a web worker. The jobs are run
+by `flask jobs_worker`, on the same box as the web workers, without any other broker.
+"""
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+
+import click
+
+from jacowvalidator import app
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS job_status_created ON job (status, created);
+"""
+
+
+class JobQueue:
+    """
+    Jobs with a json payload and result.
+
+    A job is claimed by one worker at a time. A job still running after timeout seconds is
+    assumed lost with its worker and is given to another worker, up to max_attempts times.
+    Only the latest attempt at a job can finish it, an earlier one that was only slow is ignored.
+    """
+    def __init__(self, path, timeout=600, max_attempts=3):
+        self.path = path
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        # a connection per call, so the queue can be shared by threads and forked processes
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def enqueue(self, payload):
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'INSERT INTO job (id, status, payload, created) VALUES (?, ?, ?, ?)',
+                (job_id, QUEUED, json.dumps(payload), time.time()))
+        return job_id
+
+    def claim(self):
+        """Mark the oldest waiting job as running and return it, None when there is nothing to do"""
+        now = time.time()
+        with closing(self._connect()) as connection:
+            # take the write lock first so two workers can not claim the same job
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute(
+                    'SELECT id FROM job WHERE (status = ? OR (status = ? AND started < ?)) AND attempts < ? '
+                    'ORDER BY created LIMIT 1',
+                    (QUEUED, RUNNING, now - self.timeout, self.max_attempts)).fetchone()
+                if row is None:
+                    connection.execute('COMMIT')
+                    return None
+                connection.execute(
+                    'UPDATE job SET status = ?, started = ?, attempts = attempts + 1 WHERE id = ?',
+                    (RUNNING, now, row['id']))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        return self.get(row['id'])
+
+    def expire(self):
+        """Fail the jobs lost with their worker max_attempts times, and return them"""
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = connection.execute(
+                    'SELECT * FROM job WHERE status = ? AND started < ? AND attempts >= ?',
+                    (RUNNING, now - self.timeout, self.max_attempts)).fetchall()
+                for row in rows:
+                    connection.execute(
+                        'UPDATE job SET status = ?, error = ?, finished = ? WHERE id = ?',
+                        (FAILED, f"Timed out after {row['attempts']} attempts", now, row['id']))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+
+    def complete(self, job, result):
+        """Finish job, as returned by claim, with result. False when a later attempt has claimed it since"""
+        return self._finish(job, DONE, result=json.dumps(result))
+
+    def fail(self, job, error):
+        """Fail job, as returned by claim. False when a later attempt has claimed it since"""
+        return self._finish(job, FAILED, error=str(error))
+
+    def _finish(self, job, status, result=None, error=None):
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                'UPDATE job SET status = ?, result = ?, error = ?, finished = ? '
+                'WHERE id = ? AND status = ? AND started = ?',
+                (status, result, error, time.time(), job['id'], RUNNING, job['started']))
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        """The job as a dict, with its payload and result decoded, None if there is no such job"""
+        with closing(self._connect()) as connection:
+            row = connection.execute('SELECT * FROM job WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def purge(self, older_than):
+        """Remove finished jobs older than older_than seconds"""
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'DELETE FROM job WHERE status IN (?, ?) AND finished < ?', (DONE, FAILED, time.time() - older_than))
+
+    def counts(self):
+        with closing(self._connect()) as connection:
+            rows = connection.execute('SELECT status, count(*) AS total FROM job GROUP BY status').fetchall()
+        return {row['status']: row['total'] for row in rows}
+
+
+def run_worker(queue, handler, poll_interval=0.5, max_jobs=None, keep=None, discard=None):
+    """
+    Run jobs from queue with handler until max_jobs have been run, or for ever when it is None.
+    handler is given the payload and returns the result, an exception fails the job.
+    discard is given the payload of each job once it is done, failed or was lost with its worker too
+    many times, and not before, as a slow attempt and the one that took it over can both be running.
+    When max_jobs is set the worker also stops once the queue is empty.
+    """
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        for expired in queue.expire():
+            app.logger.error("Upload job %s failed: %s", expired['id'], expired['error'])
+            if discard:
+                discard(expired['payload'])
+
+        job = queue.claim()
+        if job is None:
+            if max_jobs is not None:
+                break
+            if keep:
+                queue.purge(keep)
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            finished = queue.complete(job, handler(job['payload']))
+        except Exception as err:
+            app.logger.exception("Upload job %s failed", job['id'])
+            finished = queue.fail(job, err)
+        if not finished:
+            app.logger.warning("Upload job %s was taken over by another attempt", job['id'])
+        elif discard:
+            discard(job['payload'])
+        done = done + 1
+    return done
+
+
+_job_queue = None
+
+
+def get_job_queue(config):
+    """The JobQueue for this process, set up from the app config on first use"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(config['JOBS_DATABASE'], timeout=config['JOBS_TIMEOUT'])
+    return _job_queue
+
+
+def _work(poll_interval):
+    from jacowvalidator import db
+    from jacowvalidator.validation import run_upload_job, discard_upload_job
+    with app.app_context():
+        # connections made before the fork can not be shared with the parent
+        db.engine.dispose()
+        run_worker(get_job_queue(app.config), run_upload_job, poll_interval, keep=app.config['JOBS_KEEP'],
+                   discard=discard_upload_job)
+
+
+@app.cli.command("jobs_worker")
+@click.option("--processes", default=1, help="Number of worker processes")
+@click.option("--poll-interval", default=0.5, help="Seconds to wait when there are no jobs")
+def jobs_worker(processes, poll_interval):
+    """Run the upload jobs queued by the upload page"""
+    if processes == 1:
+        _work(poll_interval)
+        return
+
+    workers = [multiprocessing.Process(target=_work, args=(poll_interval,)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
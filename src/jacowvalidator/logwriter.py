@@ -0,0 +1,194 @@
+"""Upload logs written in batches by a background thread, so a request does not wait on the database.
+
+save_log puts a record for each upload on a bounded queue and a thread in each process writes
+them in batches, of up to LOG_BATCH_SIZE records or whatever arrived within LOG_FLUSH_INTERVAL
+seconds of the first, with one commit for each batch. When the queue is full the record is
+dropped rather than making the request wait. With LOG_QUEUE_SIZE 0 the logs are written in the
+request, as they are for the jobs worker.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import has_request_context
+from flask_login import current_user
+
+from jacowvalidator import app, db
+from jacowvalidator.conferences import get_conference_registry
+from jacowvalidator.models import Log
+from jacowvalidator.rollups import update_rollups
+from jacowvalidator.utils import log_report, report_sections, report_timing, sections_ok
+
+_STOP = object()
+
+
+def write_logs(records):
+    """Add a Log for each record made by save_log, add them to the rollups and commit them together"""
+    conferences = get_conference_registry().all()
+    logs = []
+    for record in records:
+        upload_log = Log()
+        upload_log.filename = record['filename']
+        upload_log.timestamp = record['timestamp']
+        upload_log.app_user_id = record['app_user_id']
+        conference = conferences.get(record['conference_id'])
+        upload_log.conference_id = conference['id'] if conference else None
+        upload_log.status = record['status']
+        upload_log.report = log_report(record['report'])
+        upload_log.sections = report_sections(upload_log.report)
+        upload_log.ok = sections_ok(upload_log.status, upload_log.sections)
+        upload_log.stats = upload_log.report.get('stats')
+        upload_log.timing = report_timing(upload_log.report)
+        db.session.add(upload_log)
+        logs.append(upload_log)
+    update_rollups(logs)
+    db.session.commit()
+
+
+class LogWriter:
+    """
+    Bounded queue of records and the thread that hands them to write in batches.
+
+    The thread is started by the first put in each process, so a writer made before the web
+    workers fork works in each of them. counts has the number of records queued, written,
+    dropped because the queue was full and failed because write raised, and the batches written.
+    """
+    def __init__(self, write, max_size=1000, batch_size=50, interval=1.0):
+        self.write = write
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.counts = dict.fromkeys(['queued', 'written', 'dropped', 'failed', 'batches'], 0)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(self.max_size)
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def put(self, record):
+        """Queue record to be written, False when it was dropped"""
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            dropped = self.counts['dropped']
+            if dropped == 1 or dropped % 100 == 0:
+                app.logger.warning("Upload log queue is full, %d logs dropped so far", dropped)
+            return False
+        self._count('queued')
+        return True
+
+    def metrics(self):
+        """The counts and the number of records waiting to be written"""
+        with self._lock:
+            return dict(self.counts, pending=self._queue.qsize() if self._queue else 0)
+
+    def flush(self):
+        """Wait until every record queued so far has been written"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self, timeout=5):
+        """Write what is queued and stop the thread, waiting at most timeout seconds"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            record = self._queue.get()
+            if record is _STOP:
+                self._queue.task_done()
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.write(batch)
+            self._count('written', len(batch))
+            self._count('batches')
+        except Exception:
+            self._count('failed', len(batch))
+            app.logger.exception("Failed to write %d upload logs", len(batch))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+def _write_in_app_context(records):
+    with app.app_context():
+        try:
+            write_logs(records)
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+_log_writer = None
+
+
+def get_log_writer(config):
+    """The LogWriter for this process, set up from the app config on first use, None when logs are not queued"""
+    global _log_writer
+    if not config['LOG_QUEUE_SIZE']:
+        return None
+    if _log_writer is None:
+        _log_writer = LogWriter(
+            _write_in_app_context, config['LOG_QUEUE_SIZE'], config['LOG_BATCH_SIZE'], config['LOG_FLUSH_INTERVAL'])
+    return _log_writer
+
+
+def save_log(filename, conference_id, status, args, app_user_id=None, background=True):
+    """
+    Log an upload, args is the report. The Log is written by the log writer thread unless background
+    is False or the log queue is turned off, so args is read after save_log returns and must not be changed.
+    """
+    if app_user_id is None and has_request_context() and current_user.is_authenticated:
+        app_user_id = current_user.id
+    record = {
+        'filename': filename,
+        'timestamp': datetime.utcnow(),
+        'app_user_id': app_user_id,
+        'conference_id': conference_id,
+        'status': status,
+        'report': args,
+    }
+    log_writer = get_log_writer(app.config) if background else None
+    if log_writer is None:
+        write_logs([record])
+    else:
+        log_writer.put(record)
@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from jacowvalidator import db, login
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
@@ -31,20 +33,72 @@ class AppUser(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+# JSONB on postgres so reports can be queried and indexed, plain JSON on other databases
+JSONDocument = db.JSON().with_variant(JSONB(), 'postgresql')
+
+
 class Log(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(64), index=True)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
-    status = db.Column(db.String(25))
-    report = db.Column(db.Text())
+    status = db.Column(db.String(25), index=True)
+    # the parts of the report in utils.LOG_FIELDS, only loaded when it is used
+    report = db.deferred(db.Column(JSONDocument))
+    # ok flag of each section in the report, with a GIN index to find the logs where a section failed
+    sections = db.Column(JSONDocument)
+    # status is OK and no section failed
+    ok = db.Column(db.Boolean())
+    # the document stats and the timing, with the timing of each section, for the summary list
+    stats = db.Column(JSONDocument)
+    timing = db.Column(JSONDocument)
     conference_id = db.Column(db.Integer, db.ForeignKey('conference.id'), nullable=True)
     conference = db.relationship('Conference', backref=db.backref('logs', lazy='dynamic'))
     app_user_id = db.Column(db.Integer, db.ForeignKey('app_user.id'), nullable=True)
     app_user = db.relationship('AppUser', backref=db.backref('logs', lazy='dynamic'))
 
+    __table_args__ = (
+        db.Index('ix_log_ok_timestamp', 'ok', 'timestamp'),
+        # the order of the log pages and the key they are paged on
+        db.Index('ix_log_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_log_sections', 'sections', postgresql_using='gin', postgresql_ops={'sections': 'jsonb_path_ops'}),
+    )
+
     def __repr__(self):
         return '<Log {} {}>'.format(self.filename, self.timestamp)
 
+    @classmethod
+    def failed(cls, section):
+        """Filter for the logs where the named section failed, uses the GIN index on sections"""
+        return type_coerce(cls.sections, JSONB()).contains({section: False})
+
+
+# the rollups are kept up to date as logs are written, see jacowvalidator.rollups, their conference_id
+# is 0 for logs without a conference so it can be part of the key
+class DailyLogCount(db.Model):
+    """Number of uploads each day, for each conference and status"""
+    day = db.Column(db.Date, primary_key=True)
+    conference_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(25), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    ok_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<DailyLogCount {} {} {} {}>'.format(self.day, self.conference_id, self.status, self.count)
+
+
+class PaperStatus(db.Model):
+    """Uploads of each paper, by filename, to each conference and the status of the latest"""
+    filename = db.Column(db.String(64), primary_key=True)
+    conference_id = db.Column(db.Integer, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    first_seen = db.Column(db.DateTime, nullable=False)
+    last_seen = db.Column(db.DateTime, nullable=False, index=True)
+    status = db.Column(db.String(25))
+    ok = db.Column(db.Boolean())
+
+    def __repr__(self):
+        return '<PaperStatus {} {} {}>'.format(self.filename, self.conference_id, self.attempts)
+
 
 class Conference(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -60,3 +114,15 @@ class Conference(db.Model):
 
     def __str__(self):
         return self.name
+
+
+class RegistryVersion(db.Model):
+    """
+    Version of a table the processes keep in memory, added to by every change to the table so
+    each process knows to load it again, see jacowvalidator.conferences
+    """
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return '<RegistryVersion {} {}>'.format(self.name, self.version)
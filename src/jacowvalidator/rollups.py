@@ -0,0 +1,117 @@
+"""Rollups of the upload logs for the admin reports, so they do not group the whole log table on every view.
+
+DailyLogCount has the number of uploads each day for each conference and status, and PaperStatus
+the number of uploads of each paper with the status of the latest. write_logs adds each batch of
+logs to them in the transaction that writes the logs, with one upsert for each table, and
+`flask rebuild_rollups` builds them again from the log table.
+"""
+import click
+from sqlalchemy import case, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from jacowvalidator import app, db
+from jacowvalidator.models import DailyLogCount, Log, PaperStatus
+
+
+def rollup_logs(logs):
+    """
+    The rows each batch of logs adds to the rollups, as (daily counts, paper statuses). Each key is
+    only in one row, as a row can only be upserted once by a statement. Logs are expected in the
+    order they were written, the latest of two logs with the same timestamp is the later one.
+    The rows are sorted by key, so concurrent batches lock the rows they share in the same order
+    and can not deadlock.
+    """
+    days, papers = {}, {}
+    for log in logs:
+        conference_id, status = log.conference_id or 0, log.status or ''
+        day = days.setdefault(
+            (log.timestamp.date(), conference_id, status),
+            {'day': log.timestamp.date(), 'conference_id': conference_id, 'status': status,
+             'count': 0, 'ok_count': 0})
+        day['count'] += 1
+        day['ok_count'] += 1 if log.ok else 0
+
+        filename = log.filename or ''
+        paper = papers.get((filename, conference_id))
+        if paper is None:
+            papers[(filename, conference_id)] = {
+                'filename': filename, 'conference_id': conference_id, 'attempts': 1,
+                'first_seen': log.timestamp, 'last_seen': log.timestamp, 'status': log.status, 'ok': log.ok}
+            continue
+        paper['attempts'] += 1
+        paper['first_seen'] = min(paper['first_seen'], log.timestamp)
+        if log.timestamp >= paper['last_seen']:
+            paper.update(last_seen=log.timestamp, status=log.status, ok=log.ok)
+    days = sorted(days.values(), key=lambda day: (day['day'], day['conference_id'], day['status']))
+    papers = sorted(papers.values(), key=lambda paper: (paper['conference_id'], paper['filename']))
+    return days, papers
+
+
+def _insert(table):
+    # postgres and sqlite both have INSERT ... ON CONFLICT DO UPDATE
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def update_rollups(logs):
+    """Add logs to the rollups, in the session's transaction"""
+    days, papers = rollup_logs(logs)
+    if days:
+        table = DailyLogCount.__table__
+        insert = _insert(table)
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.conference_id, table.c.status],
+            set_={
+                'count': table.c['count'] + insert.excluded['count'],
+                'ok_count': table.c.ok_count + insert.excluded.ok_count,
+            }), days)
+    if papers:
+        table = PaperStatus.__table__
+        insert = _insert(table)
+        # every expression sees the row as it was before the update
+        latest = insert.excluded.last_seen >= table.c.last_seen
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[table.c.filename, table.c.conference_id],
+            set_={
+                'attempts': table.c.attempts + insert.excluded.attempts,
+                'first_seen': case((insert.excluded.first_seen < table.c.first_seen, insert.excluded.first_seen),
+                                   else_=table.c.first_seen),
+                'last_seen': case((latest, insert.excluded.last_seen), else_=table.c.last_seen),
+                'status': case((latest, insert.excluded.status), else_=table.c.status),
+                'ok': case((latest, insert.excluded.ok), else_=table.c.ok),
+            }), papers)
+
+
+def rebuild_rollups(batch_size=5000):
+    """
+    Build the rollups again from the log table, in one transaction so the reports never see them
+    half built. On postgres the rollup tables are locked first, so logs written meanwhile wait and
+    are added to the rebuilt rollups instead of being counted twice or lost. Returns the number of logs.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(
+            text(f'LOCK TABLE {DailyLogCount.__tablename__}, {PaperStatus.__tablename__} IN EXCLUSIVE MODE'))
+    DailyLogCount.query.delete()
+    PaperStatus.query.delete()
+
+    total = last_id = 0
+    query = db.session.query(Log.id, Log.filename, Log.timestamp, Log.conference_id, Log.status, Log.ok) \
+        .filter(Log.timestamp.isnot(None)).order_by(Log.id)
+    while True:
+        logs = query.filter(Log.id > last_id).limit(batch_size).all()
+        if not logs:
+            break
+        update_rollups(logs)
+        total += len(logs)
+        last_id = logs[-1].id
+    db.session.commit()
+    return total
+
+
+@app.cli.command("rebuild_rollups")
+@click.option("--batch-size", default=5000, help="Number of logs read at a time")
+def rebuild_rollups_command(batch_size):
+    """Rebuild the upload log rollups of the admin reports from the log table"""
+    total = rebuild_rollups(batch_size)
+    click.echo(f"Rebuilt rollups from {total} logs")
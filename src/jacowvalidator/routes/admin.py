@@ -1,14 +1,19 @@
-import os
-from docx import Document
-from flask import render_template, request, send_file, abort
-from sqlalchemy import func
+import csv
+import json
+from datetime import datetime
+from io import BytesIO, StringIO
+from flask import render_template, request, send_file, abort, url_for, Response, stream_with_context
+from sqlalchemy import func, null, tuple_
+from sqlalchemy.orm import joinedload, undefer
 from functools import wraps
 from jacowvalidator import app, document_docx, db
 from flask_login import current_user, login_required
-from jacowvalidator.models import AppUser, Conference, Log
+from jacowvalidator.conferences import bump_conference_version
+from jacowvalidator.models import AppUser, Conference, DailyLogCount, Log, PaperStatus
 from jacowvalidator.forms.user import RegistrationForm
 from jacowvalidator.forms.conference import ConferenceForm
 from jacowvalidator.forms.reports import SearchForm
+from jacowvalidator.uploads import receive_upload
 
 def is_admin():
     return current_user and current_user.is_authenticated and current_user.is_admin
@@ -51,6 +56,7 @@ def conference():
         if conference.id == '':
             conference.id = None
         db.session.add(conference)
+        bump_conference_version()
         db.session.commit()
 
         # TODO work out how to reset form
@@ -69,6 +75,7 @@ def conference_update(id):
     form = ConferenceForm(obj=conference)
     if form.validate_on_submit():
         form.populate_obj(conference)
+        bump_conference_version()
         db.session.commit()
 
     conferences = Conference.query.all()
@@ -113,68 +120,212 @@ def user_update(id):
 def convert():
     documents = document_docx
     if request.method == "POST" and documents.name in request.files:
-        filename = documents.save(request.files[documents.name])
-        full_path = documents.path(filename)
-        try:
-            doc = Document(full_path)
-            new_doc_path = documents.path('test_'+filename)
-            replace_identifying_text(doc, new_doc_path)
-            # send_file should handle the open read and close
-            return send_file(
-                new_doc_path,
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                as_attachment=True,
-                attachment_filename=filename
-            )
-
-        finally:
-            os.remove(full_path)
-            # PermissionError: [WinError 32] The process cannot access the file because it is being used by another process: '/var/tmp\\document\\test_THPMK148_2.docx'
-            # only happens on windows I think.
-            # os.remove(new_doc_path)
+        filename, upload = receive_upload(documents, request.files[documents.name])
+        from docx import Document
+        from jacowvalidator.test_utils import replace_identifying_text
+        doc = Document(upload)
+        replace_identifying_text(doc)
+        converted = BytesIO()
+        doc.save(converted)
+        converted.seek(0)
+        return send_file(
+            converted,
+            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            as_attachment=True,
+            download_name=filename
+        )
 
     return render_template("convert.html", action='convert')
 
 
-@app.route("/report/summary", methods=["GET", "POST"])
+# columns of the csv export, after the log columns come the timing and the document stats
+EXPORT_COLUMNS = ['id', 'timestamp', 'filename', 'conference', 'user', 'status', 'ok', 'failed']
+EXPORT_TIMING = ['wall', 'cpu']
+EXPORT_STATS = ['paragraphs', 'runs', 'tables', 'cells', 'references', 'figures', 'file_size', 'parts']
+
+
+@app.route("/report/summary", methods=["GET"])
 @login_required
 @admin_or_editor_required
 def summary():
-    logs = Log.query
-    form = SearchForm()
-    if form.validate_on_submit():
-        form, logs = get_logs_from_search(form)
-    logs = logs.order_by(Log.timestamp.desc()).all()
+    form, logs = search_logs()
+    logs, next_url = get_log_page(logs.options(joinedload(Log.conference), joinedload(Log.app_user)))
 
-    return render_template("summary.html", logs=logs, form=form)
+    return render_template(
+        "summary.html", logs=logs, form=form, next_url=next_url, export_args=get_export_args(),
+        totals=get_upload_totals(form))
 
 
-@app.route("/report/count", methods=["GET", "POST"])
+@app.route("/report/count", methods=["GET"])
 @login_required
 @admin_or_editor_required
 def count():
-    # countLogs is an array of tuples
-    logs = Log.query
-    form = SearchForm()
-    if form.validate_on_submit():
-        form, logs = get_logs_from_search(form)
-
-    logs = logs.with_entities(Log.filename, func.count(Log.filename)).group_by(Log.filename).all()
+    form, logs = search_logs()
+    if form.app_user_id.data or form.start_date.data or form.end_date.data or form.failed_section.data:
+        # the rollups are not kept by user, date or check, so these searches count the logs themselves
+        papers = logs.outerjoin(Log.conference) \
+            .with_entities(
+                Log.filename, Conference.short_name.label('conference'), func.count(Log.id).label('attempts'),
+                func.min(Log.timestamp).label('first_seen'), func.max(Log.timestamp).label('last_seen'),
+                null().label('status'), null().label('ok')) \
+            .group_by(Log.filename, Conference.short_name).order_by(func.max(Log.timestamp).desc())
+    else:
+        papers = get_paper_statuses(form).order_by(PaperStatus.last_seen.desc())
 
-    return render_template("count.html", logs=logs, form=form)
+    return render_template("count.html", papers=papers.all(), form=form)
 
 
 
-@app.route("/report/log", methods=["GET", "POST"])
+@app.route("/report/log", methods=["GET"])
 @login_required
 @admin_or_editor_required
 def log():
-    logs = Log.query
-    form = SearchForm()
-    if form.validate_on_submit():
-        form, logs = get_logs_from_search(form)
+    form, logs = search_logs()
+    logs, next_url = get_log_page(logs.options(undefer(Log.report)))
 
-    return render_template("logs.html", logs=logs, form=form)
+    return render_template("logs.html", logs=logs, form=form, next_url=next_url)
+
+
+@app.route("/report/export.<any(csv, jsonl):export_format>", methods=["GET"])
+@login_required
+@admin_or_editor_required
+def export_logs(export_format):
+    """The logs found by the search, streamed from the database a batch at a time"""
+    _, logs = search_logs()
+    rows = logs.outerjoin(Log.conference).outerjoin(Log.app_user) \
+        .order_by(Log.timestamp.desc(), Log.id.desc()) \
+        .with_entities(
+            Log.id, Log.timestamp, Log.filename, Conference.short_name.label('conference'),
+            AppUser.username.label('user'), Log.status, Log.ok, Log.sections, Log.timing, Log.stats) \
+        .yield_per(1000)
+
+    if export_format == 'csv':
+        lines, mimetype = iter_csv_export(rows), 'text/csv'
+    else:
+        lines, mimetype = iter_jsonl_export(rows), 'application/x-ndjson'
+    return Response(
+        stream_with_context(lines), mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=logs.{export_format}'})
+
+
+def iter_csv_export(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS + EXPORT_TIMING + EXPORT_STATS)
+    for row in rows:
+        timing, stats = row.timing or {}, row.stats or {}
+        failed = [name for name, ok in (row.sections or {}).items() if ok is False]
+        writer.writerow(
+            [row.id, row.timestamp.isoformat() if row.timestamp else '', row.filename, row.conference, row.user,
+             row.status, row.ok, ' '.join(failed)]
+            + [timing.get(name) for name in EXPORT_TIMING] + [stats.get(name) for name in EXPORT_STATS])
+        # send the rows in chunks rather than one at a time
+        if buffer.tell() > 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_jsonl_export(rows):
+    for row in rows:
+        yield json.dumps({
+            'id': row.id,
+            'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+            'filename': row.filename,
+            'conference': row.conference,
+            'user': row.user,
+            'status': row.status,
+            'ok': row.ok,
+            'sections': row.sections,
+            'timing': row.timing,
+            'stats': row.stats,
+        }) + '\n'
+
+
+def search_logs():
+    """
+    The search form and the logs it finds. The search is read from the query string, so a page
+    of results and the export of them can be linked to.
+    """
+    form = SearchForm(request.args, meta={'csrf': False})
+    if request.args and form.validate():
+        return get_logs_from_search(form)
+    return form, Log.query
+
+
+def get_log_page(logs):
+    """
+    A page of logs, newest first, and the url of the next page, None on the last page.
+
+    Pages are keyed on the (timestamp, id) of the last log of the previous page, given as
+    ?before=, so any page is found from the ix_log_timestamp_id index without counting
+    the logs before it.
+    """
+    size = app.config['LOG_PAGE_SIZE']
+    logs = logs.order_by(Log.timestamp.desc(), Log.id.desc())
+    before = request.args.get('before')
+    if before:
+        try:
+            timestamp, log_id = before.rsplit('_', 1)
+            logs = logs.filter(tuple_(Log.timestamp, Log.id) < (datetime.fromisoformat(timestamp), int(log_id)))
+        except ValueError:
+            abort(400)
+
+    page = logs.limit(size + 1).all()
+    if len(page) <= size:
+        return page, None
+    last = page[size - 1]
+    args = dict(get_search_args(), before=f'{last.timestamp.isoformat()}_{last.id}')
+    return page[:size], url_for(request.endpoint, **args)
+
+
+def get_search_args():
+    """The search in the query string, without a csrf_token left in links from when the form sent one"""
+    args = request.args.to_dict()
+    args.pop('csrf_token', None)
+    return args
+
+
+def get_export_args():
+    """The search in the query string, without the page"""
+    args = get_search_args()
+    args.pop('before', None)
+    return args
+
+
+def get_paper_statuses(form):
+    """The uploads of each paper the search finds, from the rollup"""
+    papers = db.session.query(
+        PaperStatus.filename, Conference.short_name.label('conference'), PaperStatus.attempts,
+        PaperStatus.first_seen, PaperStatus.last_seen, PaperStatus.status, PaperStatus.ok) \
+        .outerjoin(Conference, Conference.id == PaperStatus.conference_id)
+    if form.conference_id.data:
+        papers = papers.filter(PaperStatus.conference_id == form.conference_id.data.id)
+    if form.filename.data:
+        papers = papers.filter(PaperStatus.filename == form.filename.data)
+    return papers
+
+
+def get_upload_totals(form):
+    """
+    The uploads to each conference and how many were ok, from the daily rollup, None when
+    the search is by user, filename or check, which the rollup is not kept by.
+    """
+    if form.app_user_id.data or form.filename.data or form.failed_section.data:
+        return None
+    totals = db.session.query(
+        Conference.short_name.label('conference'), func.sum(DailyLogCount.count).label('uploads'),
+        func.sum(DailyLogCount.ok_count).label('ok')) \
+        .select_from(DailyLogCount).outerjoin(Conference, Conference.id == DailyLogCount.conference_id)
+    if form.conference_id.data:
+        totals = totals.filter(DailyLogCount.conference_id == form.conference_id.data.id)
+    # as for the logs, a day is after the start date when it starts on it
+    if form.start_date.data:
+        totals = totals.filter(DailyLogCount.day >= form.start_date.data)
+    if form.end_date.data:
+        totals = totals.filter(DailyLogCount.day < form.end_date.data)
+    return totals.group_by(Conference.short_name).order_by(Conference.short_name).all()
 
 
 def get_logs_from_search(form):
@@ -185,6 +336,8 @@ def get_logs_from_search(form):
         logs = logs.filter_by(app_user_id=form.app_user_id.data.id)
     if form.filename.data:
         logs = logs.filter_by(filename=form.filename.data)
+    if form.failed_section.data:
+        logs = logs.filter(Log.failed(form.failed_section.data))
 
     if form.start_date.data:
         logs = logs.filter(Log.timestamp > form.start_date.data)
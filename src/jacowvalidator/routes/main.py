@@ -1,34 +1,24 @@
 import os
-import json
-from datetime import datetime
-from subprocess import run
-from docx import Document
-from docx.opc.exceptions import PackageNotFoundError
-from TexSoup import TexSoup
-from flask import redirect, render_template, request, url_for, flash, abort
+from flask import redirect, render_template, request, url_for, flash, abort, jsonify
 from flask_uploads import UploadNotAllowed
+from werkzeug.exceptions import RequestEntityTooLarge
 from jacowvalidator import app, document_docx, document_tex, db
-from jacowvalidator.utils import json_serialise
-from jacowvalidator.docutils.page import (check_tracking_on, TrackingOnError)
-from jacowvalidator.docutils.doc import create_upload_variables, create_spms_variables, create_upload_variables_latex, \
-    AbstractNotFoundError
-from jacowvalidator.spms import get_conference_path, PaperNotFoundError
+from jacowvalidator.buildinfo import get_build_info
+from jacowvalidator.cache import load_metadata
+from jacowvalidator.conferences import get_conference_registry
+from jacowvalidator.jobs import get_job_queue, DONE, FAILED
+from jacowvalidator.uploads import receive_upload
+from jacowvalidator.warmup import warmup_status
+from jacowvalidator.logwriter import get_log_writer, save_log
 from flask_login import current_user, login_user, logout_user, login_required
-from jacowvalidator.models import AppUser, Conference, Log
+from jacowvalidator.models import AppUser, Log
 from jacowvalidator.forms.user import LoginForm, RegistrationForm, UserRegistrationForm
 from jacowvalidator.routes.admin import is_admin
 
-try:
-    p = run(['git', 'log', '-1', '--format=%h,%at'], capture_output=True, text=True, check=True)
-    commit_sha, commit_date = p.stdout.split(',')
-    commit_date = datetime.fromtimestamp(int(commit_date))
-except Exception:
-    commit_sha, commit_date = None, None
-
-
 @app.context_processor
 def inject_commit_details():
-    return dict(commit_sha=commit_sha, commit_date=commit_date)
+    build_info = get_build_info(app.config)
+    return dict(commit_sha=build_info['commit_sha'], commit_date=build_info['commit_date'])
 
 
 @app.context_processor
@@ -37,6 +27,13 @@ def inject_debug():
     return dict(debug=debug)
 
 
+@app.context_processor
+def inject_engines():
+    # the document parsers are imported on first use rather than when the app starts
+    from jacowvalidator.docutils.doc import DOCX_ENGINES
+    return dict(engines=list(DOCX_ENGINES), default_engine=app.config['DOCX_ENGINE'])
+
+
 @app.template_filter('tick_cross')
 def tick_cross(s):
     if s == 1 or s is True:
@@ -57,10 +54,17 @@ def pastel_background_style(s):
         return "background-jacow-cross"
 
 
-@app.template_filter('display_report')
-def display_report(s):
-    report = json.loads(s)
-    return report
+@app.template_filter('report_stats')
+def report_stats(log):
+    """The document stats, the timing of the whole check and the timing of each section of a Log"""
+    timing = dict(log.timing or {})
+    sections = timing.pop('sections', {})
+    return {
+        'stats': log.stats or {},
+        'timing': timing,
+        'sections': sections,
+        'slowest': max(sections, key=lambda name: sections[name]['wall']) if sections else None,
+    }
 
 
 @app.template_filter('dict_to_list')
@@ -92,6 +96,15 @@ def upload_latex():
     return upload_common(documents, args)
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness of this worker for a load balancer, 503 until warmup has finished, see gunicorn.conf.py"""
+    status = warmup_status()
+    log_writer = get_log_writer(app.config)
+    status['log_writer'] = log_writer.metrics() if log_writer else None
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 @app.route("/resources", methods=["GET"])
 def resources():
     admin = 'DEV_DEBUG' in os.environ and os.environ['DEV_DEBUG'] == 'True'
@@ -175,126 +188,114 @@ def get_summary_latex(part, title):
 
 def upload_common(documents, args):
     admin = 'DEV_DEBUG' in os.environ and os.environ['DEV_DEBUG'] == 'True'
-    conferences = [conference.short_name for conference in Conference.query.filter_by(is_active=True).order_by(Conference.display_order.asc()).all()]
-    if request.method == "POST" and documents.name in request.files:
+    conferences = get_conference_registry().active()
+    try:
+        uploaded = request.method == "POST" and documents.name in request.files
+    except RequestEntityTooLarge:
+        return render_template(
+            "upload.html",
+            error=f"The file is too large, uploads can be up to {app.config['MAX_CONTENT_LENGTH'] // 2**20} MB",
+            admin=admin,
+            args=args)
+    if uploaded:
+        # editors quick check only runs the SPMS check and the Title and Authors checks it requires
+        quick_check = request.values.get('checks') == 'quick'
+        engine = get_engine(admin)
+
+        storage = request.files[documents.name]
         try:
-            filename = documents.save(request.files[documents.name])
-            paper_name = os.path.splitext(filename)[0]
+            filename, upload = receive_upload(documents, storage)
         except UploadNotAllowed:
             return render_template(
                 "upload.html",
                 error=f"Wrong file extension. Please upload {args['extension']} files only",
                 admin=admin,
-                args=args)
-        full_path = documents.path(filename)
+                args=args,
+                quick_check=quick_check,
+                engine=engine)
         # set a default
         conference_id = False  # next(iter(conferences))
         conference_path = ''
         if 'conference_id' in request.form and request.form["conference_id"] in conferences:
             conference_id = request.form["conference_id"]
-            conference_path = get_conference_path(conference_id)
+            conference_path = get_conference_registry().get(conference_id)['csv_path']
+
+        if app.config['UPLOAD_JOBS']:
+            # check in the jobs worker and let the browser wait on the result page, the worker
+            # runs in another process so it is given the upload saved in the uploads directory
+            full_path = documents.path(documents.save(storage))
+            job_id = get_job_queue(app.config).enqueue({
+                'full_path': full_path,
+                'filename': filename,
+                'description': args['description'],
+                'conference_id': conference_id,
+                'conference_path': conference_path,
+                'engine': engine,
+                'quick_check': quick_check,
+                'version': get_build_info(app.config)['commit_sha'],
+                'app_user_id': current_user.id if current_user.is_authenticated else None,
+                'args': args,
+            })
+            return redirect(url_for('upload_result', job_id=job_id))
+
+        # imports the document parsers on the first upload, see warmup
+        from jacowvalidator.validation import validate_upload
+        # the upload is closed with the request
         try:
-            if args['description'] == 'Word':
-                doc = Document(full_path)
-                parse_type = 'docx'
-                metadata = doc.core_properties
-
-                # check whether tracking on
-                result = check_tracking_on(doc)
-
-                # get variables to pass to template
-                summary, authors, title = create_upload_variables(doc)
-
-                if conference_id:
-                    spms_summary, reference_csv_details = \
-                        create_spms_variables(paper_name, authors, title, conference_path, conference_id)
-                    if spms_summary:
-                        summary.update(spms_summary)
-            elif args['description'] == 'Latex':
-                doc = TexSoup(open(full_path, encoding="utf8"))
-                summary, authors, title = create_upload_variables_latex(doc)
-                metadata = []
-                if conference_id:
-                    spms_summary, reference_csv_details = \
-                        create_spms_variables(paper_name, authors, title, conference_path, conference_id)
-                    if spms_summary:
-                        summary.update(spms_summary)
-
-            save_log(filename, conference_id, 'OK', locals())
-
-            return render_template("upload.html", processed=True, **locals())
-        except (PackageNotFoundError, ValueError):
-            save_log(filename, conference_id, 'PackageNotFoundError', locals())
-            return render_template(
-                "upload.html",
-                filename=filename,
-                conferences=conferences,
-                error=f"Failed to open document {filename}. Is it a valid {args['description']} document?",
-                admin=admin,
-                args=args)
-        except TrackingOnError as err:
-            save_log(filename, conference_id, 'TrackingOnError', locals())
-            return render_template(
-                "upload.html",
-                filename=filename,
-                conferences=conferences,
-                error=err,
-                admin=admin,
-                args=args)
-        except OSError:
-            save_log(filename, conference_id, 'OSError', locals())
-            return render_template(
-                "upload.html",
-                filename=filename,
-                conferences=conferences,
-                error=f"It seems the file {filename} is corrupted",
-                admin=admin,
-                args=args)
-        except PaperNotFoundError:
-            save_log(filename, conference_id, 'PaperNotFoundError', locals())
-            return render_template(
-                "upload.html",
-                processed=True,
-                **locals(),
-                error=f"It seems the file {filename} has no corresponding entry in the SPMS ({conference_id}) references list. "
-                      f"Is your filename the same as your Paper name?")
-        except AbstractNotFoundError as err:
-            save_log(filename, conference_id, 'AbstractNotFoundError', locals())
-            return render_template(
-                "upload.html",
-                filename=filename,
-                conferences=conferences,
-                error=err,
-                admin=admin,
-                args=args)
+            status, report = validate_upload(
+                upload, filename, args['description'], conference_id, conference_path, engine, quick_check,
+                get_build_info(app.config)['commit_sha'])
         except Exception:
-            # TODO work out why there is an OK log followed by an Exception one.
-            save_log(filename, conference_id, 'Exception', locals())
-            if app.debug:
-                raise
-            else:
-                app.logger.exception("Failed to process document")
-                return render_template(
-                    "upload.html",
-                    error=f"Failed to process document: {filename}",
-                    conferences=conferences,
-                    args=args)
-        finally:
-            os.remove(full_path)
+            save_log(filename, conference_id, 'Exception', {})
+            raise
+
+        save_log(filename, conference_id, status, report)
+        return render_report(report, args, conferences, admin, quick_check, engine)
 
     return render_template("upload.html", admin=admin, args=args, conferences=conferences)
 
 
-def save_log(filename, conference_id, status, args):
-    upload_log = Log()
-    upload_log.filename = filename
-    if current_user.is_authenticated:
-        upload_log.app_user_id = current_user.id
-    if conference_id:
-        conference = Conference.query.filter_by(short_name=conference_id).first()
-        if conference:
-            upload_log.conference_id = conference.id
-    upload_log.status = status
-    upload_log.report = json.dumps(json_serialise(args))
-    db.session.add(upload_log)
-    db.session.commit()
+def get_engine(admin):
+    """The docx engine for an upload, admins can pick one per request to compare them"""
+    # the document parsers are imported on first use rather than when the app starts
+    from jacowvalidator.docutils.doc import DOCX_ENGINES
+    engine = request.values.get('engine')
+    if admin and engine in DOCX_ENGINES:
+        return engine
+    return app.config['DOCX_ENGINE']
+
+
+@app.route("/upload/result/<job_id>", methods=["GET"])
+def upload_result(job_id):
+    job = get_job_queue(app.config).get(job_id)
+    if job is None:
+        abort(404)
+
+    admin = 'DEV_DEBUG' in os.environ and os.environ['DEV_DEBUG'] == 'True'
+    conferences = get_conference_registry().active()
+    payload = job['payload']
+    args = payload['args']
+    if job['status'] == DONE:
+        return render_report(
+            job['result']['report'], args, conferences, admin, payload['quick_check'], payload['engine'])
+    elif job['status'] == FAILED:
+        return render_template(
+            "upload.html",
+            filename=payload['filename'],
+            error=f"Failed to process document: {payload['filename']}",
+            conferences=conferences,
+            admin=admin,
+            args=args,
+            quick_check=payload['quick_check'],
+            engine=payload['engine'])
+
+    return render_template(
+        "upload.html", filename=payload['filename'], pending=True, conferences=conferences, admin=admin,
+        args=args, quick_check=payload['quick_check'], engine=payload['engine'])
+
+
+def render_report(report, args, conferences, admin, quick_check=False, engine=None):
+    report = dict(report, metadata=load_metadata(report.get('metadata')))
+    return render_template(
+        "upload.html", **report, conferences=conferences, admin=admin, args=args, quick_check=quick_check,
+        engine=engine)
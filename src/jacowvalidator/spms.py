@@ -5,8 +5,9 @@ import os
 import json
 import csv
 import re
+import threading
+from jacowvalidator.cache import file_version
 from jacowvalidator.docutils.authors import get_author_list
-from jacowvalidator.models import Conference
 
 RE_MULTI_SPACE = re.compile(r' +')
 HELP_INFO = 'CSESPMSCeck'
@@ -41,112 +42,141 @@ class CSVFileNotFound(Exception):
     pass
 
 
-def get_conference_path(conference_id):
-    conference = Conference.query.filter_by(short_name=conference_id).first()
-    return os.path.join(os.environ['JACOW_REFERENCES_PATH'], conference.path)
+class ReferenceIndex:
+    """
+    The papers in a references csv file, keyed by paper id, with the title and
+    authors already normalised for comparing with a document.
+    version is the file version it was read from, see cache.file_version.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.version = file_version(path)
+        self.papers = {}
+
+        # the encoding value is one that should work for most documents.
+        # the encoding for a file can be detected with the command:
+        #    ` file -i FILE `
+        with open(path, encoding="ISO-8859-1") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            for heading in ['title', 'paper', 'authors']:
+                if heading not in header:
+                    raise ColumnNotFoundError(f"could not identify {heading} column in references csv")
+            title_col = header.index("title")
+            paper_col = header.index("paper")
+            authors_col = header.index("authors")
+            last_col = max(title_col, paper_col, authors_col)
+
+            for spms_row in reader:
+                # the first row for a paper is the one used
+                if len(spms_row) <= last_col or spms_row[paper_col] in self.papers:
+                    continue
+                authors = spms_row[authors_col]
+                author_list = get_author_list(authors)
+                self.papers[spms_row[paper_col]] = {
+                    'title': RE_MULTI_SPACE.sub(' ', spms_row[title_col].upper()),
+                    'authors': authors,
+                    'author_list': author_list,
+                    'author_compare': build_comparison_author_objects(author_list),
+                }
+
+    def get(self, paper):
+        return self.papers.get(paper)
+
+
+_reference_indexes = {}
+_reference_indexes_lock = threading.Lock()
+
+
+def get_reference_index(path):
+    """The ReferenceIndex for the csv at path, read again only when the file has changed"""
+    with _reference_indexes_lock:
+        index = _reference_indexes.get(path)
+        if index is None or index.version != file_version(path):
+            index = _reference_indexes[path] = ReferenceIndex(path)
+        return index
 
 
 # runs conformity checks against the references csv file and returns a dict of
 # results, eg: result = { title_match: True, authors_match: False }
 def reference_csv_check(filename_minus_ext, title, authors, conference_path):
-    result = {
-        'title_match': False, 'authors_match': False,
-    }
-
-    # the encoding value is one that should work for most documents.
-    # the encoding for a file can be detected with the command:
-    #    ` file -i FILE `
-    with open(conference_path, encoding="ISO-8859-1") as f:
-        reader = csv.reader(f)
-        reading_header_row = True
-        match_found = False
-        for spms_row in reader:
-            if reading_header_row:
-                reading_header_row = False
-                header = spms_row
-                title_col = header.index("title")
-                paper_col = header.index("paper")
-                authors_col = header.index("authors")
-                # confirm those headers existed as expected:
-                for heading in ['title_col', 'paper_col', 'authors_col']:
-                    # (if they didn't exist, the vars will be undefined)
-                    if heading not in locals():
-                        raise ColumnNotFoundError(f"could not identify {heading} column in references csv")
-            else:
-                if filename_minus_ext == spms_row[paper_col]:
-                    reference_title = RE_MULTI_SPACE.sub(' ', spms_row[title_col].upper())
-                    title_match = title.upper().strip('*') == reference_title
-                    report, authors_match = get_author_list_report(authors, spms_row[authors_col])
-
-                    # builds the data for display, match_ok determines the colour of the cell
-                    # True for green, False for red, 2 for amber.
-                    summary_list = [{
-                        'type': 'Author',
-                        'match_ok': 2 if result['match'] and not result['exact'] else result['match'],
-                        'document': result['document'],
-                        'spms': result['spms']} for result in report]
-
-                    return {
-                        'title': {
-                            'match': title_match,
-                            'document': title,
-                            'spms': reference_title
-                        },
-                        'author': {
-                            'match': authors_match,
-                            'document': authors,
-                            'spms': spms_row[authors_col],
-                            'document_list': get_author_list(authors),
-                            'spms_list': get_author_list(spms_row[authors_col]),
-                            'report': report
-                        },
-                        'summary': [{
-                            'type': 'Title',
-                            'match_ok': title_match,
-                            'document': title,
-                            'spms': reference_title
-                        }, {
-                            'type': 'Extracted Author List',
-                            'match_ok': authors_match,
-                            'document': authors,
-                            'spms': spms_row[authors_col],
-                        }, *summary_list],
-                    }
-
-        # if not returned by now its because the paper wasn't found in the list
-        if 'SPMS_DEBUG' in os.environ and os.environ['SPMS_DEBUG'] == 'True':
-            return {
-                'title': {
-                    'match': False,
-                    'document': title.upper(),
-                    'spms': 'No matching paper found in the spms csv file'
-                },
-                'author': {
-                    'match': False,
-                    'document': authors,
-                    'spms': 'No matching paper found in the spms csv file',
-                    'document_list': list(),
-                    'spms_list': list(),
-                    'report': list()
-                },
-                'summary': [{
-                    'type': 'title',
-                    'match': False,
-                    'document': title.upper(),
-                    'spms': 'No matching paper found in the spms csv file'
-                    }, {
-                    'type': 'author',
-                    'match': False,
-                    'document': authors,
-                    'spms': 'No matching paper found in the spms csv file',
-                }],
-
-            }
-        else:
-            raise PaperNotFoundError("No matching paper found in the spms csv file")
-
-
-def get_author_list_report(document_text, spms_text):
+    reference = get_reference_index(conference_path).get(filename_minus_ext)
+    if reference is not None:
+        reference_title = reference['title']
+        title_match = title.upper().strip('*') == reference_title
+        report, authors_match = get_author_list_report(authors, reference['authors'], reference['author_compare'])
+
+        # builds the data for display, match_ok determines the colour of the cell
+        # True for green, False for red, 2 for amber.
+        summary_list = [{
+            'type': 'Author',
+            'match_ok': 2 if result['match'] and not result['exact'] else result['match'],
+            'document': result['document'],
+            'spms': result['spms']} for result in report]
+
+        return {
+            'title': {
+                'match': title_match,
+                'document': title,
+                'spms': reference_title
+            },
+            'author': {
+                'match': authors_match,
+                'document': authors,
+                'spms': reference['authors'],
+                'document_list': get_author_list(authors),
+                'spms_list': list(reference['author_list']),
+                'report': report
+            },
+            'summary': [{
+                'type': 'Title',
+                'match_ok': title_match,
+                'document': title,
+                'spms': reference_title
+            }, {
+                'type': 'Extracted Author List',
+                'match_ok': authors_match,
+                'document': authors,
+                'spms': reference['authors'],
+            }, *summary_list],
+        }
+
+    # if not returned by now its because the paper wasn't found in the list
+    if 'SPMS_DEBUG' in os.environ and os.environ['SPMS_DEBUG'] == 'True':
+        return {
+            'title': {
+                'match': False,
+                'document': title.upper(),
+                'spms': 'No matching paper found in the spms csv file'
+            },
+            'author': {
+                'match': False,
+                'document': authors,
+                'spms': 'No matching paper found in the spms csv file',
+                'document_list': list(),
+                'spms_list': list(),
+                'report': list()
+            },
+            'summary': [{
+                'type': 'title',
+                'match': False,
+                'document': title.upper(),
+                'spms': 'No matching paper found in the spms csv file'
+                }, {
+                'type': 'author',
+                'match': False,
+                'document': authors,
+                'spms': 'No matching paper found in the spms csv file',
+            }],
+
+        }
+    else:
+        raise PaperNotFoundError("No matching paper found in the spms csv file")
+
+
+def get_author_list_report(document_text, spms_text, spms_compare=None):
     """Compares two lists of authors (one sourced from the uploaded document file
     and one sourced from the corresponding paper's entry in the SPMS references
     csv file) and produces a dict array report of the form:
@@ -172,10 +202,12 @@ def get_author_list_report(document_text, spms_text):
         ]
     """
     extracted_document_authors = get_author_list(document_text)
-    extracted_spms_authors = get_author_list(spms_text)
     # extracted_document_authors = ['Y. Z. Gómez Martínez', 'T. X. Therou', 'A. Tiller']
     document_list = build_comparison_author_objects(extracted_document_authors)
-    spms_list = build_comparison_author_objects(extracted_spms_authors)
+    # spms_compare is the spms list already built, eg by ReferenceIndex
+    if spms_compare is None:
+        spms_compare = build_comparison_author_objects(get_author_list(spms_text))
+    spms_list = list(spms_compare)
     # document_list = [
     # {
     #   original-value: 'Y. Z. Gómez Martínez',
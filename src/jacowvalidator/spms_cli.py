@@ -1,57 +1,36 @@
+import json
+import sys
+import time
+
 import click
-from docx import Document
-from docx.opc.exceptions import PackageNotFoundError
-from TexSoup import TexSoup
 from jacowvalidator import app
-from jacowvalidator.docutils.page import (check_tracking_on, TrackingOnError)
-from jacowvalidator.docutils.doc import create_upload_variables, create_spms_variables, create_upload_variables_latex, \
-    AbstractNotFoundError
-from .spms import PaperNotFoundError
-
-
-@app.cli.command("upload")
-def upload():
-    print('hello')
 
 
-@app.cli.command("upload_from_spms")
-@click.argument("paper_name")
-@click.argument("parse_type")
-def upload_from_spms(paper_name, parse_type):
-    base_path = 'C:\\\\Users\Hawke\\\\PycharmProjects\\\\jacow_files\\\\IPAC19 Test Files\\\\'
-    try:
-        spms_summary = ''
-        full_path = base_path+paper_name+'.'+parse_type
-        conference_path = 'C:\\\\Users\\\\Hawke\\\\PycharmProjects\\\\References_ipac19.csv'
-        if parse_type == 'docx':
-            doc = Document(full_path)
-            # check whether tracking on (will  raise an error if it is)
-            check_tracking_on(doc)
-            # get variables
-            summary, authors, title = create_upload_variables(doc)
-            spms_summary, reference_csv_details = create_spms_variables(paper_name, authors, title, conference_path)
-        elif parse_type == 'tex':
-            doc = TexSoup(open(full_path, encoding="utf8"))
-            summary, authors, title = create_upload_variables_latex(doc)
-            spms_summary, reference_csv_details = create_spms_variables(paper_name, authors, title, conference_path)
-        print(spms_summary)
-        return spms_summary
+@app.cli.command("validate")
+@click.argument("paths", nargs=-1, required=True)
+@click.option("--csv", "conference_csv", type=click.Path(exists=True, dir_okay=False),
+              help="Conference references csv to check the papers against")
+@click.option("--jobs", default=1, help="Number of processes, 0 for one per cpu")
+@click.option("--engine", default=None, help="docx engine, 'docx' or 'xml', defaults to DOCX_ENGINE")
+@click.option("--quick", is_flag=True, help="Only check the title and authors against the references csv")
+def validate(paths, conference_csv, jobs, engine, quick):
+    """
+    Check every docx and tex paper in PATHS, each a file, a directory or a glob.
 
-    except (PackageNotFoundError, ValueError):
-        message = f"Failed to open document. Is it a valid {parse_type} document?"
-    except TrackingOnError as err:
-        message = err
-    except OSError:
-        message = f"It seems the file {paper_name} is corrupted"
-    except PaperNotFoundError:
-        message = f"It seems the file {paper_name} has no corresponding entry in the SPMS ({conference_path}) " \
-            f"references list. Is your filename the same as your Paper name?"
-    except AbstractNotFoundError as err:
-        message = err
-    except Exception:
-        app.logger.exception("Failed to process document")
-        message = f"Failed to process document: {paper_name}"
+    Writes a json line for each paper as it is done, and exits with 1 if any paper failed.
+    """
+    from jacowvalidator.batch import find_papers, validate_papers
+    papers = find_papers(paths)
+    if not papers:
+        raise click.UsageError(f"No .docx or .tex papers found in {' '.join(paths)}")
 
-    print(message)
-    return message
+    start = time.perf_counter()
+    failed = 0
+    for record in validate_papers(papers, conference_csv, engine or app.config['DOCX_ENGINE'], quick, jobs):
+        if not record['ok']:
+            failed = failed + 1
+        click.echo(json.dumps(record))
 
+    click.echo(f"{len(papers)} papers, {failed} failed, in {time.perf_counter() - start:.1f}s", err=True)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,70 @@
+"""Uploads checked straight from the request, without saving them in the uploads directory first.
+
+werkzeug writes the file in a multipart upload into an UploadFile as it reads the request. The
+UploadFile hashes it on the way in and keeps it in memory up to UPLOAD_SPOOL_SIZE bytes, then in
+an unnamed temporary file in UPLOAD_SPOOL_DIR, so the checks are given the file object itself and
+nothing is left behind when the request ends, however it ends. Requests bigger than
+MAX_CONTENT_LENGTH are refused by werkzeug with RequestEntityTooLarge.
+"""
+import hashlib
+import shutil
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, current_app
+from flask_uploads import UploadNotAllowed
+
+
+class UploadFile(SpooledTemporaryFile):
+    """Spooled temporary file with the sha256 and size of everything written to it"""
+    def __init__(self, spool_size, directory=None):
+        super().__init__(max_size=spool_size, mode='w+b', dir=directory)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return super().write(data)
+
+    def digest(self):
+        return self.sha256.hexdigest()
+
+    # SpooledTemporaryFile only has these from python 3.11, zipfile and io.TextIOWrapper need them
+    def readable(self):
+        return self._file.readable()
+
+    def seekable(self):
+        return self._file.seekable()
+
+    def writable(self):
+        return self._file.writable()
+
+
+def make_upload_file(config):
+    return UploadFile(config['UPLOAD_SPOOL_SIZE'], config['UPLOAD_SPOOL_DIR'] or None)
+
+
+class UploadRequest(Request):
+    """Request that receives uploaded files into an UploadFile"""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return make_upload_file(current_app.config)
+
+
+def receive_upload(upload_set, storage):
+    """
+    The name and UploadFile of an uploaded file, from request.files, ready to be read from the start.
+    Raises UploadNotAllowed when the upload set does not allow its extension, as UploadSet.save does.
+    """
+    filename = upload_set.get_basename(storage.filename or '')
+    if not filename or not upload_set.file_allowed(storage, filename):
+        raise UploadNotAllowed()
+
+    upload = storage.stream
+    if not isinstance(upload, UploadFile):
+        # files werkzeug did not read from a multipart request, eg made in a test
+        upload = make_upload_file(current_app.config)
+        shutil.copyfileobj(storage.stream, upload)
+        # closed with the request files like the others
+        storage.stream = upload
+    upload.seek(0)
+    return filename, upload
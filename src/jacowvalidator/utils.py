@@ -9,22 +9,35 @@ def is_jsonable(x):
         return False
 
 
-def json_serialise(x):
-    json_data = {}
-    for i, data in x.items():
-        # just log summary
-        if i not in ['summary', 'authors', 'title']:
-            continue
-
-        if isinstance(data, dict):
-            json_data[i] = {}
-
-            for j, d in data.items():
-                json_data[i][j] = json.dumps(d)
-        else:
-            json_data[i] = json.dumps(data)
-
-    return json_data
+# parts of a report kept in the upload Log
+LOG_FIELDS = ['summary', 'authors', 'title', 'from_cache', 'stats', 'timing']
+
+
+def log_report(report):
+    """The parts of a report kept in the upload Log, as they are in the report"""
+    return {field: report[field] for field in LOG_FIELDS if field in report}
+
+
+def report_sections(report):
+    """The ok flag of each section of a report"""
+    summary = report.get('summary') or {}
+    return {name: section.get('ok') if isinstance(section, dict) else None for name, section in summary.items()}
+
+
+def report_timing(report):
+    """The timing of the whole check with the timing of each section, None when the report has no timing"""
+    if not report.get('timing'):
+        return None
+    summary = report.get('summary') or {}
+    sections = {
+        name: section['timing'] for name, section in summary.items() if isinstance(section, dict) and section.get('timing')
+    }
+    return dict(report['timing'], sections=sections)
+
+
+def sections_ok(status, sections):
+    """True when the check finished and no section failed, a section with a question mark has not failed"""
+    return status == 'OK' and all(ok is not False for ok in sections.values())
 
 
 '''
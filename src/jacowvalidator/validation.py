@@ -0,0 +1,153 @@
+"""Checks an uploaded file and builds the report shown on the upload page.
+
+The upload page calls validate_upload while handling the request, the jobs worker calls it
+through run_upload_job, so a report is the same wherever it was made.
+"""
+import io
+import os
+import time
+
+from docx.opc.exceptions import PackageNotFoundError
+from TexSoup import TexSoup
+
+from jacowvalidator import app
+from jacowvalidator.cache import get_result_cache, make_cache_key, file_digest, file_version, dump_metadata, \
+    open_binary
+from jacowvalidator.docutils.doc import create_upload_variables, create_spms_variables, create_upload_variables_latex, \
+    AbstractNotFoundError, QUICK_CHECKS, open_document, get_timing
+from jacowvalidator.docutils.page import TrackingOnError
+from jacowvalidator.docutils.preflight import preflight_docx
+from jacowvalidator.docutils.stats import get_document_stats
+from jacowvalidator.docutils.walker import get_document_index
+from jacowvalidator.logwriter import save_log
+from jacowvalidator.spms import PaperNotFoundError
+
+# parts of the report that are kept in the result cache
+CACHED_FIELDS = ['summary', 'authors', 'title', 'reference_csv_details', 'metadata', 'stats']
+
+
+def validate_upload(source, filename, description, conference_id=False, conference_path='', engine=None,
+                    quick_check=False, version=None):
+    """
+    Check source, the path of the file or a binary file object such as an UploadFile, and return (status, report).
+
+    status is 'OK' or the name of the error that stopped the check, as saved in the upload Log.
+    report holds json friendly values for upload.html, with an error message when the check failed,
+    the document stats and the timing of the whole check.
+    Unexpected exceptions are only raised when the app is in debug mode.
+    """
+    start, cpu_start = time.perf_counter(), time.process_time()
+    status, report = _validate_upload(
+        source, filename, description, conference_id, conference_path, engine, quick_check, version)
+    report['timing'] = get_timing(start, cpu_start)
+    return status, report
+
+
+def _read_text(source):
+    with open_binary(source) as f:
+        # same newline handling as a file opened in text mode
+        text = io.TextIOWrapper(f, encoding="utf8")
+        try:
+            return text.read()
+        finally:
+            text.detach()
+
+
+def _validate_upload(source, filename, description, conference_id, conference_path, engine, quick_check,
+                     version):
+    paper_name = os.path.splitext(filename)[0]
+    engine = engine or app.config['DOCX_ENGINE']
+    report = {'filename': filename, 'conference_id': conference_id}
+    try:
+        # identical uploads for the same conference, paper and engine get the same report
+        result_cache = get_result_cache(app.config)
+        cache_key = make_cache_key(
+            file_digest(source), version, description, engine, conference_id,
+            paper_name if conference_id else '', file_version(conference_path), quick_check)
+        cached_result = result_cache.get(cache_key)
+        if cached_result is not None:
+            report.update(cached_result, processed=True, from_cache=True)
+            return 'OK', report
+
+        if description == 'Word':
+            # refuse broken documents and tracked changes before parsing the whole document, a missing
+            # abstract is found by the checks before any of them run, so the document is only parsed once
+            preflight = preflight_docx(source, check_abstract=False)
+            # and the main document part only decompressed once
+            doc = open_document(source, engine, preflight['parts'])
+            report['metadata'] = dump_metadata(doc.core_properties)
+            # walk the document once and share it between all the checks
+            doc_index = get_document_index(doc)
+
+            # editors quick check only runs the SPMS check and the Title and Authors checks it requires
+            summary, authors, title = create_upload_variables(
+                doc_index, QUICK_CHECKS if quick_check else None, paper_name,
+                conference_path if conference_id else None, conference_id)
+        else:
+            doc = TexSoup(_read_text(source))
+            summary, authors, title = create_upload_variables_latex(doc)
+            report['metadata'] = None
+        report.update(summary=summary, authors=authors, title=title, reference_csv_details=False, stats=None)
+
+        if 'SPMS' in summary:
+            report['reference_csv_details'] = summary['SPMS'].pop('reference_csv_details')
+        elif conference_id and description == 'Latex':
+            # the latex checks are not in the registry, so SPMS is added here
+            spms_summary, reference_csv_details = \
+                create_spms_variables(paper_name, authors, title, conference_path, conference_id)
+            if spms_summary:
+                summary.update(spms_summary)
+            report['reference_csv_details'] = reference_csv_details
+        if description == 'Word':
+            report['stats'] = get_document_stats(doc_index, source, summary)
+
+        result_cache.set(cache_key, {field: report[field] for field in CACHED_FIELDS})
+        report['processed'] = True
+        return 'OK', report
+    except (PackageNotFoundError, ValueError):
+        report['error'] = f"Failed to open document {filename}. Is it a valid {description} document?"
+        return 'PackageNotFoundError', report
+    except TrackingOnError as err:
+        report['error'] = str(err)
+        return 'TrackingOnError', report
+    except OSError:
+        report['error'] = f"It seems the file {filename} is corrupted"
+        return 'OSError', report
+    except PaperNotFoundError:
+        report['processed'] = True
+        report['error'] = f"It seems the file {filename} has no corresponding entry in the SPMS ({conference_id}) " \
+                          f"references list. Is your filename the same as your Paper name?"
+        return 'PaperNotFoundError', report
+    except AbstractNotFoundError as err:
+        report['error'] = str(err)
+        return 'AbstractNotFoundError', report
+    except Exception:
+        if app.debug:
+            raise
+        app.logger.exception("Failed to process document")
+        report['error'] = f"Failed to process document: {filename}"
+        return 'Exception', report
+
+
+def run_upload_job(payload):
+    """Validate an upload queued by the upload page, see jacowvalidator.jobs"""
+    conference_id = payload['conference_id']
+    try:
+        status, report = validate_upload(
+            payload['full_path'], payload['filename'], payload['description'], conference_id,
+            payload['conference_path'], payload['engine'], payload['quick_check'], payload['version'])
+    except Exception:
+        save_log(payload['filename'], conference_id, 'Exception', {}, payload['app_user_id'], background=False)
+        raise
+
+    # the worker is not waiting on anyone, and its processes can exit before a queue is written
+    save_log(payload['filename'], conference_id, status, report, payload['app_user_id'], background=False)
+    return {'status': status, 'report': report}
+
+
+def discard_upload_job(payload):
+    """Remove the file of a finished upload job, it may already be gone if the job was run before"""
+    try:
+        os.remove(payload['full_path'])
+    except FileNotFoundError:
+        pass
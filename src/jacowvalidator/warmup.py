@@ -0,0 +1,58 @@
+"""Warmup of a process before it serves requests, see gunicorn.conf.py.
+
+The document parsers and the checks are imported, which compiles the style rules, the templates
+are loaded and the SPMS reference index of each conference is built. Run in the gunicorn master
+before the workers are forked, they all share what it loaded, copy on write, instead of each
+worker loading it on its first upload. The ready endpoint reports ready once it has finished.
+"""
+import os
+import time
+
+from jacowvalidator import app
+
+_warmup = {'ready': False}
+
+
+def warmup():
+    """Load what the first upload would, and return the time each part took"""
+    timings = {}
+    errors = []
+
+    start = time.perf_counter()
+    # imports python-docx, TexSoup and every check, the style rules are compiled as they are imported
+    import jacowvalidator.validation
+    timings['imports'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    timings['templates'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from jacowvalidator.conferences import get_conference_registry
+    from jacowvalidator.spms import get_reference_index
+    with app.app_context():
+        try:
+            conferences = list(get_conference_registry().all().values())
+        except Exception as err:
+            # the database may not be up yet, the indexes are then built on first use
+            app.logger.warning("Warmup could not read the conferences: %s", err)
+            errors.append(f"conferences: {str(err).splitlines()[0]}")
+            conferences = []
+    for conference in conferences:
+        if not os.path.exists(conference['csv_path']):
+            continue
+        try:
+            get_reference_index(conference['csv_path'])
+        except Exception as err:
+            app.logger.warning("Warmup could not read %s: %s", conference['csv_path'], err)
+            errors.append(f"{conference['short_name']}: {err}")
+    timings['spms'] = time.perf_counter() - start
+
+    _warmup.update(ready=True, timings=timings, errors=errors)
+    return timings
+
+
+def warmup_status():
+    """Whether warmup has finished in this process, with its timings and any errors"""
+    return dict(_warmup)
@@ -0,0 +1,61 @@
+import json
+import shutil
+from pathlib import Path
+
+from jacowvalidator.batch import find_papers, validate_paper, validate_papers
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def make_papers(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    shutil.copy(test_dir / 'test2.docx', tmp_path / 'test2.docx')
+    shutil.copy(test_dir / 'test2.docx', tmp_path / 'sub' / 'copy.docx')
+    (tmp_path / 'bad.docx').write_bytes(b'not a docx')
+    (tmp_path / 'notes.txt').write_text('not a paper')
+
+
+def test_find_papers(tmp_path):
+    make_papers(tmp_path)
+
+    assert [Path(p).name for p in find_papers([str(tmp_path)])] == ['bad.docx', 'copy.docx', 'test2.docx']
+    assert [Path(p).name for p in find_papers([str(tmp_path / '*.docx'), str(tmp_path / 'test2.docx')])] == \
+        ['bad.docx', 'test2.docx']
+
+
+def test_validate_paper(tmp_path):
+    make_papers(tmp_path)
+
+    record = validate_paper(str(tmp_path / 'test2.docx'), quick_check=True)
+    assert record['paper'] == 'test2'
+    assert record['status'] == 'OK'
+    assert record['sections'] == {'Title': True, 'Authors': True}
+    assert record['ok'] is True
+    assert set(record['timings']) == {'preflight', 'parse', 'checks', 'total'}
+
+    record = validate_paper(str(tmp_path / 'bad.docx'))
+    assert record['status'] == 'PackageNotFoundError'
+    assert record['ok'] is False
+
+
+def test_validate_papers_in_processes(tmp_path):
+    make_papers(tmp_path)
+    papers = find_papers([str(tmp_path)])
+
+    records = list(validate_papers(papers, jobs=2))
+    assert sorted(record['path'] for record in records) == papers
+    assert records == [json.loads(json.dumps(record)) for record in records]
+
+
+def test_validate_command(tmp_path):
+    from jacowvalidator import app
+    make_papers(tmp_path)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['validate', str(tmp_path / 'test2.docx'), '--quick'])
+    assert result.exit_code == 0
+    assert [json.loads(line)['paper'] for line in result.output.splitlines() if line.startswith('{')] == ['test2']
+
+    result = runner.invoke(args=['validate', str(tmp_path), '--jobs', '2'])
+    assert result.exit_code == 1
+    assert len([line for line in result.output.splitlines() if line.startswith('{')]) == 3
@@ -0,0 +1,81 @@
+import os
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from jacowvalidator import validation
+from jacowvalidator.cache import ResultCache, make_cache_key, file_digest, dump_metadata, load_metadata
+
+
+def test_cache_key(tmp_path):
+    path = tmp_path / 'paper.docx'
+    path.write_bytes(b'some bytes')
+    digest = file_digest(path)
+
+    assert make_cache_key(digest, 'Word', 'IPAC21') == make_cache_key(file_digest(path), 'Word', 'IPAC21')
+    assert make_cache_key(digest, 'Word', 'IPAC21') != make_cache_key(digest, 'Word', 'IPAC22')
+    path.write_bytes(b'other bytes')
+    assert file_digest(path) != digest
+
+
+def test_memory_lru():
+    cache = ResultCache(max_entries=2)
+    cache.set('a', {'summary': 1})
+    cache.set('b', {'summary': 2})
+    assert cache.get('a') == {'summary': 1}
+    cache.set('c', {'summary': 3})
+
+    assert cache.get('b') is None, "least recently used entry should be dropped"
+    assert cache.get('a') == {'summary': 1}
+    assert cache.get('c') == {'summary': 3}
+
+
+def test_result_is_a_copy():
+    cache = ResultCache()
+    cache.set('a', {'summary': {'Title': 'ok'}})
+    cache.get('a')['summary']['Title'] = 'changed'
+    assert cache.get('a') == {'summary': {'Title': 'ok'}}
+
+
+def test_directory_shared_and_trimmed(tmp_path):
+    cache = ResultCache(max_entries=0, directory=tmp_path, max_bytes=100)
+    other = ResultCache(max_entries=0, directory=tmp_path, max_bytes=100)
+    cache.set('a', {'summary': 'x' * 40})
+    assert other.get('a') == {'summary': 'x' * 40}, "results should be shared through the directory"
+
+    os.utime(tmp_path / 'a.json', (1, 1))
+    cache.set('b', {'summary': 'y' * 40})
+    cache.set('c', {'summary': 'z' * 40})
+
+    assert other.get('a') is None, "oldest entry should be removed when over the size"
+    assert other.get('c') == {'summary': 'z' * 40}
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 100
+
+
+def test_unserialisable_result_skipped():
+    cache = ResultCache()
+    assert cache.set('a', {'summary': object()}) is False
+    assert cache.get('a') is None
+
+
+def test_metadata_round_trip():
+    created = datetime(2021, 5, 1, 10, 30)
+    metadata = SimpleNamespace(author='A. Author', revision=3, created=created, modified=created, version='', language='en')
+    loaded = load_metadata(dump_metadata(metadata))
+    assert loaded.created == created
+    assert loaded.author == 'A. Author'
+    assert load_metadata(dump_metadata([])) == []
+
+
+def test_validate_upload_cached_by_engine(monkeypatch):
+    cache = ResultCache(max_entries=8)
+    monkeypatch.setattr(validation, 'get_result_cache', lambda config: cache)
+    path = Path(__file__).parent / 'data' / 'test2.docx'
+
+    for engine in ['docx', 'xml']:
+        status, report = validation.validate_upload(path, path.name, 'Word', engine=engine)
+        assert status == 'OK'
+        assert not report.get('from_cache')
+        status, report = validation.validate_upload(path, path.name, 'Word', engine=engine)
+        assert status == 'OK'
+        assert report['from_cache']
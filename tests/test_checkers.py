@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from jacowvalidator.docutils.doc import CHECKERS, get_checker_names, run_checkers, create_upload_variables, \
+    AbstractNotFoundError, QUICK_CHECKS
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def test_checker_names():
+    assert get_checker_names(QUICK_CHECKS) == ['Title', 'Authors', 'SPMS'], "SPMS needs the title and authors"
+    assert get_checker_names(['Tables', 'Styles']) == ['Styles', 'Tables'], "checks run in report order"
+    assert get_checker_names() == list(CHECKERS)
+    with pytest.raises(ValueError):
+        get_checker_names(['Unknown'])
+
+
+def test_run_subset():
+    from docx import Document
+    doc = Document(test_dir / 'test2.docx')
+    full, authors, title = create_upload_variables(doc)
+    quick = run_checkers(doc, QUICK_CHECKS)
+
+    assert list(quick) == ['Title', 'Authors'], "SPMS is left out without a conference"
+    for name in ['Title', 'Authors']:
+        quick_timing, full_timing = quick[name].pop('timing'), full[name].pop('timing')
+        assert quick_timing and full_timing
+        assert quick[name] == full[name]
+
+
+def test_timing():
+    from docx import Document
+    summary, _, _ = create_upload_variables(Document(test_dir / 'test2.docx'))
+
+    for section in summary.values():
+        assert set(section['timing']) == {'wall', 'cpu'}
+        assert section['timing']['wall'] >= 0
+
+
+def test_missing_abstract():
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph('A TITLE', style='Title')
+
+    with pytest.raises(AbstractNotFoundError):
+        run_checkers(doc, ['Styles', 'Title'])
+    assert 'Styles' in run_checkers(doc, ['Styles']), "checks not needing the abstract still run"
+
+
+def test_quick_check_spms(tmp_path):
+    from docx import Document
+    path = tmp_path / 'references.csv'
+    path.write_text('"paper","authors","title","position","contribution ID"\n"test2","A. Author","A Title",,1\n',
+                    encoding='ISO-8859-1')
+
+    summary, authors, title = create_upload_variables(
+        Document(test_dir / 'test2.docx'), QUICK_CHECKS, 'test2', str(path), 'IPAC21')
+    assert list(summary) == ['Title', 'Authors', 'SPMS']
+    assert summary['SPMS']['conference'] == 'IPAC21'
+    assert summary['SPMS']['reference_csv_details']['title']['spms'] == 'A TITLE'
+    assert set(summary['SPMS']['timing']) == {'wall', 'cpu'}
@@ -0,0 +1,44 @@
+from jacowvalidator.docutils.figures import extract_figures, get_figure_ids, MAX_SKIPPED_FIGURES
+
+
+def make_document(body, cell_text=None):
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph('Abstract')
+    for text in body:
+        doc.add_paragraph(text)
+    if cell_text:
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 1).text = cell_text
+    return doc
+
+
+def test_figure_ids():
+    assert get_figure_ids({1: [], 2: []}, {}, {4: []}) == [1, 2, 3, 4]
+    assert get_figure_ids({}, {}, {}) == []
+    assert get_figure_ids({1: []}, {}, {MAX_SKIPPED_FIGURES + 3: []}) == [1, MAX_SKIPPED_FIGURES + 3], \
+        "a long run of missing numbers is not reported"
+
+
+def test_stray_figure_number():
+    doc = make_document([
+        'As in Figure 1 and Fig. 2019 the beam was stable.',
+        'Figure 1: The beam.',
+        'Figure 3: The magnet.',
+    ])
+    figures = extract_figures(doc)
+
+    assert list(figures) == [1, 2, 3, 2019]
+    assert figures[1][0]['used_ok'] and figures[1][0]['found_ok']
+    assert not figures[2][0]['found_ok'], "skipped figure number"
+    assert not figures[3][0]['used_ok']
+    assert figures[2019][0]['refs'] == ['Fig. 2019'] and not figures[2019][0]['found_ok']
+
+
+def test_caption_in_table():
+    doc = make_document(['The layout is in Figure 1 below.'], cell_text='Figure 1: The layout.')
+    figures = extract_figures(doc)
+
+    assert list(figures) == [1]
+    assert figures[1][0]['found_ok'] and figures[1][0]['used_ok']
+    assert figures[1][0]['text'] == 'Figure 1: The layout.'
@@ -0,0 +1,59 @@
+from io import BytesIO
+
+import pytest
+
+from jacowvalidator.docutils.doc import AbstractNotFoundError, create_upload_variables
+from jacowvalidator.docutils.generate import generate_paper
+from jacowvalidator.docutils.page import TrackingOnError, check_tracking_on
+from jacowvalidator.docutils.walker import get_document_index
+
+
+def reopen(doc):
+    from docx import Document
+    f = BytesIO()
+    doc.save(f)
+    return Document(f)
+
+
+def check(**options):
+    summary, _, _ = create_upload_variables(reopen(generate_paper(**options)))
+    return {name: section['ok'] for name, section in summary.items()}
+
+
+def test_generated_paper_passes():
+    assert all(ok is True for ok in check().values())
+    assert all(ok is True for ok in check(
+        seed=2, sections=8, references=25, figures=6, tables=4, nested_tables=2).values())
+
+
+def test_same_seed_same_paper():
+    first = generate_paper(seed=3).element.body.xml
+    assert generate_paper(seed=3).element.body.xml == first
+    assert generate_paper(seed=4).element.body.xml != first
+
+
+@pytest.mark.parametrize('broken, section', [
+    ('margins', 'Margins'),
+    ('styles', 'Styles'),
+    ('language', 'Languages'),
+    ('unused_figure', 'Figures'),
+    ('table_caption', 'Tables'),
+    ('reference_order', 'References'),
+    ('unused_reference', 'References'),
+])
+def test_broken_paper_fails(broken, section):
+    sections = check(broken=[broken])
+    assert sections[section] is False
+
+
+def test_broken_paper_refused():
+    doc = reopen(generate_paper(broken=['tracking']))
+    with pytest.raises(TrackingOnError):
+        check_tracking_on(get_document_index(doc))
+
+    with pytest.raises(AbstractNotFoundError):
+        check(broken=['no_abstract'])
+
+    with pytest.raises(ValueError):
+        generate_paper(broken=['upside_down'])
+
@@ -0,0 +1,90 @@
+import time
+
+from jacowvalidator.jobs import JobQueue, run_worker, QUEUED, RUNNING, DONE, FAILED
+from jacowvalidator.validation import discard_upload_job
+
+
+def test_enqueue_and_claim(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'))
+    first = queue.enqueue({'filename': 'first.docx'})
+    second = queue.enqueue({'filename': 'second.docx'})
+
+    assert queue.get(first)['status'] == QUEUED
+    job = queue.claim()
+    assert job['id'] == first
+    assert job['status'] == RUNNING
+    assert job['payload'] == {'filename': 'first.docx'}
+    other = queue.claim()
+    assert other['id'] == second
+    assert queue.claim() is None
+
+    assert queue.complete(job, {'status': 'OK'})
+    assert queue.fail(other, ValueError('bad file'))
+    assert queue.get(first)['result'] == {'status': 'OK'}
+    assert queue.get(second)['status'] == FAILED
+    assert queue.get(second)['error'] == 'bad file'
+    assert queue.get('missing') is None
+
+
+def test_shared_between_queues(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'))
+    other = JobQueue(str(tmp_path / 'jobs.sqlite'))
+    job_id = queue.enqueue({})
+
+    assert other.claim()['id'] == job_id
+    assert queue.claim() is None
+
+
+def test_stale_job_claimed_again(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'), timeout=0, max_attempts=2)
+    job_id = queue.enqueue({})
+    stale = queue.claim()
+    assert stale['id'] == job_id
+    time.sleep(0.01)
+
+    job = queue.claim()
+    assert job['id'] == job_id
+    assert job['attempts'] == 2
+    assert queue.claim() is None, "job should not be retried after max_attempts"
+
+    assert not queue.complete(stale, {'status': 'stale'}), "a slow attempt should not finish a job taken over"
+    assert queue.complete(job, {'status': 'OK'})
+    assert not queue.fail(stale, ValueError('stale')), "nor overwrite the result of the later attempt"
+    assert queue.get(job_id)['result'] == {'status': 'OK'}
+
+
+def test_exhausted_job_failed_and_discarded(tmp_path):
+    upload = tmp_path / 'paper.docx'
+    upload.write_bytes(b'some bytes')
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'), timeout=0, max_attempts=1)
+    job_id = queue.enqueue({'full_path': str(upload)})
+    assert queue.claim()['id'] == job_id
+    time.sleep(0.01)
+
+    assert run_worker(queue, lambda payload: {}, max_jobs=1, discard=discard_upload_job) == 0
+    job = queue.get(job_id)
+    assert job['status'] == FAILED
+    assert job['error'] == 'Timed out after 1 attempts'
+    assert not upload.exists()
+    assert queue.expire() == []
+
+    # the file of a job may already be gone
+    discard_upload_job({'full_path': str(upload)})
+
+
+def test_run_worker(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'))
+    ok = queue.enqueue({'value': 2})
+    bad = queue.enqueue({'value': 0})
+
+    discarded = []
+    assert run_worker(queue, lambda payload: {'result': 4 // payload['value']}, max_jobs=5,
+                      discard=discarded.append) == 2
+    assert discarded == [{'value': 2}, {'value': 0}], "files are removed once their job is done or failed"
+    assert queue.get(ok)['status'] == DONE
+    assert queue.get(ok)['result'] == {'result': 2}
+    assert queue.get(bad)['status'] == FAILED
+    assert queue.counts() == {DONE: 1, FAILED: 1}
+
+    queue.purge(0)
+    assert queue.get(ok) is None
@@ -21,3 +21,43 @@ def test_language2():
     expected = ['en-US', 'en-GB', 'ko-KR', 'fr-FR', 'de-CH']
     languages = get_language_tags(doc)
     assert expected == languages, f"languages {languages} do not match expected {expected}"
+
+
+def test_language_locations(tmp_path):
+    from docx import Document
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from jacowvalidator.docutils.doc import open_document
+    from jacowvalidator.docutils.languages import get_language_summary, get_language_tags_location
+
+    def set_language(paragraph, language):
+        for run in paragraph.runs:
+            lang = OxmlElement('w:lang')
+            lang.set(qn('w:val'), language)
+            run._r.get_or_add_rPr().append(lang)
+
+    doc = Document()
+    doc.core_properties.language = 'en-GB'
+    set_language(doc.add_paragraph('Same text'), 'en-US')
+    set_language(doc.add_paragraph('Same text'), 'it-IT')
+    cell_paragraph = doc.add_table(rows=1, cols=1).cell(0, 0).paragraphs[0]
+    cell_paragraph.add_run('In a cell')
+    set_language(cell_paragraph, 'de-CH')
+    header_paragraph = doc.sections[0].header.paragraphs[0]
+    header_paragraph.add_run('In the header')
+    set_language(header_paragraph, 'fr-FR')
+    doc.save(tmp_path / 'languages.docx')
+
+    for engine in ['docx', 'xml']:
+        languages = get_language_tags_location(open_document(tmp_path / 'languages.docx', engine))
+        assert languages['tags'] == ['en-GB', 'en-US', 'it-IT', 'de-CH', 'fr-FR']
+        assert [(span['part'], span['paragraph'], span['text']) for span in languages['spans'][1:]] == [
+            ('word/document.xml', 0, 'Same text'),
+            ('word/document.xml', 1, 'Same text'),
+            ('word/document.xml', 2, 'In a cell'),
+            ('word/header1.xml', 0, 'In the header'),
+        ]
+
+    summary = get_language_summary(Document(tmp_path / 'languages.docx'))
+    assert summary['ok'] is False
+    assert summary['details'] == ['en-GB', 'en-US', 'it-IT', 'de-CH', 'fr-FR']
@@ -0,0 +1,53 @@
+import threading
+
+from jacowvalidator.logwriter import LogWriter
+
+
+def test_batches():
+    batches = []
+    writer = LogWriter(batches.append, max_size=100, batch_size=3, interval=0.05)
+    for i in range(7):
+        assert writer.put(i)
+    writer.flush()
+
+    assert [record for batch in batches for record in batch] == list(range(7))
+    assert all(len(batch) <= 3 for batch in batches)
+    metrics = writer.metrics()
+    assert metrics['queued'] == metrics['written'] == 7
+    assert metrics['batches'] == len(batches)
+    assert metrics['pending'] == 0
+    writer.close()
+
+
+def test_full_queue_drops():
+    started, release = threading.Event(), threading.Event()
+
+    def write(batch):
+        started.set()
+        release.wait()
+
+    writer = LogWriter(write, max_size=2, batch_size=1, interval=0)
+    writer.put('first')
+    started.wait()
+    # the writer is busy with the first record, so the queue fills up
+    assert writer.put('second') and writer.put('third')
+    assert not writer.put('fourth')
+    release.set()
+    writer.flush()
+
+    assert writer.metrics()['dropped'] == 1
+    assert writer.metrics()['written'] == 3
+    writer.close()
+
+
+def test_failed_write():
+    def write(batch):
+        raise RuntimeError('database is down')
+
+    writer = LogWriter(write, batch_size=10, interval=0)
+    writer.put('record')
+    writer.flush()
+    assert writer.metrics()['failed'] == 1
+    assert writer.metrics()['written'] == 0
+
+    writer.close()
@@ -0,0 +1,21 @@
+from jacowvalidator.docutils.mentions import get_mention_index, CITATION, FIGURE, TABLE
+from jacowvalidator.docutils.walker import get_document_index
+
+
+def test_mentions():
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph('Abstract')
+    doc.add_paragraph('As in Fig. 1 and Table\xa02 [1, 3-4].')
+    doc.add_paragraph('Figure 1. A caption with a full stop')
+    doc.add_paragraph('Figure 1 shows Tables 1 and 2, and Table1 is not a table.')
+    index = get_document_index(doc)
+    mentions = get_mention_index(index)
+
+    assert get_mention_index(index) is mentions, "built once for each document"
+    assert [m.form for m in mentions.mentions[CITATION]] == ['1, 3-4']
+    assert [m.form for m in mentions.get(FIGURE, 1)] == ['Fig. 1', 'Figure 1']
+    assert mentions.count(TABLE, 2) == 2
+    assert mentions.count(TABLE, 1) == 1
+    assert mentions.first(TABLE, 1) == 3
+    assert mentions.first(FIGURE, 2) is None
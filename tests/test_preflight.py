@@ -0,0 +1,92 @@
+import zipfile
+from io import BytesIO
+
+import pytest
+from docx.opc.exceptions import PackageNotFoundError
+from docx.oxml import OxmlElement
+
+from jacowvalidator.docutils.doc import AbstractNotFoundError
+from jacowvalidator.docutils.generate import generate_paper, save_paper
+from jacowvalidator.docutils.page import TrackingOnError, check_tracking_on
+from jacowvalidator.docutils.preflight import preflight_docx
+
+
+def test_preflight(tmp_path):
+    path = save_paper(tmp_path / 'paper.docx', sections=3)
+    result = preflight_docx(path)
+    assert result['document_part'] == 'word/document.xml'
+    assert result['document_size'] > 0
+    assert result['comments'] == 0
+
+
+def test_preflight_refused(tmp_path):
+    with pytest.raises(TrackingOnError):
+        preflight_docx(save_paper(tmp_path / 'tracking.docx', broken=['tracking']))
+
+    with pytest.raises(AbstractNotFoundError):
+        preflight_docx(save_paper(tmp_path / 'no_abstract.docx', broken=['no_abstract']))
+
+    with pytest.raises(PackageNotFoundError):
+        preflight_docx(BytesIO(b'not a zip file'))
+
+
+def test_preflight_not_word(tmp_path):
+    f = BytesIO()
+    generate_paper().save(f)
+    # same parts with the main document given the content type of a macro enabled document
+    not_word = BytesIO()
+    with zipfile.ZipFile(f) as package, zipfile.ZipFile(not_word, 'w') as copy:
+        for name in package.namelist():
+            data = package.read(name)
+            if name == '[Content_Types].xml':
+                data = data.replace(
+                    b'application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml',
+                    b'application/vnd.ms-word.document.macroEnabled.main+xml')
+            copy.writestr(name, data)
+    with pytest.raises(PackageNotFoundError):
+        preflight_docx(not_word)
+
+
+def test_tracked_deletion_in_table():
+    from docx import Document
+    doc = generate_paper(tables=1)
+    # a deleted run in a table cell, which the check on body paragraphs used to miss
+    run = doc.tables[0].cell(0, 0).paragraphs[0].add_run('removed')
+    deletion = OxmlElement('w:del')
+    run._r.addprevious(deletion)
+    deletion.append(run._r)
+
+    f = BytesIO()
+    doc.save(f)
+    with pytest.raises(TrackingOnError):
+        preflight_docx(f)
+    with pytest.raises(TrackingOnError):
+        check_tracking_on(Document(f))
+
+
+@pytest.mark.parametrize('engine', ['docx', 'xml'])
+def test_open_with_preflight_parts(tmp_path, engine):
+    from jacowvalidator.docutils.doc import open_document
+    from jacowvalidator.docutils.walker import get_document_index
+    path = save_paper(tmp_path / 'paper.docx', sections=3)
+    parts = preflight_docx(path)['parts']
+
+    texts = [p.text for p in get_document_index(open_document(path, engine)).paragraphs]
+    assert [p.text for p in get_document_index(open_document(path, engine, parts)).paragraphs] == texts
+
+    # the part is taken from what preflight read, not read from the zip again
+    parts = {name: xml.replace(b'Abstract', b'Read once') for name, xml in parts.items()}
+    texts = [p.text for p in get_document_index(open_document(path, engine, parts)).paragraphs]
+    assert 'Read once' in texts and 'Abstract' not in texts
+
+
+def test_upload_without_abstract(tmp_path, monkeypatch):
+    from jacowvalidator import validation
+    from jacowvalidator.cache import ResultCache
+    monkeypatch.setattr(validation, 'get_result_cache', lambda config: ResultCache(max_entries=8))
+    path = save_paper(tmp_path / 'no_abstract.docx', broken=['no_abstract'])
+
+    # found by the checks rather than the preflight check, before any of them run
+    status, report = validation.validate_upload(path, path.name, 'Word')
+    assert status == 'AbstractNotFoundError'
+    assert report['error'] == 'Abstract header not found'
@@ -0,0 +1,73 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from docx.opc.exceptions import PackageNotFoundError
+
+from jacowvalidator.docutils.doc import create_upload_variables, open_document
+from jacowvalidator.docutils.rawxml import open_raw_document
+from jacowvalidator.docutils.styles import get_style_details
+from jacowvalidator.docutils.walker import get_document_index
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def style_details(p):
+    details = get_style_details(p)
+    del details['p']
+    return details
+
+
+def test_same_paragraphs_as_python_docx():
+    from docx import Document
+    doc = get_document_index(Document(test_dir / 'test2.docx'))
+    raw = get_document_index(open_raw_document(test_dir / 'test2.docx'))
+
+    assert [p.text for p in raw.paragraphs] == [p.text for p in doc.paragraphs]
+    assert [p.style.name for p in raw.paragraphs] == [p.style.name for p in doc.paragraphs]
+    assert [style_details(p) for p in raw.paragraphs] == [style_details(p) for p in doc.paragraphs]
+    assert (raw.title_index, raw.author_index, raw.abstract_index, raw.reference_index) == \
+        (doc.title_index, doc.author_index, doc.abstract_index, doc.reference_index)
+    assert raw.doc.core_properties.title == doc.doc.core_properties.title
+
+
+def without_timing(summary):
+    return {name: {k: v for k, v in section.items() if k != 'timing'} for name, section in summary.items()}
+
+
+def test_same_summary_as_python_docx():
+    summary, authors, title = create_upload_variables(open_document(test_dir / 'test2.docx', 'docx'))
+    raw_summary, raw_authors, raw_title = create_upload_variables(open_document(test_dir / 'test2.docx', 'xml'))
+
+    assert without_timing(raw_summary) == without_timing(summary)
+    assert raw_authors == authors
+    assert raw_title == title
+
+
+def test_tables_and_sections():
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph('Abstract')
+    table = doc.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(0, 0).text = 'Merged'
+    table.cell(1, 2).text = 'Last'
+    doc.add_section()
+    doc.add_paragraph('After the table')
+    stream = BytesIO()
+    doc.save(stream)
+
+    expected = get_document_index(Document(stream))
+    raw = get_document_index(open_raw_document(stream))
+
+    assert [p.text for p in raw.paragraphs] == ['Abstract', '', 'After the table']
+    assert [(p.text, p.in_table) for p in raw.all_table_paragraphs] == \
+        [(p.text, p.in_table) for p in expected.all_table_paragraphs]
+    assert raw.blocks[1] is raw.tables[0]
+    assert len(raw.doc.sections) == len(expected.doc.sections) == 2
+    assert raw.doc.sections[0].page_width == expected.doc.sections[0].page_width
+
+
+def test_not_a_docx():
+    with pytest.raises(PackageNotFoundError):
+        open_raw_document(BytesIO(b'not a zip file'))
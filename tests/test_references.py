@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from jacowvalidator.docutils.references import extract_references
+from jacowvalidator.docutils.references import extract_references, check_citations, _ref_to_ranges
 
 
 test_dir = Path(__file__).parent / 'data'
@@ -92,4 +92,24 @@ def check_list(references_list, issues):
             if check in issues[item['id']]:
                 assert item[check] is False, f"{item['id']} {check} check passes but it should fail"
             else:
-                assert item[check], f"{item['id']} {check} check failed"
\ No newline at end of file
+                assert item[check], f"{item['id']} {check} check failed"
+
+
+def test_ref_to_ranges():
+    assert _ref_to_ranges('3') == [(3, 3)]
+    assert _ref_to_ranges('1, 4-6') == [(1, 1), (4, 6)]
+    assert _ref_to_ranges('1-500') == [(1, 500)]
+
+
+def test_check_citations():
+    used, out_of_order = check_citations([[(1, 1)], [(2, 4)], [(6, 6)], [(5, 5)]], 7)
+    assert used == {1, 2, 3, 4, 5, 6}
+    assert out_of_order == {6}
+
+    # numbers in the same citation can be in any order
+    used, out_of_order = check_citations([[(2, 2), (1, 1)], [(3, 3)]], 3)
+    assert out_of_order == set()
+
+    # a range past the end of the list only counts up to the number of references
+    used, out_of_order = check_citations([[(1, 100000)]], 3)
+    assert used == {1, 2, 3} and out_of_order == set()
@@ -0,0 +1,43 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from jacowvalidator.rollups import rollup_logs
+
+
+def make_log(filename, timestamp, status='OK', ok=True, conference_id=None):
+    return SimpleNamespace(filename=filename, timestamp=timestamp, status=status, ok=ok, conference_id=conference_id)
+
+
+def test_rollup_logs():
+    logs = [
+        make_log('MOPAB001.docx', datetime(2021, 5, 24, 9), 'OK', False, 1),
+        make_log('MOPAB002.docx', datetime(2021, 5, 24, 10), 'OK', True, 1),
+        make_log('MOPAB001.docx', datetime(2021, 5, 25, 9), 'OK', True, 1),
+        make_log('MOPAB001.docx', datetime(2021, 5, 25, 8), 'TrackingOnError', False, 1),
+        make_log('MOPAB001.docx', datetime(2021, 5, 25, 11), 'OK', True),
+    ]
+    days, papers = rollup_logs(logs)
+
+    # in key order, so concurrent upserts lock the rows in the same order
+    assert [(day['day'].day, day['conference_id'], day['status']) for day in days] == [
+        (24, 1, 'OK'), (25, 0, 'OK'), (25, 1, 'OK'), (25, 1, 'TrackingOnError')]
+    assert [(paper['conference_id'], paper['filename']) for paper in papers] == [
+        (0, 'MOPAB001.docx'), (1, 'MOPAB001.docx'), (1, 'MOPAB002.docx')]
+
+    days = {(day['day'].day, day['conference_id'], day['status']): (day['count'], day['ok_count']) for day in days}
+    assert days == {
+        (24, 1, 'OK'): (2, 1),
+        (25, 1, 'OK'): (1, 1),
+        (25, 1, 'TrackingOnError'): (1, 0),
+        (25, 0, 'OK'): (1, 1),
+    }
+
+    papers = {(paper['filename'], paper['conference_id']): paper for paper in papers}
+    assert len(papers) == 3
+    paper = papers[('MOPAB001.docx', 1)]
+    assert paper['attempts'] == 3
+    assert paper['first_seen'] == datetime(2021, 5, 24, 9)
+    # the latest by timestamp, not the last written
+    assert paper['last_seen'] == datetime(2021, 5, 25, 9)
+    assert (paper['status'], paper['ok']) == ('OK', True)
+    assert papers[('MOPAB001.docx', 0)]['attempts'] == 1
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from jacowvalidator.spms import get_reference_index, reference_csv_check, PaperNotFoundError, ColumnNotFoundError
+
+CSV = '''"paper","authors","title","position","contribution ID"
+"MOPAB001","A. B. Smith, C. Jones","A  Title With   Spaces",,1
+"MOPAB002","D. Brown","Second Paper",,2
+"MOPAB001","X. Duplicate","Later Row",,3
+'''
+
+
+def test_reference_index(tmp_path):
+    path = tmp_path / 'references.csv'
+    path.write_text(CSV, encoding='ISO-8859-1')
+
+    index = get_reference_index(str(path))
+    assert index is get_reference_index(str(path)), "index should be reused while the file is unchanged"
+    assert index.get('MOPAB001')['title'] == 'A TITLE WITH SPACES'
+    assert index.get('MOPAB001')['author_list'] == ['A. B. Smith', 'C. Jones']
+    assert index.get('MISSING') is None
+
+    path.write_text(CSV.replace('Second Paper', 'Second Paper Changed'), encoding='ISO-8859-1')
+    os.utime(path, ns=(0, 0))
+    assert get_reference_index(str(path)).get('MOPAB002')['title'] == 'SECOND PAPER CHANGED'
+
+
+def test_reference_csv_check(tmp_path):
+    path = tmp_path / 'references.csv'
+    path.write_text(CSV, encoding='ISO-8859-1')
+
+    result = reference_csv_check('MOPAB001', 'A Title With Spaces', 'A. B. Smith, C. Jones', str(path))
+    assert result['title']['match'] is True
+    assert result['author']['match'] is True
+    assert result['author']['spms_list'] == ['A. B. Smith', 'C. Jones']
+
+    result = reference_csv_check('MOPAB002', 'Second paper', 'D. Brown, E. Green', str(path))
+    assert result['title']['match'] is True
+    assert result['author']['match'] is False
+
+    with pytest.raises(PaperNotFoundError):
+        reference_csv_check('MOPAB003', 'Title', 'A. Author', str(path))
+
+
+def test_missing_column(tmp_path):
+    path = tmp_path / 'references.csv'
+    path.write_text('"paper","title"\n"MOPAB001","Title"\n', encoding='ISO-8859-1')
+
+    with pytest.raises(ColumnNotFoundError):
+        get_reference_index(str(path))
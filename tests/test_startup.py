@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from datetime import datetime
+
+from jacowvalidator.buildinfo import load_build_info, parse_build_date, read_build_envs
+
+# the document parsers are imported on first use, not when the app starts
+IMPORT_SCRIPT = """
+import subprocess
+import sys
+
+def no_subprocess(*args, **kwargs):
+    raise AssertionError(f"subprocess started on import: {args}")
+
+subprocess.Popen = no_subprocess
+import jacowvalidator
+print(' '.join(name for name in ['docx', 'TexSoup', 'jacowvalidator.docutils.doc'] if name in sys.modules))
+"""
+
+
+def test_import_is_lazy():
+    result = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == []
+
+
+def test_build_info(tmp_path):
+    build_envs = tmp_path / 'build_envs.txt'
+    build_envs.write_text(
+        "BUILD_GIT_COMMIT=0123456789abcdef\nBUILD_GIT_BRANCH=master\nBUILD_CREATED=2021-05-24T09:30:00Z\nOTHER=1\n")
+    assert read_build_envs(build_envs)['BUILD_GIT_BRANCH'] == 'master'
+    assert 'OTHER' not in read_build_envs(build_envs)
+
+    info = load_build_info(build_envs, environ={'BUILD_GIT_BRANCH': 'release'}, directory=tmp_path)
+    assert info['commit_sha'] == '0123456'
+    assert info['branch'] == 'release'
+    assert info['commit_date'].replace(tzinfo=None) == datetime(2021, 5, 24, 9, 30)
+
+
+def test_build_info_from_git(tmp_path):
+    git_dir = tmp_path / '.git'
+    (git_dir / 'refs' / 'heads').mkdir(parents=True)
+    (git_dir / 'HEAD').write_text('ref: refs/heads/master\n')
+    (git_dir / 'packed-refs').write_text('# pack-refs with: peeled\nfedcba9876543210 refs/heads/master\n')
+
+    info = load_build_info(tmp_path / 'missing.txt', environ={}, directory=tmp_path)
+    assert info['commit_sha'] == 'fedcba9'
+    assert info['commit_date'] is None
+
+    (git_dir / 'refs' / 'heads' / 'master').write_text('abcdef0123456789\n')
+    assert load_build_info(tmp_path / 'missing.txt', environ={}, directory=tmp_path)['commit_sha'] == 'abcdef0'
+
+
+def test_parse_build_date():
+    assert parse_build_date('') is None
+    assert parse_build_date('not a date') is None
+    assert parse_build_date('1621848600') == datetime.fromtimestamp(1621848600)
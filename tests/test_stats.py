@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from jacowvalidator.docutils.doc import create_upload_variables
+from jacowvalidator.docutils.generate import save_paper
+from jacowvalidator.docutils.stats import get_document_stats
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def test_document_stats(tmp_path):
+    from docx import Document
+    path = save_paper(tmp_path / 'paper.docx', references=5, figures=3, tables=2, nested_tables=1)
+    doc = Document(path)
+
+    stats = get_document_stats(doc)
+    assert stats['tables'] == 2
+    # 3x3 cells in each table, one of them holding a 2x2 table
+    assert stats['cells'] == 2 * (9 + 4)
+    assert stats['paragraphs'] > 0 and stats['runs'] > 0
+    assert stats['references'] is None and stats['file_size'] is None
+
+    summary, _, _ = create_upload_variables(doc)
+    stats = get_document_stats(doc, path, summary)
+    assert stats['references'] == 5
+    assert stats['figures'] == 3
+    assert stats['file_size'] == path.stat().st_size
+    assert stats['parts'] > 0
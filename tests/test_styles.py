@@ -0,0 +1,90 @@
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+
+from jacowvalidator.docutils.styles import get_style_details, get_style_resolver
+
+
+def create_derived_style_document():
+    doc = Document()
+    grandparent = doc.styles.add_style('Grandparent', WD_STYLE_TYPE.PARAGRAPH)
+    grandparent.font.size = Pt(9)
+    grandparent.font.bold = True
+    grandparent.paragraph_format.space_before = Pt(6)
+    grandparent.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    parent = doc.styles.add_style('Parent', WD_STYLE_TYPE.PARAGRAPH)
+    parent.base_style = grandparent
+    parent.paragraph_format.space_after = Pt(3)
+    child = doc.styles.add_style('Child', WD_STYLE_TYPE.PARAGRAPH)
+    child.base_style = parent
+    child.font.italic = True
+    return doc
+
+
+def test_full_style_chain():
+    doc = create_derived_style_document()
+    p = doc.add_paragraph('Some text', style='Child')
+
+    detail = get_style_details(p)
+    assert detail['font_size'] == 9.0, "font size should come from two styles up"
+    assert detail['bold'] is True
+    assert detail['italic'] is True
+    assert detail['space_before'] == 6.0
+    assert detail['space_after'] == 3.0
+    assert detail['alignment'] == 'JUSTIFY'
+
+
+def test_paragraph_overrides_style():
+    doc = create_derived_style_document()
+    p = doc.add_paragraph('Some text', style='Child')
+    p.paragraph_format.space_before = Pt(12)
+    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    p.runs[0].font.size = Pt(10)
+
+    detail = get_style_details(p)
+    assert detail['space_before'] == 12.0
+    assert detail['alignment'] == 'CENTER'
+    assert detail['font_size'] == 10.0
+
+
+def test_doc_defaults():
+    doc = create_derived_style_document()
+    rPr = doc.styles.element.xpath('w:docDefaults/w:rPrDefault/w:rPr')[0]
+    rPr.get_or_add_rFonts().set('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}ascii', 'Arial')
+    p = doc.add_paragraph('Some text', style='Child')
+
+    assert get_style_details(p)['font_name'] == 'Arial', "font name should come from the document defaults"
+
+
+def test_resolver_is_shared():
+    doc = create_derived_style_document()
+    p1 = doc.add_paragraph('Some text', style='Child')
+    p2 = doc.add_paragraph('Other text', style='Child')
+
+    resolver = get_style_resolver(p1)
+    assert resolver is get_style_resolver(p2)
+    assert resolver.get_style(p1) is resolver.get_style(p2), "style should only be resolved once"
+
+
+def test_compiled_rules():
+    from jacowvalidator.docutils.styles import StyleRules, DETAIL_KEYS
+    rules = StyleRules({
+        'styles': {'jacow': 'JACoW_Body Text Indent'},
+        'space_before': 0.0,
+        'space_after': ['>=', 3.0],
+        'font_size': 10.0,
+    })
+    detail = dict.fromkeys(DETAIL_KEYS)
+    detail.update(space_before=None, space_after=6.0, font_size=10.0, bold=True)
+
+    assert rules.check(detail) is True, "no spacing set should count as 0"
+    assert detail['bold'] == 'NA', "details without a rule should be NA"
+    assert detail['all_caps'] is None, "all_caps should always be kept"
+
+    detail = dict.fromkeys(DETAIL_KEYS)
+    detail.update(space_before=6.0, space_after=None, font_size=9.0)
+    assert rules.check(detail) is False
+    assert detail['space_before'] == '6.0 should be 0.0'
+    assert detail['space_after'] == 'None should be >= 3.0'
+    assert detail['font_size'] == '9.0 should be 10.0'
@@ -0,0 +1,126 @@
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from flask import request
+from flask_uploads import UploadNotAllowed
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from jacowvalidator import app, document_docx
+from jacowvalidator.cache import file_digest
+from jacowvalidator.uploads import UploadFile, receive_upload
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def test_upload_file_spooled(tmp_path):
+    upload = UploadFile(spool_size=10, directory=str(tmp_path))
+    upload.write(b'12345')
+    assert not upload._rolled, "kept in memory while small"
+    upload.write(b'67890abcdef')
+    assert upload._rolled
+    assert upload.size == 16
+    assert upload.digest() == hashlib.sha256(b'1234567890abcdef').hexdigest()
+    assert list(tmp_path.iterdir()) == [], "spooled to an unnamed file"
+    upload.close()
+
+
+def test_receive_upload():
+    data = (test_dir / 'test2.docx').read_bytes()
+    with app.test_request_context(
+            '/upload', method='POST', data={'document': (BytesIO(data), 'Test 2.docx')}):
+        filename, upload = receive_upload(document_docx, request.files['document'])
+        assert filename == 'Test_2.docx'
+        assert isinstance(upload, UploadFile)
+        assert file_digest(upload) == hashlib.sha256(data).hexdigest()
+        assert upload.read() == data
+
+    with app.test_request_context(
+            '/upload', method='POST', data={'document': (BytesIO(b'text'), 'paper.txt')}):
+        with pytest.raises(UploadNotAllowed):
+            receive_upload(document_docx, request.files['document'])
+
+
+def test_upload_too_large(monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1000)
+    with app.test_request_context(
+            '/upload', method='POST', data={'document': (BytesIO(b'x' * 2000), 'paper.docx')}):
+        with pytest.raises(RequestEntityTooLarge):
+            request.files['document']
+
+
+LATEX_PAPER = r"""\documentclass{jacow}
+\title{A Test Paper}
+\author{A. Author, B. Author, Institute, City, Country}
+\begin{document}
+\maketitle
+\begin{abstract}
+This is the abstract.
+\end{abstract}
+\section{Introduction}
+Some text.
+\end{document}
+"""
+
+
+@pytest.fixture
+def upload_client(monkeypatch):
+    """Test client that checks uploads without a database, returning the logs it would save"""
+    from jacowvalidator import validation
+    from jacowvalidator.cache import ResultCache
+    from jacowvalidator.conferences import ConferenceRegistry
+    from jacowvalidator.routes import main
+
+    logs = []
+    monkeypatch.setattr(ConferenceRegistry, 'active', lambda self: [])
+    monkeypatch.setattr(main, 'save_log', lambda filename, conference_id, status, report: logs.append(status))
+    # a fresh cache, so the upload is parsed
+    monkeypatch.setattr(validation, 'get_result_cache', lambda config: ResultCache(max_entries=8))
+    monkeypatch.setitem(app.config, 'UPLOAD_JOBS', False)
+    return app.test_client(), logs
+
+
+def test_upload_docx(upload_client):
+    client, logs = upload_client
+    data = (test_dir / 'test2.docx').read_bytes()
+    response = client.post(
+        '/upload', data={'document': (BytesIO(data), 'test2.docx')}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert logs == ['OK']
+    assert 'Failed to process document' not in response.get_data(as_text=True)
+
+
+def test_upload_latex(upload_client):
+    client, logs = upload_client
+    response = client.post(
+        '/upload_latex', data={'document': (BytesIO(LATEX_PAPER.encode()), 'paper.tex')},
+        content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert logs == ['OK']
+    assert 'Failed to process document' not in response.get_data(as_text=True)
+
+
+def test_upload_options(upload_client, monkeypatch):
+    from jacowvalidator import validation
+    client, logs = upload_client
+    engines = []
+    validate_upload = validation.validate_upload
+    monkeypatch.setattr(validation, 'validate_upload', lambda *args: engines.append(args[5]) or validate_upload(*args))
+    data = (test_dir / 'test2.docx').read_bytes()
+
+    for admin, engine, expected in [(False, 'xml', app.config['DOCX_ENGINE']), (True, 'xml', 'xml'),
+                                    (True, 'unknown', app.config['DOCX_ENGINE'])]:
+        monkeypatch.setenv('DEV_DEBUG', str(admin))
+        response = client.post(
+            '/upload', data={'document': (BytesIO(data), 'test2.docx'), 'checks': 'quick', 'engine': engine},
+            content_type='multipart/form-data')
+        assert response.status_code == 200
+        assert engines.pop() == expected, "only admins can pick an engine, and only a known one"
+        html = response.get_data(as_text=True)
+        assert 'value="quick"  checked' in html, "the quick check should stay ticked"
+        if admin:
+            assert f'<option value="{expected}"  selected >' in html
+
+    response = client.get('/upload_latex')
+    assert 'name="checks"' not in response.get_data(as_text=True), "latex uploads have no quick check"
@@ -0,0 +1,19 @@
+from jacowvalidator.utils import log_report, report_sections, sections_ok
+
+
+def test_log_report():
+    report = {
+        'summary': {'Title': {'ok': True}, 'Styles': {'ok': False}, 'Figures': {'ok': 2}},
+        'authors': [{'name': 'A. Author'}],
+        'filename': 'paper.docx',
+        'error': None,
+    }
+    logged = log_report(report)
+    assert logged == {'summary': report['summary'], 'authors': report['authors']}, \
+        "the logged parts are kept as they are, not encoded again"
+
+    sections = report_sections(logged)
+    assert sections == {'Title': True, 'Styles': False, 'Figures': 2}
+    assert not sections_ok('OK', sections)
+    assert sections_ok('OK', {'Title': True, 'Figures': 2})
+    assert not sections_ok('TrackingOnError', {})
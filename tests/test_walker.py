@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from jacowvalidator.docutils.walker import get_document_index, DocumentIndex
+
+test_dir = Path(__file__).parent / 'data'
+
+
+def test_document_index():
+    from docx import Document
+    doc = Document(test_dir / 'test2.docx')
+    index = get_document_index(doc)
+
+    assert get_document_index(index) is index, "existing index should be reused"
+    assert [p.text for p in index.paragraphs] == [p.text for p in doc.paragraphs]
+    assert [p.style.name for p in index.paragraphs] == [p.style.name for p in doc.paragraphs]
+    assert len(index.tables) == len(doc.tables)
+
+    assert index.title_index == 0, "title should be the first paragraph"
+    assert index.author_index == 1, "authors should start when the style changes"
+    assert index.paragraphs[index.abstract_index].text == 'Abstract'
+    assert index.body_paragraphs[0].index == index.abstract_index + 1
+
+
+def test_document_index_sections():
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph('A TITLE', style='Title')
+    doc.add_paragraph('A. Author')
+    doc.add_paragraph('Abstract')
+    doc.add_paragraph('Some text')
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(1, 1).text = 'Figure 1: in a table'
+    doc.add_paragraph('References')
+    doc.add_paragraph('[1]\tA reference')
+    index = DocumentIndex(doc)
+
+    assert [p.text for p in index.title_paragraphs] == ['A TITLE']
+    assert [p.text for p in index.author_paragraphs] == ['A. Author']
+    assert [p.text for p in index.body_paragraphs] == ['Some text']
+    assert [p.text for p in index.reference_paragraphs] == ['[1]\tA reference']
+    assert index.blocks[4] is index.tables[0]
+    assert [(p.text, p.in_table) for p in index.all_table_paragraphs if p.text] == [('Figure 1: in a table', (1, 2, 2))]
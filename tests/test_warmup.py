@@ -0,0 +1,19 @@
+from jacowvalidator import app, warmup
+
+
+def test_ready_after_warmup(monkeypatch):
+    monkeypatch.setattr(warmup, '_warmup', {'ready': False})
+    monkeypatch.setitem(app.config, 'LOG_QUEUE_SIZE', 0)
+    client = app.test_client()
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False
+
+    # the SPMS indexes need the database, without one they are left to be built on first use
+    timings = warmup.warmup()
+    assert set(timings) == {'imports', 'templates', 'spms'}
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+    assert response.get_json()['log_writer'] is None